@@ -0,0 +1,58 @@
+""" Memory and lookup time of the signal namespace, compared to the legacy RecursiveDict
+
+    python benchmarks/bench_namespace.py --keys 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from signal_plotter.namespace import SignalNamespace
+from signal_plotter.plot_window import RecursiveDict
+
+
+def make_items(count: int) -> dict:
+    """Signals named `group_<i>.signal_<j>.channel_<k>`, sharing one value dict (only the names are measured)"""
+    value = {"x": None, "y": None}
+    return {f"group_{i // 1000}.signal_{i // 10 % 100}.channel_{i % 10}": value for i in range(count)}
+
+
+def measure(factory, items: dict) -> tuple[object, float, float]:
+    """Build a container of the items, and return it with its memory (MiB) and build time (s)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = factory(items)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    return container, memory, elapsed
+
+
+def lookup_time(container, keys: list[str]) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        container[key]
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=1_000_000, help="Number of signals")
+    args = parser.parse_args()
+
+    items = make_items(args.keys)
+    keys = list(items)[:: max(args.keys // 100_000, 1)]
+    print(f"{args.keys} signals, {len(keys)} lookups")
+    print(f"{'container':<16} {'memory (MiB)':>12} {'build (s)':>10} {'lookups (s)':>12}")
+    for name, factory in (("RecursiveDict", RecursiveDict), ("SignalNamespace", SignalNamespace)):
+        container, memory, elapsed = measure(factory, items)
+        print(f"{name:<16} {memory:>12.1f} {elapsed:>10.2f} {lookup_time(container, keys):>12.3f}")
+        del container
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+""" Compare two result files of benchmarks/run.py and report the regressions
+
+    python benchmarks/compare.py before.json after.json --threshold 1.2
+
+The minimum times of the cases run in both files are compared, a case is a regression when it is `threshold` times
+slower (or uses `threshold` times more peak memory). The exit status is 1 if there are regressions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+# Times below this are too noisy to be compared (seconds)
+MIN_TIME = 1e-4
+
+
+def load(path: str) -> tuple[dict, dict[tuple, dict]]:
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("metadata", {}), {
+        (result["benchmark"], result["signals"], result["samples"]): result for result in data["results"]
+    }
+
+
+def compare(before: dict[tuple, dict], after: dict[tuple, dict], threshold: float = 1.2) -> list[dict]:
+    """Ratios (after / before) of the time and peak memory of the cases of both results"""
+    rows = []
+    for case in sorted(before.keys() & after.keys()):
+        old, new = before[case], after[case]
+        time_ratio = max(new["min"], MIN_TIME) / max(old["min"], MIN_TIME)
+        memory_ratio = None
+        if old.get("peak_memory") and new.get("peak_memory"):
+            memory_ratio = new["peak_memory"] / old["peak_memory"]
+        rows.append(
+            {
+                "case": case,
+                "before": old["min"],
+                "after": new["min"],
+                "time_ratio": time_ratio,
+                "memory_ratio": memory_ratio,
+                "regression": time_ratio > threshold or (memory_ratio is not None and memory_ratio > threshold),
+            }
+        )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark results")
+    parser.add_argument("before", help="JSON results of the reference commit")
+    parser.add_argument("after", help="JSON results of the commit to check")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    before_metadata, before = load(args.before)
+    after_metadata, after = load(args.after)
+    print(f"before: {before_metadata.get('commit')}  after: {after_metadata.get('commit')}")
+    rows = compare(before, after, args.threshold)
+    for row in rows:
+        name, signals, samples = row["case"]
+        memory = f"{row['memory_ratio']:6.2f}x mem" if row["memory_ratio"] is not None else ""
+        print(
+            f"{name:<10} signals={signals:<7} samples={samples:<10} "
+            f"{row['before'] * 1000:10.2f} ms -> {row['after'] * 1000:10.2f} ms {row['time_ratio']:6.2f}x {memory}"
+            + ("  REGRESSION" if row["regression"] else "")
+        )
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{len(rows)} cases compared, {regressions} regressions")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+""" Benchmarks of the slow paths of the signal plotter, run under the offscreen Qt platform
+
+    python benchmarks/run.py                        # All the benchmarks, default sweeps
+    python benchmarks/run.py plot math --samples 1000 1000000 --output results.json
+    python benchmarks/compare.py before.json after.json
+
+Each benchmark is timed over a sweep of signal counts and sample counts (cases with more than `--max-cells` values, or
+which would not fit in half of the memory, are skipped). The minimum and median of the repetitions are recorded with
+the peak of the memory allocated during one more repetition (traced with tracemalloc, so the memory allocated by Qt
+itself is not included), and the results are saved as JSON to be compared between commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy  # noqa: E402
+import pyqtgraph  # noqa: E402
+from pyqtgraph.Qt import QT_LIB  # noqa: E402
+from pyqtgraph.Qt.QtWidgets import QApplication  # noqa: E402
+
+from signal_plotter.namespace import SignalNamespace  # noqa: E402
+from signal_plotter.plot_window import PlotWindow  # noqa: E402
+
+SIGNAL_COUNTS = [100, 1_000, 10_000, 100_000]
+SAMPLE_COUNTS = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000]
+
+# Default sweeps of the benchmarks, the timed operations only depend on one of the two dimensions
+SIGNALS_SWEEP = {"signals": SIGNAL_COUNTS, "samples": [1_000]}
+SAMPLES_SWEEP = {"signals": [1, 10], "samples": SAMPLE_COUNTS}
+
+
+def make_items(signals: int, samples: int) -> dict:
+    """Signals `group_<i>.signal_<j>` sharing the same arrays (so that large sweeps fit in memory)"""
+    x = numpy.arange(samples, dtype=float)
+    y = numpy.sin(x / 1000.0) + numpy.random.default_rng(0).normal(0, 0.1, samples)
+    return {f"group_{i // 100}.signal_{i % 100}": {"x": x, "y": y, "units": "V"} for i in range(signals)}
+
+
+def process_events() -> None:
+    QApplication.processEvents()
+
+
+# region Benchmarks
+# Each benchmark prepares its data and returns the timed function and the function resetting the state between two
+# repetitions (not timed)
+
+
+def bench_namespace(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    items = make_items(signals, samples)
+    return (lambda: SignalNamespace(items)), None
+
+
+def bench_window(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    items = make_items(signals, samples)
+    windows = []
+
+    def run() -> None:
+        windows.append(PlotWindow(items))
+
+    def reset() -> None:
+        while windows:
+            windows.pop().deleteLater()
+        process_events()
+
+    return run, reset
+
+
+def bench_tree(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    """Check all the signals in the tree of signals, then uncheck them"""
+    widget = PlotWindow.ListContainer(SignalNamespace(make_items(signals, samples)))
+    widget.tree.expand(widget.model.indexFromPath("group_0"))
+    keys = widget.signalKeys()
+
+    def run() -> None:
+        widget.selection.setSelection(keys)
+        widget.selection.clear()
+
+    return run, None
+
+
+def bench_search(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    """Alternate between a search matching 1% of the signals and an empty search"""
+    widget = PlotWindow.ListContainer(SignalNamespace(make_items(signals, samples)))
+    queries = ["signal_1", ""]
+
+    def run() -> None:
+        widget.set_item_visibility(queries[0])
+        queries.reverse()
+
+    return run, None
+
+
+def bench_plot(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    """Plot `signals` curves at once (setSignal), the pyramids are built by the first repetition"""
+    widget = PlotWindow.SignalContainer(SignalNamespace(make_items(signals, samples)))
+    keys = list(widget.items)
+
+    def run() -> None:
+        widget.updateSelection(keys, [])
+
+    def reset() -> None:
+        widget.updateSelection([], keys)
+
+    return run, reset
+
+
+def bench_pan(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    """Pan the view over `signals` displayed curves and render it (drawn by a batch from 32 curves)"""
+    widget = PlotWindow.SignalContainer(SignalNamespace(make_items(signals, samples)), batch_size=32)
+    widget.resize(800, 400)
+    widget.updateSelection(list(widget.items), [])
+    steps = iter(range(1_000_000_000))
+
+    def run() -> None:
+        start = next(steps) % 10 * samples / 20
+        widget.setXRange(start, start + samples / 2, padding=0)
+        widget.grab()
+
+    return run, None
+
+
+def bench_math(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    """Evaluate and plot a math operation on the signals (its memoized result is forgotten between repetitions)"""
+    widget = PlotWindow.SignalContainer(SignalNamespace(make_items(signals, samples)))
+    text = " + ".join(f"2 * {key}" for key in widget.items) + " + 1"
+    widget.updateSelection(list(widget.items)[:1], [])  # The result is plotted against the displayed signal
+
+    def run() -> None:
+        widget.eval_math_operation(text)
+        widget.math_future.result()
+        process_events()  # Deliver the result to the GUI thread, which plots it
+
+    def reset() -> None:
+        widget.math_engine.clear()
+
+    return run, reset
+
+
+def _write_csv(signals: int, samples: int) -> tuple[tempfile.TemporaryDirectory, str]:
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "log.csv")
+    data = numpy.random.default_rng(0).normal(size=(samples, signals + 1))
+    data[:, 0] = numpy.arange(samples)
+    header = ",".join(["time"] + [f"group_{i // 100}.signal_{i % 100}" for i in range(signals)])
+    numpy.savetxt(path, data, fmt="%.6g", delimiter=",", header=header, comments="")
+    return directory, path
+
+
+def bench_csv(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    """Parse a csv file (without the cache)"""
+    from signal_plotter.csv_parser import read_csv
+
+    directory, path = _write_csv(signals, samples)
+    return (lambda: (directory, read_csv(path, use_cache=False, progress=False))), None
+
+
+def bench_csv_cache(signals: int, samples: int) -> tuple[Callable, Callable | None]:
+    """Load a csv file from its memory-mapped cache"""
+    from signal_plotter.csv_parser import read_csv
+
+    directory, path = _write_csv(signals, samples)
+    read_csv(path, progress=False)  # Write the cache
+    return (lambda: (directory, read_csv(path, progress=False))), None
+
+
+# Estimates of the memory used by a case (bytes), from its signal and sample counts
+def no_arrays(signals: int, samples: int) -> int:
+    return 0
+
+
+def plot_memory(signals: int, samples: int) -> int:
+    return 8 * samples * 2 * (1 + signals)  # Shared x and y, the pyramid and the downsampled copies of each curve
+
+
+def math_memory(signals: int, samples: int) -> int:
+    return 8 * samples * 4  # Shared x and y, the result and its plotted copy
+
+
+def csv_memory(signals: int, samples: int) -> int:
+    return 8 * samples * (signals + 1) * 3  # Text, dataframe and columns
+
+
+CSV_SWEEP = {"signals": [10, 100], "samples": SAMPLE_COUNTS[:5]}
+
+# name: (function, default sweep, memory estimate)
+BENCHMARKS = {
+    "namespace": (bench_namespace, SIGNALS_SWEEP, no_arrays),
+    "window": (bench_window, SIGNALS_SWEEP, no_arrays),
+    "tree": (bench_tree, SIGNALS_SWEEP, no_arrays),
+    "search": (bench_search, SIGNALS_SWEEP, no_arrays),
+    "plot": (bench_plot, {"signals": [1, 10, 100], "samples": SAMPLE_COUNTS}, plot_memory),
+    "pan": (bench_pan, {"signals": [1, 10, 100, 1_000], "samples": [100_000]}, plot_memory),
+    "math": (bench_math, SAMPLES_SWEEP, math_memory),
+    "csv": (bench_csv, CSV_SWEEP, csv_memory),
+    "csv_cache": (bench_csv_cache, CSV_SWEEP, csv_memory),
+}
+
+# endregion Benchmarks
+
+
+def measure(function: Callable, signals: int, samples: int, repeat: int, max_time: float, memory: bool) -> dict:
+    """Time a benchmark case, and trace the peak of the memory allocated by one more repetition"""
+    run, reset = function(signals, samples)
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat and (not times or time.perf_counter() - start < max_time):
+        begin = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - begin)
+        if reset is not None:
+            reset()
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if reset is not None:
+            reset()
+    return {
+        "signals": signals,
+        "samples": samples,
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "peak_memory": peak_memory,
+    }
+
+
+def run_benchmarks(
+    names: list[str],
+    signals: list[int] | None = None,
+    samples: list[int] | None = None,
+    repeat: int = 3,
+    max_time: float = 10.0,
+    max_cells: float = 1e8,
+    memory: bool = True,
+    output=sys.stdout,
+) -> list[dict]:
+    """Run the benchmarks over their sweeps (or the given signal and sample counts) and return the results"""
+    physical_memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") if hasattr(os, "sysconf") else None
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+    results = []
+    for name in names:
+        function, sweep, estimate = BENCHMARKS[name]
+        for signal_count in signals or sweep["signals"]:
+            for sample_count in samples or sweep["samples"]:
+                label = f"{name:<10} signals={signal_count:<7} samples={sample_count:<10}"
+                if signal_count * sample_count > max_cells:
+                    continue
+                needed = estimate(signal_count, sample_count)
+                if physical_memory is not None and needed > physical_memory / 2:
+                    print(f"{label} skipped (needs about {needed / 2**30:.1f} GiB)", file=output)
+                    continue
+                result = {"benchmark": name, **measure(function, signal_count, sample_count, repeat, max_time, memory)}
+                results.append(result)
+                memory_text = f"{result['peak_memory'] / 2**20:10.1f} MiB" if result["peak_memory"] is not None else ""
+                print(f"{label} {result['min'] * 1000:10.2f} ms {memory_text}", file=output, flush=True)
+    return results
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pyqtgraph": pyqtgraph.__version__,
+        "qt": QT_LIB,
+        "platform": platform.platform(),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks of the signal plotter")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run (all by default): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--signals", type=int, nargs="+", help="Signal counts (default: sweep of each benchmark)")
+    parser.add_argument("--samples", type=int, nargs="+", help="Sample counts (default: sweep of each benchmark)")
+    parser.add_argument("--repeat", type=int, default=3, help="Maximum number of repetitions of each case")
+    parser.add_argument("--max-time", type=float, default=10.0, help="Seconds after which a case is not repeated")
+    parser.add_argument("--max-cells", type=float, default=1e8, help="Skip the cases with more signals x samples")
+    parser.add_argument("--no-memory", action="store_true", help="Don't trace the peak memory")
+    parser.add_argument("-o", "--output", help="JSON file of the results (default: benchmark-<commit>.json)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run_benchmarks(
+        args.benchmarks or list(BENCHMARKS),
+        signals=args.signals,
+        samples=args.samples,
+        repeat=args.repeat,
+        max_time=args.max_time,
+        max_cells=args.max_cells,
+        memory=not args.no_memory,
+    )
+    meta = metadata()
+    output = args.output or f"benchmark-{(meta['commit'] or 'unknown')[:10]}.json"
+    with open(output, "w") as f:
+        json.dump({"metadata": meta, "results": results}, f, indent=1)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+""" Preallocated numpy buffers for signals which grow while they are displayed"""
+
+from __future__ import annotations
+
+import numpy
+
+
+class GrowableArray:
+    """1D array with amortized O(1) appends.
+
+    The values are stored in a preallocated buffer whose capacity is doubled when it is full, `data` being a view on
+    the filled part of the buffer. Views returned before a reallocation keep showing the previous values.
+    """
+
+    def __init__(self, values=None, dtype=None, capacity: int = 1024) -> None:
+        values = numpy.asarray(values if values is not None else [], dtype=dtype).ravel()
+        self._buffer = numpy.empty(max(capacity, values.size), dtype=values.dtype if dtype is None else dtype)
+        self._buffer[: values.size] = values
+        self._size = values.size
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dtype(self) -> numpy.dtype:
+        return self._buffer.dtype
+
+    @property
+    def capacity(self) -> int:
+        return self._buffer.size
+
+    @property
+    def data(self) -> numpy.ndarray:
+        """View on the values of the array"""
+        return self._buffer[: self._size]
+
+    def reserve(self, capacity: int) -> None:
+        if capacity > self._buffer.size:
+            buffer = numpy.empty(max(capacity, 2 * self._buffer.size), dtype=self._buffer.dtype)
+            buffer[: self._size] = self._buffer[: self._size]
+            self._buffer = buffer
+
+    def extend(self, values) -> None:
+        values = numpy.asarray(values).ravel()
+        self.reserve(self._size + values.size)
+        self._buffer[self._size : self._size + values.size] = values
+        self._size += values.size
+
+    def truncate(self, size: int) -> None:
+        """Drop the values after the first `size` ones"""
+        self._size = min(self._size, max(size, 0))
+
+
+class RingBuffer:
+    """1D buffer of fixed capacity keeping the last appended values.
+
+    The values are stored twice (mirrored storage), so that the last values are always available as a contiguous view
+    without copying them. The buffer also has some slack: appending up to `slack` values does not modify the memory of a
+    view returned before, so a consumer can draw a view while a producer keeps appending values.
+    """
+
+    def __init__(self, capacity: int, dtype=numpy.float64, slack: int | None = None) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._length = capacity + (slack if slack is not None else max(capacity // 2, 1))
+        self._buffer = numpy.empty(2 * self._length, dtype=dtype)
+        self._head = 0  # Position of the next value in the ring
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dtype(self) -> numpy.dtype:
+        return self._buffer.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self._buffer.nbytes
+
+    @property
+    def data(self) -> numpy.ndarray:
+        """View on the last values, from the oldest to the newest"""
+        end = self._head + self._length
+        return self._buffer[end - self._size : end]
+
+    def extend(self, values) -> None:
+        values = numpy.asarray(values, dtype=self._buffer.dtype).ravel()[-self.capacity :]
+        first = min(values.size, self._length - self._head)
+        for offset in (0, self._length):
+            self._buffer[offset + self._head : offset + self._head + first] = values[:first]
+            self._buffer[offset : offset + values.size - first] = values[first:]
+        self._head = (self._head + values.size) % self._length
+        self._size = min(self._size + values.size, self.capacity)
@@ -0,0 +1,129 @@
+""" Memory-mapped columnar cache of parsed signal files
+
+The first parse of a file writes a sidecar directory next to it, holding one `.npy` file per column and a JSON manifest.
+The manifest is keyed by the size, modification time and a content hash of the source file, so that later launches can
+memory-map the columns instead of parsing the file again: only the pages of the columns which are actually plotted are
+read from the disk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from signal_plotter.profiling import profiled
+
+logger = logging.getLogger('plot_window_tree')
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".sigcache"
+MANIFEST = "manifest.json"
+
+# Size of the blocks hashed at the beginning and at the end of the file
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def cache_path(source: str) -> str:
+    """Path of the cache directory of a source file"""
+    return source + CACHE_SUFFIX
+
+
+def file_signature(source: str) -> dict:
+    """Signature of a source file: size, modification time and hash of its first and last blocks.
+
+    Hashing the whole file would cost as much as reading it, so only its head and tail are hashed, which is enough to
+    detect files rewritten with the same size and modification time.
+    """
+    stat = os.stat(source)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(source, "rb") as f:
+        digest.update(f.read(HASH_BLOCK_SIZE))
+        if stat.st_size > HASH_BLOCK_SIZE:
+            f.seek(max(stat.st_size - HASH_BLOCK_SIZE, HASH_BLOCK_SIZE))
+            digest.update(f.read(HASH_BLOCK_SIZE))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+@profiled("csv.cache.load")
+def load(source: str) -> tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]] | None:
+    """Memory-map the cached columns of a source file.
+
+    Returns:
+        The index name, the index array and the dict of column arrays, or None if there is no valid cache.
+    """
+    directory = cache_path(source)
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != CACHE_VERSION or manifest.get("signature") != file_signature(source):
+        logger.info(f"Cache of {source} is outdated")
+        return None
+
+    try:
+        index = numpy.load(os.path.join(directory, manifest["index"]["file"]), mmap_mode="r")
+        columns = {
+            column["name"]: numpy.load(os.path.join(directory, column["file"]), mmap_mode="r")
+            for column in manifest["columns"]
+        }
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Invalid cache for {source}: {e}")
+        return None
+    return manifest["index"]["name"], index, columns
+
+
+@profiled("csv.cache.save")
+def save(source: str, index_name: str | None, index: numpy.ndarray, columns: dict[str, numpy.ndarray]) -> bool:
+    """Write the columns of a parsed source file to its cache directory.
+
+    The cache is written to a temporary directory which is then moved in place, so that a concurrent reader never
+    sees a partial cache. Returns False if the cache could not be written (e.g. read-only location).
+    """
+    arrays = [index] + list(columns.values())
+    if any(array.dtype.hasobject for array in arrays):
+        logger.debug(f"Not caching {source}: non-numerical arrays can't be memory-mapped")
+        return False
+
+    directory = cache_path(source)
+    try:
+        signature = file_signature(source)
+        tmp_directory = tempfile.mkdtemp(prefix=os.path.basename(directory) + ".", dir=os.path.dirname(directory) or ".")
+    except OSError as e:
+        logger.warning(f"Can't write the cache of {source}: {e}")
+        return False
+
+    try:
+        manifest = {
+            "version": CACHE_VERSION,
+            "signature": signature,
+            "index": {"name": index_name, "file": "index.npy"},
+            "columns": [],
+        }
+        numpy.save(os.path.join(tmp_directory, "index.npy"), numpy.ascontiguousarray(index))
+        for i, (name, array) in enumerate(columns.items()):
+            file = f"column_{i:06d}.npy"
+            numpy.save(os.path.join(tmp_directory, file), numpy.ascontiguousarray(array))
+            manifest["columns"].append({"name": name, "file": file, "dtype": array.dtype.str})
+        with open(os.path.join(tmp_directory, MANIFEST), "w") as f:
+            json.dump(manifest, f)
+
+        clear(source)
+        os.replace(tmp_directory, directory)
+    except OSError as e:
+        logger.warning(f"Can't write the cache of {source}: {e}")
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        return False
+    return True
+
+
+def clear(source: str) -> None:
+    """Remove the cache directory of a source file"""
+    shutil.rmtree(cache_path(source), ignore_errors=True)
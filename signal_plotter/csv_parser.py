@@ -1,15 +1,38 @@
-""" Read the content of a csv file with pandas and plot the results"""
+""" Read the content of csv files with pandas and plot the results
+
+Parquet, Feather, HDF5 and NPZ files are read by the readers of `signal_plotter.readers`, picked from the extension of
+the files. With `-y`, only the index and the matching columns are read before the window is shown, the other columns are
+read when their signal is first plotted.
+
+pandas, tqdm and Qt are only imported when they are needed: the window is shown as soon as the headers of the files
+are read, and the files are parsed in the background while their signals are listed (greyed out until they are
+parsed).
+"""
+
+from __future__ import annotations
 
 import argparse
+import concurrent.futures
+import functools
 import glob
+import io
 import logging
 import os
+import threading
+from typing import TYPE_CHECKING
 
 import numpy
-import pandas
-import tqdm
 
-from signal_plotter.plot_window import plot_window
+from signal_plotter import cache, readers, shared_memory
+from signal_plotter.buffers import GrowableArray
+from signal_plotter.lazy import LazySignal
+from signal_plotter.profiling import PROFILER, profiled
+
+if TYPE_CHECKING:
+    import pandas
+    from pyqtgraph.Qt.QtCore import QTimer
+
+    from signal_plotter.plot_window import PlotWindow
 
 
 class ColoredFormatter(logging.Formatter):
@@ -34,61 +57,608 @@ class ColoredFormatter(logging.Formatter):
         return formatter.format(record)
 
 
-if __name__ == "__main__":
-    logger = logging.getLogger('plot_window_tree')
-    stream_handler = logging.StreamHandler()
-    stream_handler.setLevel(logging.INFO)
-    colored_formatter = ColoredFormatter()
-    stream_handler.setFormatter(colored_formatter)
-    logger.addHandler(stream_handler)
-
-    # Parse the arguments
-    parser = argparse.ArgumentParser(description="Read the content of a csv file with pandas and plot the results")
-    parser.add_argument("csv_file", type=str, nargs="+", help="The csv file to read")
-    parser.add_argument("-x", "--x", type=str, help="The x axis column")
-    # List of columns to pre-select in the plot
-    parser.add_argument("-y", "--y", type=str, nargs="+", help="The y axis columns")
-    args = parser.parse_args()
-
-    items = {}
-
-    csv_files = args.csv_file
-
-    for csv_file in args.csv_file:
+def expand_files(patterns: list[str]) -> list[str]:
+    """Expand the glob patterns of the command line into a list of existing files"""
+    csv_files = []
+    for csv_file in patterns:
         # Check if the csv_file string represent a regex
         if any(c in csv_file for c in "*?"):
             files = glob.glob(csv_file)
             if not files:
                 raise FileNotFoundError(f"No file found with the pattern {csv_file}")
-            csv_files.remove(csv_file)
             csv_files.extend(files)
+        else:
+            csv_files.append(csv_file)
 
     for csv_file in csv_files:
         if not os.path.exists(csv_file):
             raise FileNotFoundError(f"The file {csv_file} doesn't exist")
+    return csv_files
+
+
+def get_reader(csv_file: str) -> readers.SignalReader:
+    """Reader of a file from its extension, files with an unknown extension being read as csv files"""
+    return readers.get_reader(csv_file, default=readers.CSV_READER)
+
+
+def parse_csv(
+    csv_file: str, progress: bool = True, columns: list[str] | None = None
+) -> tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]]:
+    """Parse a csv file, the first column being the index (x axis) of all the other columns.
+
+    Args:
+        columns (list[str] | None): Columns to convert, all of them if None.
+
+    Returns:
+        The index name, the index array and the dict of numerical column arrays.
+    """
+    return readers.CSV_READER.read(csv_file, columns, progress=progress)
+
+
+@profiled("csv.read_csv")
+def read_csv(
+    csv_file: str, use_cache: bool = True, progress: bool = True
+) -> tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]]:
+    """Read a csv file, from its memory-mapped cache if it is up to date (see `parse_csv` for the returned values).
+
+    The files of the other formats are read by their reader, without cache: they are already cheaper to read.
+    """
+    reader = get_reader(csv_file)
+    if reader is not readers.CSV_READER:
+        return reader.read(csv_file)
+
+    if use_cache:
+        cached = cache.load(csv_file)
+        if cached is not None:
+            logging.info(f"Loaded {csv_file} from its cache")
+            return cached
+
+    index_name, index, columns = parse_csv(csv_file, progress=progress)
+
+    if use_cache and cache.save(csv_file, index_name, index, columns):
+        # Use the memory-mapped arrays so that the parsed data can be released
+        cached = cache.load(csv_file)
+        if cached is not None:
+            return cached
+    return index_name, index, columns
+
+
+def read_header(csv_file: str) -> tuple[str | None, list[str]]:
+    """Read the index name and the column names of a file from its header, without parsing the file"""
+    return get_reader(csv_file).header(csv_file)
+
+
+def _read_csv_worker(csv_file: str, use_cache: bool) -> tuple:
+    """Read a csv file in a worker process and describe how the parent can map the result without copying it"""
+    index_name, index, columns = read_csv(csv_file, use_cache=use_cache, progress=False)
+    if use_cache and isinstance(index, numpy.memmap):
+        # The arrays were written to the cache, the parent memory-maps the same files
+        return "cache", index_name, None
+    if any(array.dtype.hasobject for array in (index, *columns.values())):
+        # Non-numerical arrays (e.g. a timestamp index) can't be mapped from a buffer, they are pickled instead
+        return "pickle", index_name, (index, columns)
+    # Otherwise hand the arrays over through a shared memory segment
+    return "shared_memory", index_name, shared_memory.share_arrays({None: index, **columns})
+
+
+@profiled("csv.read_csv_files")
+def read_csv_files(
+    csv_files: list[str], use_cache: bool = True, jobs: int = 1
+) -> list[tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]]]:
+    """Read several csv files, in parallel in `jobs` processes (all the cores if 0).
+
+    The progress of all the files is rolled up into a single bar, measured in bytes of the csv files.
+    """
+    if jobs == 1 or len(csv_files) <= 1:
+        return [read_csv(csv_file, use_cache=use_cache) for csv_file in csv_files]
+
+    reader = BackgroundReader(csv_files, use_cache=use_cache, jobs=jobs, progress=True)
+    results = []
+    for i in range(len(csv_files)):
+        result = reader.result(i)
+        if result is None:
+            raise reader.errors[i]
+        results.append(result)
+    return results
+
+
+def _worker_result(csv_file: str, use_cache: bool, result: tuple) -> tuple:
+    """Map the arrays of a file read by `_read_csv_worker` (see `parse_csv` for the returned values)"""
+    transport, index_name, segment = result
+    if transport == "cache":
+        cached = cache.load(csv_file)
+        if cached is not None:
+            return cached
+    if transport == "pickle":
+        index, columns = segment
+        return index_name, index, columns
+    if segment is None:
+        # The cache was modified in between, parse the file again in this process
+        return read_csv(csv_file, use_cache=use_cache, progress=False)
+    arrays = shared_memory.attach_arrays(*segment)
+    index = arrays.pop(None)
+    return index_name, index, arrays
+
+
+def signal_prefix(csv_file: str, csv_files: list[str]) -> str:
+    """Prefix of the signals of a file: its name when several files are read"""
+    return (os.path.splitext(os.path.basename(csv_file))[0] + ".") if len(csv_files) > 1 else ""
+
+
+class BackgroundReader:
+    """Read csv files in the background, in a thread or in `jobs` processes (all the cores if 0).
+
+    Files with an up-to-date cache are memory-mapped right away, the other ones are read in the order of the list. With
+    `progress`, the progress of the files which are read is rolled up into a single bar, measured in bytes.
+    """
+
+    def __init__(self, csv_files: list[str], use_cache: bool = True, jobs: int = 1, progress: bool = False) -> None:
+        self.csv_files = csv_files
+        self.use_cache = use_cache
+        self.results: list[tuple | None] = [cache.load(csv_file) if use_cache else None for csv_file in csv_files]
+        self.errors: dict[int, Exception] = {}
+        self.futures: dict[int, concurrent.futures.Future] = {}
+        self.collected = {i for i, result in enumerate(self.results) if result is not None}
+        self._lock = threading.Lock()
+        self.progress = None
+
+        pending = [i for i, result in enumerate(self.results) if result is None]
+        self.in_processes = jobs != 1
+        if not pending:
+            return
+        if progress:
+            import tqdm
+
+            self.progress = tqdm.tqdm(
+                total=sum(os.path.getsize(csv_files[i]) for i in pending), desc="Parsing files", unit="B", unit_scale=True
+            )
+        self._remaining = len(pending)
+        self._progress_lock = threading.Lock()
+        if self.in_processes:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count(), len(pending)))
+            for i in pending:
+                self.futures[i] = executor.submit(_read_csv_worker, csv_files[i], use_cache)
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv_parser")
+            for i in pending:
+                self.futures[i] = executor.submit(read_csv, csv_files[i], use_cache, False)
+        for i in pending:
+            self.futures[i].add_done_callback(functools.partial(self._done, os.path.getsize(csv_files[i])))
+        # The workers exit once all the files are read
+        executor.shutdown(wait=False)
+
+    def _done(self, size: int, future: concurrent.futures.Future) -> None:
+        """Called by the executor when a file is read"""
+        if self.progress is None:
+            return
+        with self._progress_lock:
+            self.progress.update(size)
+            self._remaining -= 1
+            if self._remaining == 0:
+                self.progress.close()
+
+    @property
+    def finished(self) -> bool:
+        return len(self.collected) == len(self.csv_files)
+
+    def collect(self) -> list[int]:
+        """Return the files read since the previous call, including the ones which could not be read"""
+        futures = dict(self.futures)
+        done = [i for i in range(len(self.csv_files)) if i not in self.collected and (i not in futures or futures[i].done())]
+        self.collected.update(done)
+        for i in done:
+            self.result(i)
+        return done
+
+    def result(self, i: int) -> tuple | None:
+        """Index name, index and columns of a file (see `parse_csv`), waiting for it to be read. None if it failed."""
+        with self._lock:
+            future = self.futures.pop(i, None)
+            if future is not None:
+                try:
+                    result = future.result()
+                    if self.in_processes:
+                        result = _worker_result(self.csv_files[i], self.use_cache, result)
+                    self.results[i] = result
+                except Exception as e:
+                    logging.error(f"Error reading {self.csv_files[i]}: {e}")
+                    self.errors[i] = e
+            return self.results[i]
+
+    def items(self, i: int) -> dict:
+        """Items dictionary of the signals of a file which was read (empty if it could not be read)"""
+        if self.results[i] is None:
+            return {}
+        index_name, index, columns = self.results[i]
+        prefix = signal_prefix(self.csv_files[i], self.csv_files)
+        return {prefix + column: {"x": index, "y": values} for column, values in columns.items()}
+
+    def failed_items(self, i: int) -> dict:
+        """Items dictionary of the columns listed by the header of a file which was read, but which could not be read
+        (e.g. non-numerical columns, or all of them if the file could not be read). They are not pending anymore,
+        loading them raises an error."""
+        read = self.results[i][2] if self.results[i] is not None else {}
+        _, columns = read_header(self.csv_files[i])
+        prefix = signal_prefix(self.csv_files[i], self.csv_files)
+        return {prefix + column: LazySignal(self._loader(i, column)) for column in columns if column not in read}
+
+    def pending_items(self, i: int) -> dict:
+        """Items dictionary of the signals of a file which is not read yet, from its header. Their loaders wait for
+        the file to be read."""
+        _, columns = read_header(self.csv_files[i])
+        prefix = signal_prefix(self.csv_files[i], self.csv_files)
+        return {prefix + column: LazySignal(self._loader(i, column), pending=True) for column in columns}
+
+    def _loader(self, i: int, column: str):
+        def load() -> tuple:
+            result = self.result(i)
+            if result is None or column not in result[2]:
+                raise ValueError(f"The column {column} of {self.csv_files[i]} could not be read")
+            return result[1], result[2][column]
+
+        return load
+
+
+def load_items(
+    csv_files: list[str], use_cache: bool = True, jobs: int = 1, columns: list[str] | None = None
+) -> tuple[dict, list[str]]:
+    """Read csv files (or files of the other formats of `signal_plotter.readers`) into the items dictionary of
+    plot_window.
+
+    Signals are prefixed with the file name when several files are read.
+
+    Args:
+        columns (list[str] | None): Glob patterns of the signals to read right away, reading only the index and these
+            columns of the files. The other signals are lazy signals, read when they are first needed.
+
+    Returns:
+        The items dictionary and the list of index names of the files.
+    """
+    if columns is not None:
+        return _load_projected_items(csv_files, use_cache, columns, jobs)
+
+    items = {}
+    index_names = []
+    for csv_file, (index_name, index, columns) in zip(csv_files, read_csv_files(csv_files, use_cache=use_cache, jobs=jobs)):
+        index_names.append(index_name)
+
+        prefix = signal_prefix(csv_file, csv_files)
+        for column, values in columns.items():
+            items[prefix + column] = {
+                "x": index,
+                "y": values,
+            }
+    return items, index_names
 
-        # Read the csv file with a progress bar
-        df = pandas.read_csv(csv_file, index_col=0)
 
-        for column in tqdm.tqdm(df.columns, desc="Parsing columns"):
-            # Check if the column is a number
+def _load_projected_items(csv_files: list[str], use_cache: bool, columns: list[str], jobs: int) -> tuple[dict, list[str]]:
+    def load(csv_file: str) -> tuple[str | None, dict]:
+        prefix = signal_prefix(csv_file, csv_files)
+        cached = cache.load(csv_file) if use_cache and get_reader(csv_file) is readers.CSV_READER else None
+        if cached is not None:
+            # The memory-mapped columns cost nothing until they are plotted
+            return cached[0], {prefix + column: {"x": cached[1], "y": values} for column, values in cached[2].items()}
+        signals = readers.FileSignals(csv_file, get_reader(csv_file))
+        return signals.index_name, signals.items(prefix, columns)
+
+    if jobs == 1 or len(csv_files) <= 1:
+        loaded = [load(csv_file) for csv_file in csv_files]
+    else:
+        # The lazy signals load their columns in this process: the files are read by threads (pandas and pyarrow release
+        # the GIL while decoding)
+        import tqdm
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(jobs or os.cpu_count(), len(csv_files))) as executor:
+            loaded = list(tqdm.tqdm(executor.map(load, csv_files), total=len(csv_files), desc="Reading files"))
+
+    items = {}
+    index_names = []
+    for index_name, file_items in loaded:
+        index_names.append(index_name)
+        items.update(file_items)
+    return items, index_names
+
+
+class _BoundedReader(io.RawIOBase):
+    """Read a file only up to a given offset (the end of the last complete line of a file being written)"""
+
+    def __init__(self, file, size: int) -> None:
+        self.file = file
+        self.remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.file.read(min(len(buffer), self.remaining))
+        buffer[: len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+class CsvFollower:
+    """Follow a csv file which is continuously written, reading only the rows appended since the previous read.
+
+    The signals are stored in growable buffers, the `items` dictionary always referencing views on their current
+    values. Integer columns are stored as floats, as rows written later may not be integers.
+    """
+
+    def __init__(self, csv_file: str, prefix: str = "") -> None:
+        self.csv_file = csv_file
+        self.prefix = prefix
+        self.items: dict[str, dict] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.offset = 0  # Offset of the first byte which was not parsed yet (always the start of a line)
+        self.header: list[str] | None = None
+        self.index_name: str | None = None
+        self.index: GrowableArray | None = None
+        self.columns: dict[str, GrowableArray] = {}
+
+    def _complete_size(self, start: int, end: int) -> int:
+        """Number of bytes from start until the end of the last complete line before end"""
+        with open(self.csv_file, "rb") as f:
+            position = end
+            while position > start:
+                block = max(position - (1 << 16), start)
+                f.seek(block)
+                newline = f.read(position - block).rfind(b"\n")
+                if newline >= 0:
+                    return block + newline + 1 - start
+                position = block
+        return 0
+
+    def _parse(self, size: int) -> pandas.DataFrame:
+        import pandas
+
+        with open(self.csv_file, "rb") as f:
+            f.seek(self.offset)
+            reader = io.BufferedReader(_BoundedReader(f, size))
+            if self.header is None:
+                return pandas.read_csv(reader, index_col=0)
+            return pandas.read_csv(reader, header=None, names=self.header, index_col=0)
+
+    def read(self) -> dict[str, dict]:
+        """Read the complete lines of the file and return the items dictionary of its signals"""
+        size = self._complete_size(0, os.path.getsize(self.csv_file))
+        if size == 0:
+            # Not even a complete header yet
+            return self.items
+
+        import pandas
+
+        df = self._parse(size)
+        self.offset = size
+        self.header = [df.index.name] + list(df.columns)
+        self.index_name = df.index.name
+
+        self._extend_index(numpy.ravel(df.index))
+        for column in df.columns:
             try:
-                df[column] = pandas.to_numeric(df[column])
+                self.columns[column] = GrowableArray(pandas.to_numeric(df[column]), dtype=numpy.float64)
             except ValueError:
                 logging.warning(f"The column {column} is not a numerical signal, skipping")
+        self.update_items()
+        return self.items
+
+    def poll(self) -> list[str]:
+        """Read the rows appended since the previous read and return the names of the updated signals"""
+        if self.header is None:
+            return list(self.read())
+
+        file_size = os.path.getsize(self.csv_file)
+        if file_size < self.offset:
+            logging.warning(f"The file {self.csv_file} was truncated, it is read again from its start")
+            self.reset()
+            return list(self.read())
+
+        size = self._complete_size(self.offset, file_size)
+        if size == 0:
+            return []
+
+        import pandas
+
+        df = self._parse(size)
+        self.offset += size
+        self._extend_index(numpy.ravel(df.index))
+        for column, values in self.columns.items():
+            values.extend(pandas.to_numeric(df[column], errors="coerce"))
+        self.update_items()
+        return list(self.items)
+
+    def _extend_index(self, index: numpy.ndarray) -> None:
+        if self.index is None:
+            if index.size == 0:
+                # The index of a header without rows has no type yet (object for pandas): wait for the first rows
+                return
+            self.index = GrowableArray(index, dtype=numpy.float64 if index.dtype.kind in "biuf" else None)
+        else:
+            self.index.extend(index)
+
+    def update_items(self) -> None:
+        x = self.index.data if self.index is not None else numpy.empty(0)
+        for column, values in self.columns.items():
+            item = self.items.setdefault(self.prefix + column, {})
+            item["x"] = x
+            item["y"] = values.data
+
+
+def follow(window: PlotWindow, followers: list[CsvFollower], interval: float) -> QTimer:
+    """Poll the followed files every `interval` seconds and refresh the signals of the window which got new rows"""
+    from pyqtgraph.Qt.QtCore import QTimer
+
+    def poll() -> None:
+        new, updated = {}, []
+        for follower in followers:
+            try:
+                keys = follower.poll()
+            except Exception as e:
+                logging.error(f"Error reading {follower.csv_file}: {e}")
                 continue
+            for key in keys:
+                item = follower.items[key]
+                if key in window.items:
+                    # The window holds its own dicts of the signals
+                    window.items[key]["x"] = item["x"]
+                    window.items[key]["y"] = item["y"]
+                    updated.append(key)
+                else:
+                    new[key] = item
+        if new:
+            window.setSignals(new)
+        if updated:
+            window.updateSignals(updated)
+
+    timer = QTimer(window)
+    timer.timeout.connect(poll)
+    timer.start(int(interval * 1000))
+    return timer
 
-            items[((os.path.splitext(os.path.basename(csv_file))[0] + ".") if len(args.csv_file) > 1 else "") + column] = {
-                "x": numpy.ravel(df.index),
-                "y": numpy.ravel(df[column]),
-            }
 
-    x_component = args.x if args.x and args.x in df.columns else df.index.name
-    y_components = args.y if args.y else None
+def show_when_read(
+    window: PlotWindow, reader: BackgroundReader, pre_select: list[str] | None = None, interval: float = 0.1
+) -> QTimer:
+    """Replace the pending signals of the window by the ones of the files read in the background, checking every
+    `interval` seconds. The signals matching the `pre_select` glob patterns are selected when their file is read."""
+    from pyqtgraph.Qt.QtCore import QTimer
+
+    def poll() -> None:
+        for i in reader.collect():
+            items = reader.items(i)
+            # The pending columns which were not read are not greyed out anymore
+            window.setSignals({**reader.failed_items(i), **items})
+            selected = readers.expand_columns(list(items), pre_select) if pre_select else []
+            if selected:
+                window.listWidget.selection.select(selected)
+            if reader.results[i] is not None:
+                logging.info(f"Read {reader.csv_files[i]}")
+        if reader.finished:
+            timer.stop()
+
+    timer = QTimer(window)
+    timer.timeout.connect(poll)
+    timer.start(int(interval * 1000))
+    return timer
+
+
+def main(argv: list[str] | None = None) -> None:
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Read the content of csv files with pandas and plot the results")
+    parser.add_argument(
+        "csv_file", type=str, nargs="+", help="The files to read (csv, or .parquet, .feather, .h5 and .npz files)"
+    )
+    parser.add_argument("-x", "--x", type=str, help="The x axis column")
+    # List of columns to pre-select in the plot
+    parser.add_argument(
+        "-y",
+        "--y",
+        type=str,
+        nargs="+",
+        help="The y axis columns, or glob patterns (e.g. 'motor.*'): only these columns are read before the plot",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always parse the csv files instead of using (and writing) their memory-mapped cache",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes parsing the csv files in parallel (0 to use all the cores)",
+    )
+    parser.add_argument(
+        "-f",
+        "--follow",
+        action="store_true",
+        help="Keep reading the rows appended to the csv files while they are plotted (disables the cache)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Period in seconds at which the followed files are read (default: 1.0)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="JSON_FILE",
+        help="Time the parsing and the plot, and write the statistics of the timers to a JSON file on exit",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="TRACE_FILE",
+        help="Time the parsing and the plot, and write their timeline to a Chrome trace file on exit",
+    )
+    args = parser.parse_args(argv)
+    if args.profile or args.trace:
+        PROFILER.enable()
+
+    csv_files = expand_files(args.csv_file)
+    setup = None
+    if args.follow and any(get_reader(csv_file) is not readers.CSV_READER for csv_file in csv_files):
+        parser.error("Only csv files can be followed")
+    if args.follow:
+        followers = [CsvFollower(csv_file, signal_prefix(csv_file, csv_files)) for csv_file in csv_files]
+        items = {}
+        for follower in followers:
+            items.update(follower.read())
+        index_names = [follower.index_name for follower in followers]
+
+        def setup(window: PlotWindow) -> None:
+            # Keep a reference to the timer in the window
+            window.follow_timer = follow(window, followers, args.interval)
+
+    elif args.y:
+        # Only the index and the selected columns are read, the other signals when they are first plotted
+        items, index_names = load_items(csv_files, use_cache=not args.no_cache, jobs=args.jobs, columns=args.y)
+
+    else:
+        # The files are parsed in the background: the window lists their signals from the headers meanwhile
+        reader = BackgroundReader(csv_files, use_cache=not args.no_cache, jobs=args.jobs, progress=True)
+        items = {}
+        index_names = []
+        for i, csv_file in enumerate(csv_files):
+            if reader.results[i] is not None:
+                items.update(reader.items(i))
+                index_names.append(reader.results[i][0])
+            else:
+                items.update(reader.pending_items(i))
+                index_names.append(read_header(csv_file)[0])
+
+        def setup(window: PlotWindow) -> None:
+            # Keep a reference to the timer in the window
+            window.reader_timer = show_when_read(window, reader)
+
+    x_component = args.x if args.x and args.x in items else (index_names[-1] if index_names else None)
+    # The patterns are expanded on the signals which were read, the pending ones are selected when they are read
+    y_components = None
+    if args.y:
+        y_components = [key for key in readers.expand_columns(list(items), args.y) if isinstance(items[key], dict)]
 
     # Plot the results
+    from signal_plotter.plot_window import plot_window
+
     plot_window(
         items,
         x_component=x_component,
         pre_select=y_components,
+        setup=setup,
     )
+
+    if args.profile:
+        PROFILER.dump_json(args.profile)
+    if args.trace:
+        PROFILER.dump_chrome_trace(args.trace)
+
+
+if __name__ == "__main__":
+    logger = logging.getLogger('plot_window_tree')
+    stream_handler = logging.StreamHandler()
+    stream_handler.setLevel(logging.INFO)
+    colored_formatter = ColoredFormatter()
+    stream_handler.setFormatter(colored_formatter)
+    logger.addHandler(stream_handler)
+
+    main()
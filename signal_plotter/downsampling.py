@@ -0,0 +1,530 @@
+""" Peak-preserving level-of-detail downsampling of large signals, and grid decimation of XY trajectories"""
+
+from __future__ import annotations
+
+import numpy as np
+from pyqtgraph import GraphicsObject, PlotDataItem, arrayToQPath, mkPen
+from pyqtgraph.Qt.QtCore import QRectF
+
+from signal_plotter.buffers import GrowableArray
+from signal_plotter.profiling import count, profiled
+
+
+def _sum_reduceat(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    return np.add.reduceat(values, starts, dtype=np.float64)
+
+
+class MinMaxPyramid:
+    """Multi-resolution pyramid of the min/max (and optionally mean) envelopes of a signal.
+
+    Level 0 is the raw signal, each following level groups `factor` buckets of the previous one. The pyramid is built
+    once in O(n) and any view can then be served from the level matching the number of pixels to fill, so that the
+    redraw cost only depends on the screen width and no peak is ever hidden.
+    """
+
+    @profiled("downsampling.pyramid")
+    def __init__(self, x, y, factor: int = 4, min_buckets: int = 64, mean: bool = False) -> None:
+        if factor < 2:
+            raise ValueError("factor must be at least 2")
+        self.factor = factor
+        self.min_buckets = min_buckets
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+
+        # Envelopes of each level (the index 0 being the first downsampled level, i.e. buckets of `factor` samples),
+        # stored in growable buffers so that appending samples only updates the last buckets of each level
+        self._mins: list[GrowableArray] = []
+        self._maxs: list[GrowableArray] = []
+        self._sums: list[GrowableArray] | None = [] if mean else None
+        self._counts: list[GrowableArray] | None = [] if mean else None
+
+        self.extend(x, y)
+
+    @profiled("downsampling.extend")
+    def extend(self, x, y) -> None:
+        """Update the pyramid for new values of the signal, whose first samples are the ones already in the pyramid.
+
+        Only the buckets covering the appended samples are computed, so following a growing signal costs O(appended).
+        """
+        x = np.asarray(x).ravel()
+        y = np.asarray(y).ravel()
+        if x.shape != y.shape:
+            raise ValueError(f"x and y must have the same length: {x.size} != {y.size}")
+        if y.size < self.y.size:
+            raise ValueError("The pyramid can only be extended with new samples")
+        changed = self.y.size  # Index of the first changed sample (or bucket) of the previous level
+        if x.size > 1 and not np.all(x[max(changed - 1, 0) + 1 :] >= x[max(changed - 1, 0) : -1]):
+            raise ValueError("x must be monotonically increasing")
+        self.x, self.y = x, y
+
+        mean = self._sums is not None
+        lo, hi, sums, counts = y, y, y, None
+        level = 0
+        while level < len(self._mins) or lo.size > self.min_buckets:
+            if level == len(self._mins):
+                # The signal grew enough to need a new level
+                self._mins.append(GrowableArray(dtype=lo.dtype))
+                self._maxs.append(GrowableArray(dtype=hi.dtype))
+                if mean:
+                    self._sums.append(GrowableArray(dtype=np.float64))
+                    self._counts.append(GrowableArray(dtype=np.float64))
+                changed = 0
+
+            # Recompute the buckets from the one containing the first changed value of the previous level
+            # (fmin/fmax ignore NaN values, i.e. gaps in the signal, unless the whole bucket is NaN)
+            first = changed // self.factor
+            starts = np.arange(0, lo.size - first * self.factor, self.factor)
+            reductions = [(self._mins, np.fmin.reduceat, lo), (self._maxs, np.fmax.reduceat, hi)]
+            if mean:
+                reductions.append((self._sums, _sum_reduceat, sums))
+                if counts is None:
+                    # Number of samples of the buckets of the first level
+                    self._counts[level].truncate(first)
+                    self._counts[level].extend(np.diff(np.append(starts, lo.size - first * self.factor)))
+                else:
+                    reductions.append((self._counts, np.add.reduceat, counts))
+            for levels, reduce, values in reductions:
+                levels[level].truncate(first)
+                if starts.size:
+                    levels[level].extend(reduce(values[first * self.factor :], starts))
+
+            lo, hi = self._mins[level].data, self._maxs[level].data
+            if mean:
+                sums, counts = self._sums[level].data, self._counts[level].data
+            changed = first
+            level += 1
+
+        self.mins = [level.data for level in self._mins]
+        self.maxs = [level.data for level in self._maxs]
+
+    def __len__(self) -> int:
+        return self.x.size
+
+    @property
+    def levels(self) -> int:
+        """Number of levels, including the raw signal"""
+        return len(self.mins) + 1
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the envelopes (the raw signal is not owned by the pyramid)"""
+        return sum(level.data.nbytes for level in self._mins + self._maxs + (self._sums or []) + (self._counts or []))
+
+    def bucket_size(self, level: int) -> int:
+        return self.factor**level
+
+    def index_range(self, start: float, stop: float) -> tuple[int, int]:
+        """Range of samples covering [start, stop], including one sample on each side to draw the edges"""
+        i0 = max(int(np.searchsorted(self.x, start, side="right")) - 1, 0)
+        i1 = min(int(np.searchsorted(self.x, stop, side="left")) + 1, self.x.size)
+        return i0, i1
+
+    def level_for(self, count: int, pixels: int) -> int:
+        """Coarsest level still providing at least one bucket per pixel for `count` samples"""
+        level = 0
+        while level < len(self.mins) and count // self.bucket_size(level + 1) >= pixels:
+            level += 1
+        return level
+
+    @profiled("downsampling.query")
+    def query(
+        self, start: float, stop: float, pixels: int = None, envelope: str = "minmax", level: int = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the (x, y) arrays to draw the signal between start and stop on a view of `pixels` width.
+
+        With the "minmax" envelope each bucket contributes its minimum and maximum, so every peak of the raw signal is
+        drawn. The "mean" envelope (only available if the pyramid was built with `mean=True`) gives one point per bucket.
+        The level can be forced instead of being deduced from the number of pixels.
+        """
+        i0, i1 = self.index_range(start, stop)
+        if level is None:
+            level = self.level_for(i1 - i0, max(int(pixels), 1))
+        level = min(level, len(self.mins))
+        if level == 0:
+            return self.x[i0:i1], self.y[i0:i1]
+
+        bucket = self.bucket_size(level)
+        b0, b1 = i0 // bucket, -(-i1 // bucket)
+        x = self.x[b0 * bucket : b1 * bucket : bucket]
+
+        if envelope == "mean":
+            if self._sums is None:
+                raise ValueError("The pyramid was built without the mean envelope")
+            return x, self._sums[level - 1].data[b0:b1] / self._counts[level - 1].data[b0:b1]
+
+        x_out = np.repeat(x, 2)
+        y_out = np.empty(x_out.size, dtype=self.mins[level - 1].dtype)
+        y_out[0::2] = self.mins[level - 1][b0:b1]
+        y_out[1::2] = self.maxs[level - 1][b0:b1]
+        return x_out, y_out
+
+    def bounds(self, start: float | None = None, stop: float | None = None, max_buckets: int = 4096) -> tuple:
+        """Min and max of the signal between start and stop (slightly widened to whole buckets)"""
+        if self.x.size == 0:
+            return None, None
+        i0, i1 = (0, self.x.size) if start is None or stop is None else self.index_range(start, stop)
+        if i1 <= i0:
+            return None, None
+        level = self.level_for(i1 - i0, max_buckets)
+        if level == 0:
+            lo, hi = self.y[i0:i1], self.y[i0:i1]
+        else:
+            bucket = self.bucket_size(level)
+            lo = self.mins[level - 1][i0 // bucket : -(-i1 // bucket)]
+            hi = self.maxs[level - 1][i0 // bucket : -(-i1 // bucket)]
+        if np.all(np.isnan(lo)):
+            return None, None
+        return float(np.nanmin(lo)), float(np.nanmax(hi))
+
+
+class XYTrajectory:
+    """Trajectory of a signal plotted against another signal, decimated on a grid of pixels.
+
+    Consecutive points falling in the same cell of the grid are merged, which preserves the shape of the trajectory at
+    the resolution of the screen even though x is not monotonic. The segments joining two cells are then only drawn
+    once, however many times the trajectory goes through them (e.g. the cycles of a phase plot). The trajectory is
+    decimated once on a fine grid of its whole extent, which then serves the views which are not zoomed beyond this
+    grid, so that their cost does not depend on the number of points.
+    """
+
+    @profiled("downsampling.trajectory")
+    def __init__(self, x, y, resolution: int = 4096) -> None:
+        self.x = np.asarray(x).ravel()
+        self.y = np.asarray(y).ravel()
+        if self.x.shape != self.y.shape:
+            raise ValueError(f"x and y must have the same length: {self.x.size} != {self.y.size}")
+        self.resolution = resolution
+        self.last_query = None  # (arguments, result) of the last query, repeated when a curve is placed again
+        finite = np.isfinite(self.x) & np.isfinite(self.y)
+        if finite.any():
+            self.x_bounds = (float(self.x[finite].min()), float(self.x[finite].max()))
+            self.y_bounds = (float(self.y[finite].min()), float(self.y[finite].max()))
+        else:
+            self.x_bounds = self.y_bounds = (None, None)
+        self.overview = (self.x, self.y)
+        if self.x_bounds[0] is not None and self.x.size > 4 * resolution:
+            x, y, _ = self.runs(self.x, self.y, self.x_bounds, self.y_bounds, resolution, resolution)
+            self.overview = (x, y)
+
+    def __len__(self) -> int:
+        return self.x.size
+
+    @staticmethod
+    def _cells(values: np.ndarray, value_range: tuple, cells: int) -> np.ndarray:
+        """Index of the cell of each value, -1 and `cells` outside of the range, -2 for NaN"""
+        span = value_range[1] - value_range[0]
+        index = np.floor((values - value_range[0]) * (cells / span if span > 0 else 0.0))
+        np.clip(index, -1, cells, out=index)
+        index[np.isnan(index)] = -2
+        return index.astype(np.int64)
+
+    @classmethod
+    def runs(cls, x, y, x_range: tuple, y_range: tuple, width: int, height: int) -> tuple:
+        """Points of the trajectory entering a new cell of a grid of width x height cells over the ranges (and its
+        last point), with their cells.
+
+        The points leaving a cell outside of the ranges are also kept: the trajectory can go around the view before
+        coming back, which must not be drawn as a straight line through the view.
+        """
+        x_cells, y_cells = cls._cells(x, x_range, width), cls._cells(y, y_range, height)
+        cells = x_cells * (height + 3) + y_cells
+        outside = (x_cells < 0) | (x_cells == width) | (y_cells < 0) | (y_cells == height)
+        changes = cells[1:] != cells[:-1]
+        keep = np.ones(x.size, dtype=bool)
+        keep[1:] = changes
+        keep[:-1] |= changes & outside[:-1]
+        return x[keep], y[keep], cells[keep]
+
+    @profiled("downsampling.trajectory_query")
+    def query(self, x_range: tuple, y_range: tuple, width: int, height: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return the (x, y) arrays of the segments drawing the trajectory in the ranges on a view of width x height
+        pixels: each pair of points (0-1, 2-3...) is a segment, as drawn by a PlotDataItem with `connect="pairs"`.
+        """
+        width, height = max(int(width), 1), max(int(height), 1)
+        if self.x_bounds[0] is None:
+            return self.x[:0], self.y[:0]
+        arguments = (tuple(x_range), tuple(y_range), width, height)
+        if self.last_query is not None and self.last_query[0] == arguments:
+            return self.last_query[1]
+        self.last_query = (arguments, self._query(x_range, y_range, width, height))
+        return self.last_query[1]
+
+    def _query(self, x_range: tuple, y_range: tuple, width: int, height: int) -> tuple[np.ndarray, np.ndarray]:
+        x, y = self.x, self.y
+        # The overview is precise enough if a pixel is not smaller than one of its cells
+        if (x_range[1] - x_range[0]) / width >= (self.x_bounds[1] - self.x_bounds[0]) / self.resolution and (
+            y_range[1] - y_range[0]
+        ) / height >= (self.y_bounds[1] - self.y_bounds[0]) / self.resolution:
+            x, y = self.overview
+        x, y, cells = self.runs(x, y, x_range, y_range, width, height)
+        if x.size == 1:
+            return np.repeat(x, 2), np.repeat(y, 2)
+
+        # Segments joining two cells, whatever their direction, drawn once (and not at all if they join a NaN)
+        first, second = np.minimum(cells[:-1], cells[1:]), np.maximum(cells[:-1], cells[1:])
+        keys = first * ((width + 3) * (height + 3)) + second
+        _, segments = np.unique(keys, return_index=True)
+        segments = np.sort(segments[~np.isnan(x[segments] + y[segments] + x[segments + 1] + y[segments + 1])])
+        points = np.column_stack((segments, segments + 1)).ravel()
+        return x[points], y[points]
+
+
+class PyramidDataItem(PlotDataItem):
+    """PlotDataItem redrawn from a MinMaxPyramid (or an XYTrajectory) each time its view range or size changes.
+
+    Without pyramid nor trajectory the item behaves as a regular PlotDataItem (using its own clipping and downsampling).
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.pyramid: MinMaxPyramid | None = None
+        self.trajectory: XYTrajectory | None = None
+        self.lod_span = None  # (start, stop, level) of the data currently displayed
+        self.lod_view = None  # (x range, y range, pixel width, pixel height) of the trajectory currently displayed
+        self.requested_downsampling = (None, None, "peak")
+        self.requested_clip = False
+        self.default_connect = kwargs.get("connect", "auto")  # Restored when the trajectory, drawn by pairs, is replaced
+        super().__init__(*args, **kwargs)
+
+    @property
+    def levelOfDetail(self) -> bool:
+        """Whether the data is drawn from a pyramid or a trajectory"""
+        return self.pyramid is not None or self.trajectory is not None
+
+    def _setSource(self, pyramid: MinMaxPyramid | None, trajectory: XYTrajectory | None) -> None:
+        self.pyramid = pyramid
+        self.trajectory = trajectory
+        self.lod_span = None
+        self.lod_view = None
+        # The pyramid or the trajectory replaces the clipping and downsampling of the PlotDataItem
+        super().setDownsampling(*((1, False, "peak") if self.levelOfDetail else self.requested_downsampling))
+        super().setClipToView(False if self.levelOfDetail else self.requested_clip)
+        if pyramid is not None:
+            self.updateLevelOfDetail()
+        elif trajectory is not None:
+            self.updateTrajectory()
+
+    def setPyramid(self, pyramid: MinMaxPyramid | None) -> None:
+        self._setSource(pyramid, None)
+
+    def setTrajectory(self, trajectory: XYTrajectory | None) -> None:
+        self._setSource(None, trajectory)
+
+    def setDownsampling(self, ds=None, auto=None, method="peak") -> None:
+        self.requested_downsampling = (ds, auto, method)
+        if not self.levelOfDetail:
+            super().setDownsampling(ds, auto, method)
+
+    def setClipToView(self, state: bool) -> None:
+        self.requested_clip = state
+        if not self.levelOfDetail:
+            super().setClipToView(state)
+
+    def updateTrajectory(self) -> None:
+        view = self.getViewBox()
+        if view is None or not hasattr(view, "viewRange") or view.width() <= 0 or view.height() <= 0:
+            # Not displayed yet: use a coarse overview of the whole trajectory
+            x_range, y_range, width, height = self.trajectory.x_bounds, self.trajectory.y_bounds, 1024, 1024
+            if x_range[0] is None:
+                super().setData([], [], connect="pairs")
+                return
+        else:
+            x_range, y_range = view.viewRange()
+            width, height = view.width(), view.height()
+
+        # Keep the displayed data as long as it covers the view at the same resolution
+        pixel = ((x_range[1] - x_range[0]) / width, (y_range[1] - y_range[0]) / height)
+        if self.lod_view is not None:
+            (x0, x1), (y0, y1), lod_pixel = self.lod_view
+            if (
+                x0 <= x_range[0]
+                and x_range[1] <= x1
+                and y0 <= y_range[0]
+                and y_range[1] <= y1
+                and np.allclose(pixel, lod_pixel, rtol=0.01)
+            ):
+                return
+
+        # Decimate a wider area than the view so that panning does not require a new query every frame
+        x_margin, y_margin = (x_range[1] - x_range[0]) / 2, (y_range[1] - y_range[0]) / 2
+        x_range = (x_range[0] - x_margin, x_range[1] + x_margin)
+        y_range = (y_range[0] - y_margin, y_range[1] + y_margin)
+        x, y = self.trajectory.query(x_range, y_range, 2 * width, 2 * height)
+        count("downsampling.points", len(x))
+        self.lod_view = (x_range, y_range, pixel)
+        super().setData(x, y, connect="pairs")
+
+    def updateLevelOfDetail(self) -> None:
+        view = self.getViewBox()
+        if view is None or not hasattr(view, "viewRange") or view.width() <= 0:
+            # Not displayed yet: use a coarse overview of the whole signal
+            start, stop, pixels = self.pyramid.x[0], self.pyramid.x[-1], 1024
+        else:
+            start, stop = view.viewRange()[0]
+            pixels = int(view.width())
+
+        # Keep the displayed data as long as it covers the view at the right level
+        i0, i1 = self.pyramid.index_range(start, stop)
+        level = self.pyramid.level_for(i1 - i0, pixels)
+        if self.lod_span is not None and self.lod_span[0] <= start and stop <= self.lod_span[1] and level == self.lod_span[2]:
+            return
+
+        # Query a wider span than the view so that panning does not require a new query every frame
+        margin = (stop - start) / 2
+        x, y = self.pyramid.query(start - margin, stop + margin, level=level)
+        count("downsampling.points", len(x))
+        self.lod_span = (start - margin, stop + margin, level)
+        super().setData(x, y, connect=self.default_connect)
+
+    def setData(self, *args, **kwargs) -> None:
+        # New data invalidates the pyramid or the trajectory, which has to be set again by the owner
+        if self.levelOfDetail:
+            self._setSource(None, None)
+        kwargs.setdefault("connect", self.default_connect)
+        super().setData(*args, **kwargs)
+
+    def viewRangeChanged(self, vb=None, ranges=None, changed=None) -> None:
+        if self.trajectory is not None:
+            self.updateTrajectory()
+        elif self.pyramid is None:
+            super().viewRangeChanged(vb, ranges, changed)
+        elif changed is None or changed[0]:
+            self.updateLevelOfDetail()
+
+    def dataBounds(self, ax: int, frac: float = 1.0, orthoRange=None) -> tuple:
+        if self.trajectory is not None and self.trajectory.x_bounds[0] is not None:
+            # Bounds of the whole trajectory, not only of the displayed part
+            return self.trajectory.x_bounds if ax == 0 else self.trajectory.y_bounds
+        if self.pyramid is None or self.pyramid.x.size == 0:
+            return super().dataBounds(ax, frac, orthoRange)
+        # Report the bounds of the whole signal, not only of the displayed part
+        if ax == 0:
+            return float(self.pyramid.x[0]), float(self.pyramid.x[-1])
+        if orthoRange is not None:
+            return self.pyramid.bounds(*orthoRange)
+        return self.pyramid.bounds()
+
+
+class BatchedCurveItem(GraphicsObject):
+    """Curves of several signals sampled at the same times, drawn by a single item from the 2-D array of their envelopes.
+
+    The visible range and the level of detail are computed once for the whole batch from the pyramids of the signals
+    (built on the same x vector), and the rows drawn with the same pen are joined into a single path, so that the cost
+    of a redraw depends on the width of the view and on the number of distinct pens, not on the number of curves.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pyramids: list[MinMaxPyramid] = []
+        self.pens: list = []
+        self.paths: list[tuple] = []  # (pen, path) of the rows drawn with each pen
+        self.lod_span = None  # (start, stop, level) of the data currently displayed
+        self.bounds: QRectF | None = None  # Bounds of the whole rows
+        self.opts = {"pen": None}  # Read by the sample of the legend
+
+    def __len__(self) -> int:
+        return len(self.pyramids)
+
+    def setRows(self, pyramids: list[MinMaxPyramid], pens: list) -> None:
+        """Draw the signals of pyramids built on the same x vector, each one with its pen"""
+        if any(len(pyramid) != len(pyramids[0]) for pyramid in pyramids):
+            raise ValueError("The rows of a batch must be sampled at the same times")
+        self.prepareGeometryChange()
+        self.pyramids = list(pyramids)
+        self.pens = [mkPen(pen) for pen in pens]
+        self.opts["pen"] = self.pens[0] if self.pens else None
+        self.bounds = None
+        self.lod_span = None
+        self.paths = []
+        if self.pyramids and len(self.pyramids[0]):
+            self.updateLevelOfDetail()
+        self.update()
+
+    def envelopes(self, start: float, stop: float, level: int, buckets: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """The x vector and the 2-D array (one row per signal) of the envelopes of the signals between start and stop.
+
+        The buckets of the level are merged (for all the rows at once) if there are more than twice `buckets` of them.
+        """
+        first = self.pyramids[0]
+        i0, i1 = first.index_range(start, stop)
+        if level == 0:
+            return first.x[i0:i1], np.stack([pyramid.y[i0:i1] for pyramid in self.pyramids])
+
+        bucket = first.bucket_size(level)
+        b0, b1 = i0 // bucket, -(-i1 // bucket)
+        x = first.x[b0 * bucket : b1 * bucket : bucket]
+        mins = np.stack([pyramid.mins[level - 1][b0:b1] for pyramid in self.pyramids])
+        maxs = np.stack([pyramid.maxs[level - 1][b0:b1] for pyramid in self.pyramids])
+        if buckets is not None and x.size > 2 * buckets:
+            starts = np.arange(0, x.size, x.size // buckets)
+            x, mins, maxs = x[starts], np.fmin.reduceat(mins, starts, axis=1), np.fmax.reduceat(maxs, starts, axis=1)
+
+        y = np.empty((len(self.pyramids), 2 * x.size), dtype=mins.dtype)
+        y[:, 0::2] = mins
+        y[:, 1::2] = maxs
+        return np.repeat(x, 2), y
+
+    @profiled("downsampling.batch")
+    def updateLevelOfDetail(self) -> None:
+        first = self.pyramids[0]
+        view = self.getViewBox()
+        if view is None or not hasattr(view, "viewRange") or view.width() <= 0:
+            # Not displayed yet: use a coarse overview of the whole signals
+            start, stop, pixels = first.x[0], first.x[-1], 1024
+        else:
+            start, stop = view.viewRange()[0]
+            pixels = int(view.width())
+
+        # Keep the displayed data as long as it covers the view at the right level
+        i0, i1 = first.index_range(start, stop)
+        level = first.level_for(i1 - i0, pixels)
+        if self.lod_span is not None and self.lod_span[0] <= start and stop <= self.lod_span[1] and level == self.lod_span[2]:
+            return
+
+        # Query a wider span than the view so that panning does not require a new query every frame
+        margin = (stop - start) / 2
+        x, y = self.envelopes(start - margin, stop + margin, level, buckets=2 * pixels)
+        count("downsampling.points", y.size)
+        self.lod_span = (start - margin, stop + margin, level)
+
+        # The rows drawn with the same pen are joined into one path, without connecting the end of a row to the next one
+        rows_by_pen: dict[tuple, list[int]] = {}
+        for row, pen in enumerate(self.pens):
+            rows_by_pen.setdefault((pen.color().rgba(), pen.widthF(), pen.style()), []).append(row)
+        self.paths = []
+        for rows in rows_by_pen.values():
+            values = y[rows].astype(np.float64)
+            finite = np.isfinite(values)
+            connect = finite.copy()
+            connect[:, :-1] &= finite[:, 1:]
+            connect[:, -1] = False
+            values[~finite] = 0.0
+            path = arrayToQPath(np.tile(np.asarray(x, dtype=np.float64), len(rows)), values.ravel(), connect.ravel())
+            self.paths.append((self.pens[rows[0]], path))
+        self.update()
+
+    def viewRangeChanged(self, *args) -> None:
+        if self.pyramids and len(self.pyramids[0]):
+            self.updateLevelOfDetail()
+
+    def dataBounds(self, ax: int, frac: float = 1.0, orthoRange=None) -> tuple:
+        # Bounds of the whole signals, not only of the displayed part
+        if not self.pyramids or len(self.pyramids[0]) == 0:
+            return None, None
+        if ax == 0:
+            return float(self.pyramids[0].x[0]), float(self.pyramids[0].x[-1])
+        bounds = [pyramid.bounds(*(orthoRange or (None, None))) for pyramid in self.pyramids]
+        bounds = [bound for bound in bounds if bound[0] is not None]
+        if not bounds:
+            return None, None
+        return min(bound[0] for bound in bounds), max(bound[1] for bound in bounds)
+
+    def boundingRect(self) -> QRectF:
+        if self.bounds is None:
+            (x0, x1), (y0, y1) = self.dataBounds(0), self.dataBounds(1)
+            self.bounds = QRectF() if x0 is None or y0 is None else QRectF(x0, y0, x1 - x0, y1 - y0)
+        return self.bounds
+
+    def paint(self, painter, *args) -> None:
+        for pen, path in self.paths:
+            painter.setPen(pen)
+            painter.drawPath(path)
@@ -0,0 +1,343 @@
+""" Headless export of plots to PNG or SVG images, without showing a window
+
+Each figure selects its signals with the semantics of `plot_window`: the `pre_select` signals and the signals of the
+selected `groups` of `sub_groups`, plotted against the `x_component`, over an optional `x_range` / `y_range`. The
+figures are rendered with the plot widget of the window under the offscreen Qt platform, and can be spread over a pool
+of processes:
+
+    python -m signal_plotter.export run.csv -y motor.speed motor.current --x-range 0 10 -o speed.png
+    python -m signal_plotter.export run_*.csv --figures report.json --jobs 8
+
+where report.json is a list of figures (or a dict with the "figures" list and the "sub_groups" dict):
+
+    [{"output": "speed.png", "pre_select": ["motor.speed"], "x_range": [0, 10]}, ...]
+
+The signals of a dict source are copied once into shared memory for the worker processes, csv files are read by each
+worker from their memory-mapped cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import os
+import sys
+
+from pyqtgraph.Qt.QtWidgets import QApplication
+
+from signal_plotter import shared_memory
+from signal_plotter.lazy import normalize_items
+from signal_plotter.namespace import SignalNamespace
+from signal_plotter.plot_window import PlotWindow, get_application
+from signal_plotter.profiling import profiled
+from signal_plotter.timebase import TimebaseRegistry
+from signal_plotter.xy import XYCache
+
+logger = logging.getLogger('plot_window_tree')
+
+# Keys of a figure (see `export_figure`)
+FIGURE_KEYS = {
+    "output",
+    "pre_select",
+    "groups",
+    "x_component",
+    "x_range",
+    "y_range",
+    "title",
+    "width",
+    "height",
+    "separate_axes",
+}
+
+# Signals, sub groups and caches of a worker process, set by `_init_worker`
+_worker_items: SignalNamespace | None = None
+_worker_sub_groups: dict[str, list[str]] | None = None
+_worker_caches: dict | None = None
+
+
+def application() -> QApplication:
+    """Return the Qt application, created on the offscreen platform (unless another one was chosen) if there is none"""
+    if QApplication.instance() is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return get_application()
+
+
+def selected_signals(
+    items: dict, pre_select: list[str] | None = None, groups: list[str] | None = None, sub_groups: dict | None = None
+) -> list[str]:
+    """Signals of a figure: the pre-selected signals, then the signals of the selected sub groups"""
+    selected = dict.fromkeys(pre_select or [])
+    for group in groups or []:
+        if sub_groups is None or group not in sub_groups:
+            raise ValueError(f"Unknown sub group {group}")
+        selected.update(dict.fromkeys(sub_groups[group]))
+    for key in [key for key in selected if key not in items]:
+        logger.warning(f"Signal {key} not found in the items, it is not plotted")
+        del selected[key]
+    return list(selected)
+
+
+@profiled("export.figure")
+def export_figure(
+    items: dict,
+    output: str,
+    pre_select: list[str] | None = None,
+    groups: list[str] | None = None,
+    sub_groups: dict[str, list[str]] | None = None,
+    x_component: str | None = None,
+    x_range: tuple[float, float] | None = None,
+    y_range: tuple[float, float] | None = None,
+    title: str | None = None,
+    width: int = 1280,
+    height: int = 720,
+    separate_axes: bool = False,
+    caches: dict | None = None,
+) -> str:
+    """Render the selected signals to a PNG (or any image format supported by Qt) or SVG file, and return its path.
+
+    Args:
+        items (dict): Signals, in the format of `plot_window`.
+        output (str): Path of the image, its extension gives the format.
+        pre_select (list[str]): Signals to plot.
+        groups (list[str]): Sub groups whose signals are plotted, among `sub_groups` ({group name: [signals]}).
+        x_component (str): Signal used as x axis (time if None).
+        x_range, y_range (tuple[float, float]): Visible ranges (automatic if None). The y range is the range of the
+            main axis.
+        title (str): Title of the plot.
+        width, height (int): Size of the image in pixels.
+        separate_axes (bool): Give each unit its own Y-axis.
+        caches (dict): Level-of-detail data of the signals reused between the figures (see `figure_caches`).
+    """
+    import pyqtgraph.exporters
+
+    extension = os.path.splitext(output)[1].lower()
+    if extension == ".svg":
+        exporter_class = pyqtgraph.exporters.SVGExporter
+    elif extension in (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"):
+        exporter_class = pyqtgraph.exporters.ImageExporter
+    else:
+        raise ValueError(f"Unsupported image format {extension or output}")
+
+    app = application()
+    if x_component is not None and x_component not in items:
+        logger.error(f"Selected x_component {x_component} not found in items dict")
+        x_component = None
+    widget = PlotWindow.SignalContainer(items, x_component, **(caches or {}))
+    try:
+        # The widget is never shown: its scene is laid out for the size of the image without being painted on screen
+        widget.resize(width, height)
+        widget.resizeEvent(None)
+        widget.linkAxis = not separate_axes
+        if title is not None:
+            widget.plotItem.setTitle(title)
+        widget.updateSelection(selected_signals(items, pre_select, groups, sub_groups), [])
+        if x_range is not None:
+            widget.plotItem.setXRange(*x_range, padding=0)
+        if y_range is not None:
+            widget.plotItem.setYRange(*y_range, padding=0)
+        app.processEvents()
+
+        exporter = exporter_class(widget.scene())
+        if exporter_class is pyqtgraph.exporters.ImageExporter:
+            exporter.parameters()["width"] = width
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        exporter.export(output)
+    finally:
+        widget.math_executor.shutdown(wait=False)
+        widget.close()
+    return output
+
+
+def figure_caches() -> dict:
+    """Caches of the pyramids and trajectories of the signals, shared by the figures of the same items"""
+    return {"pyramids": {}, "xy_cache": XYCache()}
+
+
+def _figure_signals(figures: list[dict], sub_groups: dict | None) -> set[str]:
+    """Names of the signals used by the figures (plotted or as x axis)"""
+    keys = set()
+    for figure in figures:
+        keys.update(figure.get("pre_select") or [])
+        keys.update(key for group in figure.get("groups") or [] if group in (sub_groups or {}) for key in sub_groups[group])
+        if figure.get("x_component") is not None:
+            keys.add(figure["x_component"])
+    return keys
+
+
+def _init_worker(source: tuple, sub_groups: dict | None) -> None:
+    """Load the signals of the figures in a worker process"""
+    global _worker_items, _worker_sub_groups, _worker_caches
+    if source[0] == "csv":
+        from signal_plotter.csv_parser import load_items
+
+        _, csv_files, use_cache = source
+        items = load_items(csv_files, use_cache=use_cache)[0]
+    else:
+        _, name, layout, signals = source
+        items = shared_memory.attach_items(name, layout, signals, unlink=False)
+    _worker_items = SignalNamespace(normalize_items(items, TimebaseRegistry()))
+    _worker_sub_groups = sub_groups
+    _worker_caches = figure_caches()
+
+
+def _export_worker(figure: dict) -> tuple[str, str | None]:
+    """Render a figure in a worker process, returning its output and the error message if it failed"""
+    try:
+        return export_figure(_worker_items, sub_groups=_worker_sub_groups, caches=_worker_caches, **figure), None
+    except Exception as e:
+        return figure.get("output"), f"{type(e).__name__}: {e}"
+
+
+def check_figures(figures: list[dict]) -> None:
+    for figure in figures:
+        if "output" not in figure:
+            raise ValueError(f"Figure without output: {figure}")
+        unknown = set(figure) - FIGURE_KEYS
+        if unknown:
+            raise ValueError(f"Unknown keys {', '.join(sorted(unknown))} in the figure {figure['output']}")
+
+
+@profiled("export.figures")
+def export_figures(
+    source: dict | list[str],
+    figures: list[dict],
+    sub_groups: dict[str, list[str]] | None = None,
+    jobs: int = 1,
+    use_cache: bool = True,
+) -> list[tuple[str, str | None]]:
+    """Render figures (dicts of the arguments of `export_figure`) from a source of signals, in `jobs` processes (all
+    the cores if 0).
+
+    Args:
+        source (dict | list[str]): Items dictionary of the signals, or csv files read with `csv_parser.load_items`.
+
+    Returns:
+        The (output, error message or None) of each figure, in order.
+    """
+    check_figures(figures)
+    jobs = min(jobs or os.cpu_count(), len(figures))
+    if jobs <= 1:
+        if isinstance(source, dict):
+            items = SignalNamespace(normalize_items(source, TimebaseRegistry()))
+        else:
+            from signal_plotter.csv_parser import load_items
+
+            items = SignalNamespace(normalize_items(load_items(list(source), use_cache=use_cache)[0], TimebaseRegistry()))
+        results = []
+        caches = figure_caches()
+        for figure in figures:
+            try:
+                results.append((export_figure(items, sub_groups=sub_groups, caches=caches, **figure), None))
+            except Exception as e:
+                logger.error(f"Error exporting {figure['output']}: {e}", exc_info=True)
+                results.append((figure["output"], f"{type(e).__name__}: {e}"))
+        return results
+
+    segment = None
+    if isinstance(source, dict):
+        keys = _figure_signals(figures, sub_groups)
+        segment, layout, signals = shared_memory.share_items({key: value for key, value in source.items() if key in keys})
+        worker_source = ("shared_memory", segment, layout, signals)
+    else:
+        from signal_plotter.csv_parser import read_csv_files
+
+        # Write the caches once, the workers then memory-map them
+        if use_cache:
+            read_csv_files(list(source), use_cache=True, jobs=jobs)
+        worker_source = ("csv", list(source), use_cache)
+
+    try:
+        # Workers are spawned rather than forked, as forking a process using Qt is not safe
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(worker_source, sub_groups),
+        ) as executor:
+            results = list(executor.map(_export_worker, figures))
+    finally:
+        if segment is not None:
+            shared_memory.release(segment, unlink=True)
+    for output, error in results:
+        if error is not None:
+            logger.error(f"Error exporting {output}: {error}")
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Export plots of the signals of csv files to PNG or SVG images")
+    parser.add_argument("csv_file", type=str, nargs="+", help="The csv files to read")
+    parser.add_argument("-x", "--x", type=str, help="The x axis column")
+    parser.add_argument("-y", "--y", type=str, nargs="+", help="The y axis columns")
+    parser.add_argument("-g", "--groups", type=str, nargs="+", help="Sub groups whose signals are plotted")
+    parser.add_argument("--sub-groups", metavar="JSON_FILE", help="JSON file of the sub groups ({name: [signals]})")
+    parser.add_argument("--x-range", type=float, nargs=2, metavar=("MIN", "MAX"), help="Visible range of the x axis")
+    parser.add_argument("--y-range", type=float, nargs=2, metavar=("MIN", "MAX"), help="Visible range of the y axis")
+    parser.add_argument("--title", type=str, help="Title of the plot")
+    parser.add_argument("--width", type=int, default=1280, help="Width of the images in pixels (default: 1280)")
+    parser.add_argument("--height", type=int, default=720, help="Height of the images in pixels (default: 720)")
+    parser.add_argument("--separate-axes", action="store_true", help="Give each unit its own Y-axis")
+    parser.add_argument("-o", "--output", type=str, help="Image file of the figure given on the command line")
+    parser.add_argument("--figures", metavar="JSON_FILE", help="JSON file of the figures to export")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes rendering the figures in parallel (0 to use all the cores)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always parse the csv files instead of using (and writing) their memory-mapped cache",
+    )
+    args = parser.parse_args(argv)
+
+    from signal_plotter.csv_parser import expand_files
+
+    sub_groups = None
+    if args.sub_groups:
+        with open(args.sub_groups) as f:
+            sub_groups = json.load(f)
+    figures = []
+    if args.figures:
+        with open(args.figures) as f:
+            figures = json.load(f)
+        if isinstance(figures, dict):
+            sub_groups = figures.get("sub_groups", sub_groups)
+            figures = figures["figures"]
+    if args.output:
+        figures.append(
+            {
+                "output": args.output,
+                "pre_select": args.y,
+                "groups": args.groups,
+                "x_component": args.x,
+                "x_range": args.x_range,
+                "y_range": args.y_range,
+                "title": args.title,
+            }
+        )
+    if not figures:
+        parser.error("nothing to export, give an --output or a --figures file")
+    for figure in figures:
+        figure.setdefault("width", args.width)
+        figure.setdefault("height", args.height)
+        figure.setdefault("separate_axes", args.separate_axes)
+
+    results = export_figures(
+        expand_files(args.csv_file), figures, sub_groups=sub_groups, jobs=args.jobs, use_cache=not args.no_cache
+    )
+    failed = sum(error is not None for _, error in results)
+    print(f"{len(results) - failed} figures exported, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,139 @@
+""" Signals materialized on demand, with a memory budget for the loaded arrays"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy
+
+from signal_plotter.timebase import TimebaseRegistry, as_signal_array
+
+logger = logging.getLogger('plot_window_tree')
+
+
+class LazySignal:
+    """Signal whose arrays are produced by a loader the first time they are needed.
+
+    The loader is called without argument and returns either a (x, y) tuple or a dict with "x" and "y" keys. The
+    metadata known beforehand (units, scatter, alpha...) is given as keyword arguments, so that it can be displayed
+    without loading the signal.
+    """
+
+    def __init__(self, loader: Callable[[], Any], **metadata) -> None:
+        self.loader = loader
+        self.metadata = metadata
+
+    def load(self) -> tuple[numpy.ndarray, numpy.ndarray]:
+        data = self.loader()
+        if isinstance(data, dict):
+            return data["x"], data["y"]
+        x, y = data
+        return x, y
+
+
+def is_lazy(value) -> bool:
+    """Whether an items value is a loader instead of a dict of arrays"""
+    return isinstance(value, LazySignal) or (callable(value) and not isinstance(value, dict))
+
+
+def normalize_signal(data: dict, timebases: TimebaseRegistry) -> dict:
+    """Copy of a signal dict whose arrays are contiguous read-only arrays, sharing its x vector with other signals (the
+    dict of the caller is not modified)"""
+    data = dict(data)
+    if "x" in data:
+        data["x"] = timebases.register(data["x"])
+    if "y" in data:
+        data["y"] = as_signal_array(data["y"])
+    return data
+
+
+def normalize_items(items: dict | None, timebases: TimebaseRegistry | None = None) -> dict | None:
+    """Replace the loaders of an items dictionary by dicts holding the loader and the metadata of the signal.
+
+    If a timebase registry is given, the arrays of the signals are also normalized (see `normalize_signal`).
+    """
+    if items is None or (timebases is None and not any(is_lazy(value) for value in items.values())):
+        return items
+    normalized = {}
+    for key, value in items.items():
+        if is_lazy(value):
+            signal = value if isinstance(value, LazySignal) else LazySignal(value)
+            value = {**signal.metadata, "loader": signal}
+        elif timebases is not None and isinstance(value, dict):
+            value = normalize_signal(value, timebases)
+        normalized[key] = value
+    return normalized
+
+
+class SignalCache:
+    """LRU cache of the arrays of lazy signals, with a budget in bytes.
+
+    Loaded arrays are stored in the signal dict itself ("x" and "y" keys), normalized with the timebase registry if one
+    is given. When the budget is exceeded, the least recently used signals which are not pinned (e.g. displayed) are
+    unloaded: their arrays are removed from their dict and the loader will be called again if they are needed later.
+    Signals given with their arrays are never unloaded.
+    """
+
+    def __init__(
+        self,
+        budget: int | None = None,
+        pinned: Callable[[str], bool] | None = None,
+        on_evict: Callable[[str], None] | None = None,
+        timebases: TimebaseRegistry | None = None,
+    ) -> None:
+        self.budget = budget
+        self.timebases = timebases
+        self.pinned = pinned if pinned is not None else (lambda key: False)
+        self.on_evict = on_evict
+        self.entries: OrderedDict[str, tuple[dict, int]] = OrderedDict()  # key -> (signal dict, size in bytes)
+        self.nbytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def load(self, key: str, data: dict) -> dict:
+        """Make sure the arrays of a signal are loaded and return its dict"""
+        if "loader" not in data:
+            return data
+        if key in self.entries and "x" in data and "y" in data:
+            self.entries.move_to_end(key)
+            return data
+
+        logger.debug(f"Loading signal {key}")
+        x, y = data["loader"].load()
+        if self.timebases is not None:
+            normalized = normalize_signal({"x": x, "y": y}, self.timebases)
+            x, y = normalized["x"], normalized["y"]
+        data["x"], data["y"] = x, y
+        size = getattr(x, "nbytes", 0) + getattr(y, "nbytes", 0)
+        self.entries[key] = (data, size)
+        self.nbytes += size
+        self.evict()
+        return data
+
+    def forget(self, key: str) -> None:
+        """Stop tracking the arrays of a signal whose data was replaced (they are not unloaded)"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def unload(self, key: str) -> None:
+        data, size = self.entries.pop(key)
+        data.pop("x", None)
+        data.pop("y", None)
+        self.nbytes -= size
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+    def evict(self) -> None:
+        """Unload the least recently used signals until the loaded arrays fit in the budget"""
+        if self.budget is None or self.nbytes <= self.budget:
+            return
+        for key in list(self.entries):
+            if self.nbytes <= self.budget:
+                break
+            if not self.pinned(key):
+                logger.debug(f"Unloading signal {key}")
+                self.unload(key)
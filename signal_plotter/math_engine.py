@@ -0,0 +1,227 @@
+""" Evaluation of the math expressions typed in the Math bar
+
+An expression is parsed once: the dotted signal names it references are resolved and replaced by placeholders, and the
+rewritten expression is compiled. Evaluating it only binds the referenced signals. Elementwise expressions on large
+arrays are evaluated chunk by chunk into a preallocated result, so that each operator only creates chunk-sized
+temporaries, and results are memoized as long as the expression and its input arrays are the same (within a budget
+in bytes, the least recently used results being dropped first).
+
+Evaluations can run in a worker thread (numpy releases the GIL in its loops): a `cancelled` callback is checked
+between the chunks, so that a stale evaluation stops as soon as a newer one is requested.
+"""
+
+from __future__ import annotations
+
+import ast
+import builtins
+import weakref
+from collections import OrderedDict
+from typing import Callable
+
+import numpy
+
+# Names available in the expressions besides the signals
+NAMESPACE = {"__builtins__": builtins, "np": numpy, "numpy": numpy}
+
+# Functions which can be evaluated chunk by chunk besides the numpy ufuncs
+ELEMENTWISE_BUILTINS = {"abs"}
+
+# Default size in bytes of the memoized results
+MEMO_BUDGET = 64 * 1024**2
+
+
+class EvaluationCancelled(Exception):
+    """Raised when an evaluation is cancelled before its end"""
+
+
+def _dotted_name(node: ast.AST) -> list[str] | None:
+    """Return the components of a `a.b.c` expression, or None if the node is not a dotted name"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return parts[::-1]
+
+
+class _SignalResolver(ast.NodeTransformer):
+    """Replace the signal names of an expression by placeholders `_s0`, `_s1`..."""
+
+    def __init__(self, is_signal: Callable[[str], bool]) -> None:
+        self.is_signal = is_signal
+        self.signals: list[str] = []
+
+    def _resolve(self, node: ast.AST) -> ast.AST | None:
+        parts = _dotted_name(node)
+        if parts is None:
+            return None
+        # The longest prefix naming a signal wins, the remaining components are attributes of its array
+        for length in range(len(parts), 0, -1):
+            key = ".".join(parts[:length])
+            if self.is_signal(key):
+                if key not in self.signals:
+                    self.signals.append(key)
+                resolved = ast.Name(id=f"_s{self.signals.index(key)}", ctx=ast.Load())
+                for attr in parts[length:]:
+                    resolved = ast.Attribute(value=resolved, attr=attr, ctx=ast.Load())
+                return resolved
+        return None
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        return self._resolve(node) or node
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        return self._resolve(node) or self.generic_visit(node)
+
+
+def _is_elementwise(node: ast.AST) -> bool:
+    """Whether an expression only combines its inputs element by element"""
+    if isinstance(node, ast.Expression):
+        return _is_elementwise(node.body)
+    if isinstance(node, ast.BinOp):
+        return not isinstance(node.op, ast.MatMult) and _is_elementwise(node.left) and _is_elementwise(node.right)
+    if isinstance(node, ast.UnaryOp):
+        return not isinstance(node.op, ast.Not) and _is_elementwise(node.operand)
+    if isinstance(node, ast.Compare):
+        return len(node.ops) == 1 and _is_elementwise(node.left) and _is_elementwise(node.comparators[0])
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, (int, float, complex))
+    if isinstance(node, ast.Name):
+        return node.id.startswith("_s")
+    if isinstance(node, ast.Call):
+        if node.keywords or not all(_is_elementwise(arg) for arg in node.args):
+            return False
+        func = _dotted_name(node.func)
+        if func is None:
+            return False
+        if len(func) == 1:
+            return func[0] in ELEMENTWISE_BUILTINS
+        return len(func) == 2 and func[0] in ("np", "numpy") and isinstance(getattr(numpy, func[1], None), numpy.ufunc)
+    return False
+
+
+class MathExpression:
+    """Compiled math expression, with the keys of the signals it references"""
+
+    def __init__(self, text: str, is_signal: Callable[[str], bool]) -> None:
+        self.text = text.strip()
+        tree = ast.parse(self.text, "<math>", "eval")
+        resolver = _SignalResolver(is_signal)
+        tree = ast.fix_missing_locations(resolver.visit(tree))
+        self.signals: tuple[str, ...] = tuple(resolver.signals)
+        self.elementwise = bool(self.signals) and _is_elementwise(tree)
+        self.code = compile(tree, "<math>", "eval")
+
+    def __repr__(self) -> str:
+        return f"MathExpression({self.text!r}, signals={self.signals})"
+
+    def _eval(self, inputs: list) -> numpy.ndarray:
+        return eval(self.code, NAMESPACE, {f"_s{i}": value for i, value in enumerate(inputs)})
+
+    def evaluate(
+        self, inputs: list, chunk_size: int = 65536, cancelled: Callable[[], bool] | None = None
+    ) -> numpy.ndarray:
+        """Evaluate the expression with the arrays of its signals (in the order of `signals`)"""
+        chunked = (
+            self.elementwise
+            and all(isinstance(value, numpy.ndarray) and value.ndim == 1 for value in inputs)
+            and len({value.size for value in inputs}) == 1
+            and inputs[0].size > chunk_size
+        )
+        if not chunked:
+            return self._eval(inputs)
+
+        size = inputs[0].size
+        result = None
+        for start in range(0, size, chunk_size):
+            if cancelled is not None and cancelled():
+                raise EvaluationCancelled(self.text)
+            stop = min(start + chunk_size, size)
+            chunk = numpy.asarray(self._eval([value[start:stop] for value in inputs]))
+            if chunk.shape != (stop - start,):
+                # Not elementwise after all (e.g. a constant result), evaluate the whole arrays at once
+                return self._eval(inputs)
+            if result is None:
+                result = numpy.empty(size, dtype=chunk.dtype)
+            result[start:stop] = chunk
+        return result
+
+
+class MathEngine:
+    """Compile and evaluate math expressions, caching the compiled expressions and the last results.
+
+    `is_signal` tells whether a dotted name is the key of a signal. `invalidate` must be called when the signal keys
+    change, since they are resolved when an expression is compiled. The memoized results are bounded by `memo_budget`
+    bytes (unbounded if None), and only reference their inputs weakly: they don't keep unloaded signals in memory.
+    """
+
+    def __init__(
+        self,
+        is_signal: Callable[[str], bool],
+        chunk_size: int = 65536,
+        cache_size: int = 256,
+        memo_budget: int | None = MEMO_BUDGET,
+    ) -> None:
+        self.is_signal = is_signal
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.memo_budget = memo_budget
+        self.expressions: OrderedDict[str, MathExpression] = OrderedDict()
+        # expression text -> (references to the input arrays, result, size in bytes). The inputs are kept so that their
+        # identity can be compared
+        self.results: OrderedDict[str, tuple[list, numpy.ndarray, int]] = OrderedDict()
+        self.nbytes = 0
+
+    def invalidate(self) -> None:
+        """Forget the compiled expressions, to resolve their signal names again"""
+        self.expressions.clear()
+
+    def clear(self) -> None:
+        """Forget the memoized results"""
+        self.results.clear()
+        self.nbytes = 0
+
+    def compile(self, text: str) -> MathExpression:
+        expression = self.expressions.get(text)
+        if expression is None:
+            expression = MathExpression(text, self.is_signal)
+            self.expressions[text] = expression
+            if len(self.expressions) > self.cache_size:
+                self.expressions.popitem(last=False)
+        else:
+            self.expressions.move_to_end(text)
+        return expression
+
+    @staticmethod
+    def _reference(value) -> Callable[[], object]:
+        try:
+            return weakref.ref(value)
+        except TypeError:
+            # Scalars and other objects which can't be weakly referenced
+            return lambda: value
+
+    def _forget(self, text: str) -> None:
+        self.nbytes -= self.results.pop(text)[2]
+
+    def evaluate(
+        self, expression: MathExpression, inputs: list, cancelled: Callable[[], bool] | None = None
+    ) -> numpy.ndarray:
+        """Evaluate an expression, reusing the previous result if its inputs are the same arrays"""
+        memo = self.results.get(expression.text)
+        if memo is not None:
+            if len(memo[0]) == len(inputs) and all(reference() is value for reference, value in zip(memo[0], inputs)):
+                self.results.move_to_end(expression.text)
+                return memo[1]
+            self._forget(expression.text)
+
+        result = expression.evaluate(inputs, self.chunk_size, cancelled)
+        size = getattr(result, "nbytes", 0)
+        if self.memo_budget is None or size <= self.memo_budget:
+            self.results[expression.text] = ([self._reference(value) for value in inputs], result, size)
+            self.nbytes += size
+            # Drop the least recently used results until the memo fits in the budget
+            while self.memo_budget is not None and self.nbytes > self.memo_budget:
+                self._forget(next(iter(self.results)))
+        return result
@@ -0,0 +1,186 @@
+""" Namespace of the signals, indexed by their dotted names
+
+The signals are stored in a trie of the components of their names: each signal is stored once, under the last component
+of its name, and the components are interned so that the names sharing a component (`motor1.speed`, `motor2.speed`...)
+share its string. Nodes are only created for the groups: the value of a signal without signals below it is stored
+directly in the children of its group. Looking up a signal by its full key or by the list of its components walks one
+node per component, and lookups never modify the namespace.
+
+A single `SignalNamespace` is shared by the window and its widgets.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Iterator, Sequence
+
+# Value of the groups which are not signals themselves, and result of the lookups of unknown paths
+_MISSING = object()
+
+
+class _Node:
+    """Node of the trie, for a component of the signal names"""
+
+    __slots__ = ("children", "value")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] | None = None  # Created with the first child
+        self.value: Any = _MISSING
+
+
+class SignalNamespace(MutableMapping):
+    """Mapping of the dotted signal names to the dicts of the signals.
+
+    It behaves as a dict of the signals (`namespace["group.signal"]`, `in`, `len`, iteration), and also gives access
+    to the groups of signals: `namespace.get_path(["group", "signal"])`, `namespace.is_group("group")`.
+    Signals are iterated group by group, in the order their groups were first inserted.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, items=None) -> None:
+        self._root = _Node()
+        self._size = 0
+        if items is not None:
+            self.update(items)
+
+    def _find(self, parts: Sequence[str]) -> Any:
+        """Node (or value of a leaf signal) of a path, _MISSING if there is none"""
+        node = self._root
+        for part in parts:
+            if type(node) is not _Node or node.children is None:
+                return _MISSING
+            node = node.children.get(part, _MISSING)
+        return node
+
+    @staticmethod
+    def _value(node: Any) -> Any:
+        return node.value if type(node) is _Node else node
+
+    # region Mapping
+    def __getitem__(self, key: str) -> Any:
+        value = self._value(self._find(key.split(".")))
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        *groups, name = key.split(".")
+        node = self._root
+        for part in groups:
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(part, _MISSING)
+            if type(child) is not _Node:
+                # New group, or a leaf signal becoming a group
+                leaf, child = child, _Node()
+                child.value = leaf
+                node.children[sys.intern(part)] = child
+            node = child
+        if node.children is None:
+            node.children = {}
+        child = node.children.get(name, _MISSING)
+        if self._value(child) is _MISSING:
+            self._size += 1
+        if type(child) is _Node:
+            child.value = value
+        else:
+            node.children[sys.intern(name)] = value
+
+    def __delitem__(self, key: str) -> None:
+        parts = key.split(".")
+        path = [self._root]
+        for part in parts:
+            node = path[-1]
+            child = node.children.get(part, _MISSING) if type(node) is _Node and node.children is not None else _MISSING
+            if child is _MISSING:
+                raise KeyError(key)
+            path.append(child)
+        if self._value(path[-1]) is _MISSING:
+            raise KeyError(key)
+        if type(path[-1]) is _Node:
+            path[-1].value = _MISSING
+        else:
+            path[-1] = _Node()  # Removed below, as it has no children
+        self._size -= 1
+        # Remove the nodes left without signal below them
+        for part, parent, node in zip(reversed(parts), reversed(path[:-1]), reversed(path[1:])):
+            if node.children or node.value is not _MISSING:
+                break
+            del parent.children[part]
+            if not parent.children:
+                parent.children = None
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        return self._value(self._find(key.split("."))) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        for key, _ in self._walk(self._root, ""):
+            yield key
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} signals)"
+
+    def _walk(self, node: _Node, prefix: str) -> Iterator[tuple[str, Any]]:
+        """(key, value) of the signals at or below a node, depth first"""
+        stack = [(prefix, node)]
+        while stack:
+            path, node = stack.pop()
+            if type(node) is not _Node:
+                yield path, node
+                continue
+            if node.value is not _MISSING:
+                yield path, node.value
+            if node.children:
+                stack.extend(
+                    (f"{path}.{name}" if path else name, child) for name, child in reversed(node.children.items())
+                )
+
+    # endregion Mapping
+
+    # region Paths
+    def get_path(self, parts: Sequence[str], default: Any = None) -> Any:
+        """Value of the signal named by a list of components (e.g. the attributes of `group.signal`)"""
+        value = self._value(self._find(parts))
+        return default if value is _MISSING else value
+
+    def longest_prefix(self, parts: Sequence[str]) -> int:
+        """Number of leading components naming a signal (the longest such prefix), 0 if none"""
+        node = self._root
+        length = 0
+        for i, part in enumerate(parts):
+            if type(node) is not _Node or node.children is None:
+                break
+            node = node.children.get(part, _MISSING)
+            if self._value(node) is not _MISSING:
+                length = i + 1
+        return length
+
+    def is_group(self, path: str) -> bool:
+        """Whether some signals are named `path.<name>`"""
+        node = self._find(path.split(".")) if path else self._root
+        return type(node) is _Node and bool(node.children)
+
+    def children(self, path: str = "") -> list[str]:
+        """Names of the components directly below a group"""
+        node = self._find(path.split(".")) if path else self._root
+        return list(node.children) if type(node) is _Node and node.children else []
+
+    def group(self, path: str) -> dict[str, Any]:
+        """Signals below a group, by full key"""
+        if not self.is_group(path):
+            return {}
+        node = self._find(path.split(".")) if path else self._root
+        return {
+            key: value
+            for name, child in node.children.items()
+            for key, value in self._walk(child, f"{path}.{name}" if path else name)
+        }
+
+    # endregion Paths
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import logging
 import os
+import re
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
 
 import numpy as np
-from pyqtgraph import AxisItem, InfiniteLine, PlotCurveItem, PlotWidget, ViewBox, intColor, mkBrush, mkPen
-from pyqtgraph.Qt.QtCore import Qt, Signal, Slot
-from pyqtgraph.Qt.QtGui import QColor, QPalette
+from pyqtgraph import AxisItem, InfiniteLine, PlotWidget, ViewBox, intColor, mkBrush, mkPen
+from pyqtgraph.Qt.QtCore import Qt, QTimer, Signal, Slot
+from pyqtgraph.Qt.QtGui import QColor, QKeySequence, QPalette, QShortcut
 from pyqtgraph.Qt.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -22,12 +25,27 @@ from pyqtgraph.Qt.QtWidgets import (
     QPushButton,
     QScrollArea,
     QSplitter,
+    QTableWidget,
+    QTableWidgetItem,
+    QTreeView,
     QTreeWidget,
     QTreeWidgetItem,
     QTreeWidgetItemIterator,
     QWidget,
 )
 
+from signal_plotter.downsampling import BatchedCurveItem, MinMaxPyramid, PyramidDataItem, XYTrajectory
+from signal_plotter.lazy import SignalCache, normalize_items
+from signal_plotter.math_engine import EvaluationCancelled, MathEngine
+from signal_plotter.namespace import SignalNamespace
+from signal_plotter.profiling import PROFILER, count, profiled
+from signal_plotter.search import SearchIndex
+from signal_plotter.selection import SelectionModel
+from signal_plotter.statistics import RangeStatistics
+from signal_plotter.timebase import TimebaseRegistry
+from signal_plotter.tree_model import SignalTreeModel
+from signal_plotter.xy import XYCache
+
 logger = logging.getLogger('plot_window_tree')
 
 
@@ -75,8 +93,10 @@ class PlotWindow(QWidget):
         super().__init__()
         self.title = kwargs.get("title", "Signal plotter")
 
-        # Items dictionary of signals to be displayed
-        self.items = RecursiveDict(items)
+        # Namespace of the signals to be displayed, shared by the widgets. Loaders of lazy signals are replaced by dicts,
+        # and the arrays are normalized once, the signals with identical x vectors sharing a single array
+        self.timebases = TimebaseRegistry()
+        self.items = SignalNamespace(normalize_items(items, self.timebases))
 
         # User-defined subgroups of signals
         self.sub_goups = kwargs.get("sub_groups", None)
@@ -95,8 +115,6 @@ class PlotWindow(QWidget):
         self.initUI(**kwargs)
 
     class ListContainer(QScrollArea):
-        changeItem = pyqtSignal(dict)
-
         def __init__(self, items: dict = None, sub_groups: dict = None, parent=None) -> None:
             super().__init__(parent)
             self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -112,6 +130,20 @@ class PlotWindow(QWidget):
             # User-defined subgroups of signals
             self.listSubGroups = sub_groups
 
+            # Index of the signal names for the search bar, and signals matching the current search
+            self.search_index = SearchIndex(self.signalKeys())
+            self.visible_keys = {key for key in self.search_index.names if self.listItem[key]["visible"]}
+            # Selected signals, the views are notified of the keys added to or removed from the selection
+            self.selection = SelectionModel(key for key in self.search_index.names if self.listItem[key]["state"])
+            self.selection.selectionChanged.connect(self.selectionChanged)
+
+            # Model of the tree of signals, whose rows are created when their branch is expanded
+            self.model = SignalTreeModel(
+                self.search_index.names, self.selection, units=self.signalUnits, pending=self.signalPending
+            )
+            self.model.setVisibleKeys((), [key for key in self.search_index.names if key not in self.visible_keys])
+            self.expanded_paths: set[str] = set()  # Paths of the expanded branches, restored when the rows change
+
             self.itemChk = []
             self.initUI()
 
@@ -120,37 +152,84 @@ class PlotWindow(QWidget):
             return self.listSubGroups is not None
 
         def set_manual_keys(self, items) -> None:
-            # For each element in items add a "state" flag
-            for key, _ in self.listItem.items():
-                # self.listItem[key].setdefault("state", False)
-                self.listItem[key]["state"] = key in items
-            self.changeItem.emit({key: {"state": value["state"]} for key, value in self.listItem.items()})
-            self.resetUI()  # Reset the UI to reflect the new state
+            self.selection.setSelection(key for key in items if key in self.search_index)
+
+        def signalKeys(self) -> list[str]:
+            return list(self.listItem)
+
+        def signalUnits(self, key: str) -> str | None:
+            return self.listItem.get(key).get("units", None)
+
+        def signalPending(self, key: str) -> bool:
+            """Whether a signal is listed before its data is available (it can't be checked yet)"""
+            return self.listItem.get(key).get("pending", False)
+
+        @profiled("tree.addItems")
+        def addItems(self, items: dict) -> None:
+            """Add new signals to the list"""
+            for key, value in items.items():
+                self.listItem[key] = value
+                self.listItem[key].setdefault("state", False)
+                self.listItem[key].setdefault("visible", True)
+            self.search_index.add(items)
+            self.visible_keys.update(key for key in items if self.listItem[key]["visible"])
+            self.model.addKeys(items)
+            self.model.setVisibleKeys((), [key for key in items if key not in self.visible_keys])
+            self.restoreExpanded()
+            self.resetUI()  # Reset the UI to display the new signals
+            self.selection.select(key for key in items if self.listItem[key]["state"])
+
+        def selectedKeys(self) -> list[str]:
+            return self.selection.keys()
 
         def clearSignals(self) -> None:
-            # For each element in items add a "state" flag
-            for key, _ in self.listItem.items():
-                self.listItem[key]["state"] = False
-            self.changeItem.emit({key: {"state": value["state"]} for key, value in self.listItem.items()})
-            self.resetUI()  # Reset the UI to reflect the new state
+            self.selection.clear()
+
+        @profiled("tree.selectionChanged")
+        def selectionChanged(self, added: list[str], removed: list[str]) -> None:
+            for key in added:
+                self.listItem.get(key)["state"] = True
+            for key in removed:
+                self.listItem.get(key)["state"] = False
 
+            if self.has_subgroups:
+                for key in added + removed:
+                    for item in self.subtree_items.get(key, ()):
+                        item.setCheckState(0, Qt.Checked if key in self.selection else Qt.Unchecked)
+
+        @profiled("tree.search")
         def set_item_visibility(self, text: str) -> None:
-            search = text.split("||")
-            for key in self.listItem:
-                self.listItem[key]["visible"] = any([s in key for s in search])
-            self.resetUI()  # Reset the UI to reflect the new state
+            """Only show the signals matching the search (see signal_plotter.search for the syntax)"""
+            try:
+                visible_keys = set(self.search_index.matching(text))
+            except re.error:
+                return  # Incomplete regular expression, keep the previous search
+            changed = visible_keys ^ self.visible_keys
+            if not changed:
+                return
+            self.visible_keys = visible_keys
+
+            for key in changed:
+                self.listItem.get(key)["visible"] = key in visible_keys
+            self.model.setVisibleKeys(changed & visible_keys, changed - visible_keys)
+            self.restoreExpanded()
+
+        def restoreExpanded(self) -> None:
+            """Expand the branches which were expanded before the rows of the tree were recomputed"""
+            for path in sorted(self.expanded_paths, key=lambda path: path.count(".")):
+                index = self.model.indexFromPath(path)
+                if index.isValid():
+                    self.tree.expand(index)
 
         def select_visible_items(self) -> None:
-            for key in self.listItem:
-                # Visibility is already set by set_item_visibility during the text completion
-                self.listItem[key]["state"] = self.listItem[key]["visible"]
-            self.changeItem.emit({key: {"state": value["state"]} for key, value in self.listItem.items()})
-            self.resetUI()  # Reset the UI to reflect the new state
+            # Visibility is already set by set_item_visibility during the text completion
+            self.selection.setSelection(sorted(self.visible_keys))
 
         def initUI(self) -> None:
-            # Create the tree widget
-            self.tree = QTreeWidget()
-            self.tree.setColumnCount(2)
+            # Create the tree view
+            self.tree = QTreeView()
+            self.tree.setModel(self.model)
+            self.tree.setUniformRowHeights(True)
             self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
             self.tree.header().setMinimumSectionSize(1)
             self.tree.setColumnWidth(1, 1)
@@ -182,63 +261,17 @@ class PlotWindow(QWidget):
                 # Set the tree as the main widget
                 self.setWidget(self.tree)
 
-            self.resetUI()  # Reset the UI to reflect the new state
-
-        def update_selected_tree(self) -> None:
-            # Clear the tree
-            self.tree.clear()
-
-            # Populate the tree
-            # For each key in the dict Add a button to append the item to the selcted list
-            current_box = []
-            tree_parent_levels = [self.tree]
-
-            for i, key in enumerate(sorted(self.listItem.keys())):
-                # Skip invisible items
-                if not self.listItem[key]["visible"]:
-                    continue
-
-                depth = len(key.split("."))
-                for j in range(depth):
-                    if len(current_box) <= j:
-                        # if current_box size is smaller than the current level
-                        current_box.append(key.split(".")[j])
-
-                    else:
-                        if key.split(".")[j] != current_box[j]:
-                            current_box[j] = key.split(".")[j]
-                            # Remove all the items after the current level
-                            for k in range(j + 1, len(current_box)):
-                                current_box.pop()
-                        else:
-                            continue
-                        tree_parent_levels = tree_parent_levels[: j + 1]
-
-                    child = QTreeWidgetItem(tree_parent_levels[-1])
-
-                    if j > 0:
-                        child.setFlags(
-                            child.flags() | tree_parent_levels[-1].flags() | Qt.ItemIsAutoTristate | Qt.ItemIsUserCheckable
-                        )
-                    else:
-                        child.setFlags(child.flags() | Qt.ItemIsAutoTristate | Qt.ItemIsUserCheckable)
-                    child.setCheckState(
-                        0,
-                        Qt.Unchecked if not self.listItem[key]["state"] else Qt.Checked,
-                    )
-                    child.setText(0, key.split(".")[j])
-
-                    # Set the unit label at the end of the tree
-                    if j == depth - 1:
-                        child.setText(
-                            1, f'[{self.listItem[key]["units"]}]' if self.listItem[key].get("units", None) is not None else ""
-                        )
-                        child.setTextAlignment(1, Qt.AlignRight)
+            self.tree.expanded.connect(lambda index: self.expanded_paths.add(index.internalPointer().path))
+            self.tree.collapsed.connect(lambda index: self.expanded_paths.discard(index.internalPointer().path))
+            if self.has_subgroups:
+                self.subtree.clicked.connect(self.subgroups_selected)
 
-                    tree_parent_levels.append(child)
+            self.resetUI()  # Reset the UI to reflect the new state
 
+        @profiled("tree.subgroups")
         def update_selected_subtree(self) -> None:
             self.subtree.clear()
+            self.subtree_items: dict[str, list[QTreeWidgetItem]] = {}
             for key, value in self.listSubGroups.items():
                 child = QTreeWidgetItem(self.subtree)
                 child.setText(0, key)
@@ -251,9 +284,10 @@ class PlotWindow(QWidget):
                     sub_child.setFlags(sub_child.flags() | child.flags() | Qt.ItemIsAutoTristate | Qt.ItemIsUserCheckable)
                     sub_child.setCheckState(
                         0,
-                        Qt.Unchecked if not self.listItem[sub_value]["state"] else Qt.Checked,
+                        Qt.Unchecked if sub_value not in self.selection else Qt.Checked,
                     )
                     sub_child.setText(0, sub_value)
+                    self.subtree_items.setdefault(sub_value, []).append(sub_child)
 
                     # Set the unit label in the second column
                     sub_child.setText(
@@ -267,36 +301,6 @@ class PlotWindow(QWidget):
                     sub_child.setTextAlignment(1, Qt.AlignRight)
 
         def resetUI(self) -> None:
-            self.update_selected_tree()
-            self.tree.clicked.connect(self.items_selected)
-
-            if self.has_subgroups:
-                self.update_selected_subtree()
-                self.subtree.clicked.connect(self.subgroups_selected)
-
-        def items_selected(self) -> None:
-            """Function to check whick box is checked inside de QTreeWidget in the tab window"""
-            iterator = QTreeWidgetItemIterator(
-                self.tree,
-                QTreeWidgetItemIterator.Checked,
-            )
-            checked = []
-            while iterator.value():
-                item = iterator.value()
-                # Recusively find the parent of the item
-                name = item.text(0)
-                parent = item.parent()
-                while parent is not None:
-                    name = parent.text(0) + "." + name
-                    parent = parent.parent()
-                checked.append(name)
-                iterator += 1
-
-            # Set state and emit signal
-            for key in self.listItem.keys():
-                self.listItem[key]["state"] = key in checked
-            self.changeItem.emit({key: {"state": value["state"]} for key, value in self.listItem.items()})
-
             if self.has_subgroups:
                 self.update_selected_subtree()
 
@@ -314,14 +318,13 @@ class PlotWindow(QWidget):
                 checked.append(name)
                 iterator += 1
 
-            # Set state and emit signal
-            for key in self.listItem.keys():
-                self.listItem[key]["state"] = key in checked
-            self.changeItem.emit({key: {"state": value["state"]} for key, value in self.listItem.items()})
-
-            self.update_selected_tree()
+            self.selection.setSelection(key for key in checked if key in self.search_index)
 
     class SignalContainer(PlotWidget):
+        mathResult = pyqtSignal(int, object)  # (generation, (operations, signals)) sent by the math worker thread
+        mathEvaluated = pyqtSignal(bool)  # Whether the math operations were successfully evaluated
+        curvesChanged = pyqtSignal()  # The displayed curves or their data changed
+
         class AxeReference:
             def __init__(self, view: ViewBox, axis: AxisItem, line: InfiniteLine, units: str = None) -> None:
                 self.view = view
@@ -329,27 +332,184 @@ class PlotWindow(QWidget):
                 self.line = line
                 self.units = units
 
+        class CurveReference:
+            def __init__(self, item: PyramidDataItem, color: int, units: str = None) -> None:
+                self.item = item
+                self.color = color
+                self.units = units
+                self.view: ViewBox | None = None  # ViewBox the curve is currently attached to
+                self.x_component: str | None = None  # X-axis component used to build the curve data
+                self.batched = False  # Whether the curve is drawn by the batch of its view instead of its own item
+                self.axis_units: str | None = None  # Units of the separate axis referenced by the curve
+
+        class BatchReference:
+            def __init__(self, item: BatchedCurveItem, view: ViewBox) -> None:
+                self.item = item
+                self.view = view
+                self.keys: list[str] = []
+                self.pyramids: list[MinMaxPyramid] = []
+
+        class AxisManager:
+            """Pool of the Y axes of the units displayed with separate axes, reference-counted by the displayed curves.
+
+            The first displayed units take the main (left) axis, the other ones a right axis with its own ViewBox. The
+            axes of the units which are not displayed anymore are hidden, and shown again when signals with the same
+            units are displayed, instead of being destroyed and created again.
+            """
+
+            def __init__(self, plotItem) -> None:
+                self.plotItem = plotItem
+                self.main = PlotWindow.SignalContainer.AxeReference(
+                    view=plotItem.getViewBox(), axis=plotItem.getAxis("left"), line=None
+                )
+                self.pool: dict[str, PlotWindow.SignalContainer.AxeReference] = {}  # Right axes, shown or hidden
+                self.references: dict[str, int] = {}  # Number of displayed curves of each units, in display order
+
+            @property
+            def axes(self) -> dict[str, PlotWindow.SignalContainer.AxeReference]:
+                """Displayed axes by units, the main axis included"""
+                return {units: self.main if units == self.main.units else self.pool[units] for units in self.references}
+
+            def view(self, units: str) -> ViewBox:
+                return self.main.view if units == self.main.units else self.pool[units].view
+
+            @profiled("axes.acquire")
+            def acquire(self, units: str) -> ViewBox:
+                """Reference the axis of units for a displayed curve, showing it if needed, and return its view"""
+                references = self.references.get(units, 0)
+                self.references[units] = references + 1
+                if references == 0:
+                    if self.main.units is None:
+                        self.setMainUnits(units)
+                    else:
+                        self.showAxis(units)
+                return self.view(units)
+
+            @profiled("axes.release")
+            def release(self, units: str) -> None:
+                """Remove a reference to the axis of units, which is hidden when no displayed curve uses it anymore"""
+                self.references[units] -= 1
+                if self.references[units] > 0:
+                    return
+                del self.references[units]
+                if units == self.main.units:
+                    self.setMainUnits(None)
+                else:
+                    self.hideAxis(units)
+
+            def promote(self) -> str | None:
+                """Give the main axis to the first units displayed on a right axis if the main axis is not used.
+
+                Returns:
+                    The promoted units, whose curves must be moved to the main view, or None.
+                """
+                if self.main.units is not None or not self.references:
+                    return None
+                units = next(iter(self.references))
+                self.hideAxis(units)
+                self.setMainUnits(units)
+                return units
+
+            def setMainUnits(self, units: str | None) -> None:
+                self.main.units = units
+                self.plotItem.setLabel("left", units, units=units)
+
+            def showAxis(self, units: str) -> None:
+                axis = self.pool.get(units)
+                if axis is None:
+                    logger.debug(f"Creating new axis for units {units}")
+                    axis = self.pool[units] = PlotWindow.SignalContainer.AxeReference(
+                        view=ViewBox(),
+                        axis=AxisItem('right'),
+                        line=InfiniteLine(pos=0, angle=0),
+                        units=units,
+                    )
+                    self.plotItem.layout.addItem(axis.axis, 2, self.plotItem.layout.columnCount())
+                    self.plotItem.scene().addItem(axis.view)
+                    axis.axis.linkToView(axis.view)
+                    color = intColor(sorted(set(self.pool) | set(self.references)).index(units))
+                    axis.axis.setLabel(units, units=units, color=color)
+                    axis.view.addItem(axis.line)
+                    count("axes.created")
+                else:
+                    axis.axis.show()
+                    axis.view.show()
+                axis.view.setXLink(self.plotItem)
+                self.updateGeometry([axis])
+
+            def hideAxis(self, units: str) -> None:
+                axis = self.pool[units]
+                # A hidden view does not follow the X range of the plot anymore
+                axis.view.setXLink(None)
+                axis.view.hide()
+                axis.axis.hide()
+
+            def updateGeometry(self, axes: list | None = None) -> None:
+                """Match the geometry and the X range of the displayed right views (all by default) to the main view"""
+                main_view = self.main.view
+                for axis in axes if axes is not None else self.axes.values():
+                    if axis.view is not main_view:
+                        axis.view.setGeometry(main_view.sceneBoundingRect())
+                        ## need to re-update linked axes since this was called
+                        ## incorrectly while views had different shapes.
+                        ## (probably this should be handled in ViewBox.resizeEvent)
+                        axis.view.linkedViewChanged(main_view, axis.view.XAxis)
+
         def __init__(self, items: dict = None, x_component: str | None = "x", **kwargs) -> None:
             super().__init__()
 
-            # Items dictionary of signals to be displayed
-            self.items = RecursiveDict(items)
+            # Namespace of the signals to be displayed (shared with the window)
+            self.items = items if isinstance(items, SignalNamespace) else SignalNamespace(items)
             self.sub_goups = kwargs.get("sub_groups", None)
 
             # X-axis component
             self.x_component: str = x_component if x_component is not None else "x"
-            self.x_options: list[str] = ["x"] + (list(self.items.keys()) if self.items is not None else [])
+            self.x_options: list[str] = ["x"] + list(self.items)
 
-            # Signal state
-            self.sigstate = []
+            # Selected signals, in selection order
+            self.selected: dict[str, None] = {}
 
-            # Axes dictionary
-            self.axes = {}
+            # Y axes of the units, created by initUI
+            self.axisManager: PlotWindow.SignalContainer.AxisManager | None = None
             self.linkAxis = True
 
+            # Curves currently displayed, by signal name
+            self.curves: dict[str, PlotWindow.SignalContainer.CurveReference] = {}
+            # At least `batch_size` time-based curves sharing a view and a timebase are drawn by a single item (0, the
+            # default, to disable), by (view, x vector)
+            self.batch_size: int = kwargs.get("batch_size", 0)
+            self.batches: dict[tuple, PlotWindow.SignalContainer.BatchReference] = {}
+
+            # Level-of-detail pyramids, built once per signal the first time it is plotted (they can be shared by the
+            # widgets plotting the same signals)
+            self.downsampling: bool = kwargs.get("downsampling", True)
+            self.pyramids: dict[str, MinMaxPyramid | None] = kwargs.get("pyramids", {})
+            # Trajectories of the signals against the X-axis component (resampled on its time), per pair of signals
+            self.xy_cache: XYCache = kwargs.get("xy_cache", None) or XYCache()
+            # Range statistics of the signals, built once per signal the first time they are requested
+            self.statistics: dict[str, RangeStatistics | None] = {}
+
+            # Arrays of the lazy signals, loaded when first plotted and unloaded (if not displayed) above the budget
+            self.signal_cache = SignalCache(
+                kwargs.get("memory_budget", None),
+                pinned=lambda key: key in self.curves or key == self.x_component,
+                on_evict=self.forgetSignalData,
+                timebases=kwargs.get("timebases", None),
+            )
+
             # Math computed signal
             self.math_operations = []
             self.math_signal = []
+            self.math_version = 0  # Incremented each time the math signals are evaluated
+            self.math_curves = []
+            self.math_state = None  # (math version, x source) used to build the math curves
+            self.math_engine = MathEngine(self.isSignal)
+            # Math operations are evaluated in a worker thread to keep the GUI responsive. Each request increments the
+            # generation: older evaluations are cancelled and their results are discarded
+            self.math_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="math")
+            self.math_generation = 0
+            self.math_future: Future | None = None
+            self.mathResult.connect(self.setMathResult)
 
             # Set up the UI
             self.initUI(**kwargs)
@@ -358,6 +518,7 @@ class PlotWindow(QWidget):
             # region Plot Widget
             self.plotItem = self.getPlotItem()
             self.plotScene = self.scene()
+            self.axisManager = self.AxisManager(self.plotItem)
 
             self.plotItem.vb.sigResized.connect(self.updateViews)
 
@@ -376,7 +537,7 @@ class PlotWindow(QWidget):
             self.setDownsampling(
                 ds=kwargs.get("downsampling", True),
                 auto=True,
-                mode="subsample",
+                mode="peak",
             )
             self.legend = self.addLegend()  # add grid
             # endregion Plot Widget
@@ -386,6 +547,11 @@ class PlotWindow(QWidget):
 
             self.updatingViews = False  # Add a flag to track if updateViews is currently running
 
+        @property
+        def axes(self) -> dict[str, AxeReference]:
+            """Displayed Y axes by units"""
+            return self.axisManager.axes
+
         @property
         def separateAxes(self) -> bool:
             return not self.linkAxis
@@ -394,13 +560,13 @@ class PlotWindow(QWidget):
             self.linkAxis = state
 
             # update graph (with the same signals)
-            self.setSignal(self.sigstate)
+            self.setSignal()
 
         def setXAxis(self, index: int) -> None:
             self.x_component = self.x_options[index]
 
             # update graph (with the same signals)
-            self.setSignal(self.sigstate)
+            self.setSignal()
 
         def updateViews(self) -> None:
             if self.updatingViews:  # Check if updateViews is already running
@@ -410,111 +576,326 @@ class PlotWindow(QWidget):
 
             try:
                 ## Handle view resizing
-                ## view has resized; update auxiliary views to match
-                for axis in self.axes.values():
-                    axis.view.setGeometry(self.plotItem.vb.sceneBoundingRect())
-                    ## need to re-update linked axes since this was called
-                    ## incorrectly while views had different shapes.
-                    ## (probably this should be handled in ViewBox.resizeEvent)
-                    axis.view.linkedViewChanged(self.plotItem.vb, axis.view.XAxis)
+                ## view has resized; update auxiliary views to match (the hidden ones are updated when shown again)
+                self.axisManager.updateGeometry()
             finally:
                 self.updatingViews = False  # Reset the flag when done
 
-        def createAxis(self, units: str) -> None:
-            # if the main axis does not have any units, give it priority over the others
-            if not any(axis.view is self.plotItem.getViewBox() for axis in self.axes.values()):
-                self.plotItem.setLabel("left", units, units=units)
-                if units in self.axes:
-                    # Remove previous reference to this axis
-                    self.plotItem.layout.removeItem(self.axes[units].axis)
-                    self.plotScene.removeItem(self.axes[units].view)
-                    self.axes[units].view.deleteLater()
-                    self.axes[units].axis.deleteLater()
-                # Set the main axis to the this units
-                self.axes[units] = self.AxeReference(
-                    view=self.plotItem.getViewBox(),
-                    axis=self.plotItem.getAxis("left"),
-                    line=None,
-                    units=units,
-                )
-
-            # If self.axes is empty, create the first axis
-            if not self.axes:
-                self.plotItem.setLabel("left", units, units=units)
-                self.axes[units] = self.AxeReference(
-                    view=self.plotItem.getViewBox(),
-                    axis=self.plotItem.getAxis("left"),
-                    line=None,
-                    units=units,
+        @profiled("axes.cleanAxes")
+        def cleanAxes(self) -> None:
+            """Give the main axis to the units of a right axis when the units of the main axis are not displayed anymore"""
+            units = self.axisManager.promote()
+            if units is not None:
+                for key, curve in self.curves.items():
+                    if curve.axis_units == units:
+                        self.moveCurve(key, curve, self.plotItem.getViewBox())
+
+        def curveLabel(self, key: str, data: dict) -> str:
+            # Units are appended to the legend when they are not displayed by the main axis
+            if self.x_component != "x" or (self.separateAxes and data.get("units", None) is not None):
+                return f"{key}" + (f" ({data['units']})" if "units" in data else "")
+            return key
+
+        def addItems(self, items: dict) -> None:
+            """Add new signals which can then be selected"""
+            for key, value in items.items():
+                self.items[key] = value
+                self.x_options.append(key)
+            self.math_engine.invalidate()
+
+        def isSignal(self, key: str) -> bool:
+            """Whether a key is the one of a signal (and not of a group of signals)"""
+            value = self.items.get(key)
+            return isinstance(value, dict) and ("y" in value or "loader" in value)
+
+        def loadSignal(self, key: str) -> dict:
+            """Return the dict of a signal, loading its arrays if it is a lazy signal"""
+            return self.signal_cache.load(key, self.items[key])
+
+        def forgetSignalData(self, key: str) -> None:
+            """Forget the data computed from the arrays of a signal (unloaded or updated)"""
+            self.pyramids.pop(key, None)
+            self.statistics.pop(key, None)
+            self.xy_cache.invalidate([key])
+
+        def curveData(self, key: str, data: dict) -> tuple | None:
+            """Return the (x, y) arrays of a signal for the current X-axis component, or None if it can't be plotted"""
+            data = self.loadSignal(key)
+            if self.x_component == "x":
+                if data.get("x") is None:
+                    return None
+                # The arrays were normalized when the signal was added (the updated ones may not be)
+                return np.ravel(data["x"]), np.ravel(data["y"])
+
+            trajectory = self.curveTrajectory(key)
+            return (trajectory.x, trajectory.y) if trajectory is not None else None
+
+        def curveTrajectory(self, key: str) -> XYTrajectory | None:
+            """Return the trajectory of a signal against the X-axis component, or None if it can't be plotted"""
+            data = self.loadSignal(key)
+            x_data = self.loadSignal(self.x_component)
+            try:
+                # Signals sampled at other times than the X-axis component are resampled on its time
+                return self.xy_cache.get(self.x_component, x_data, key, data)
+            except (ValueError, TypeError) as e:
+                logger.error(f"Signal {key} can't be plotted against {self.x_component}: {e}")
+                return None
+
+        @profiled("plot.createCurve")
+        def createCurve(self, key: str, data: dict, color: int) -> CurveReference:
+            color_alpha = intColor(color, alpha=int(255 * data.get("alpha", 1.0)))
+            if not data.get("scatter", False):
+                item = PyramidDataItem(pen=mkPen(color_alpha))
+            else:
+                item = PyramidDataItem(
+                    pen=None,
+                    symbol='+',
+                    symbolSize=5,
+                    symbolBrush=mkBrush(color_alpha),
+                    symbolPen=mkPen(color_alpha),
                 )
+            count("plot.curves")
+            return self.CurveReference(item=item, color=color, units=data.get("units", None))
+
+        def curvePyramid(self, key: str, x_data: np.ndarray, y_data: np.ndarray) -> MinMaxPyramid | None:
+            """Return the level-of-detail pyramid of a time-based signal, or None if it can't be downsampled with it"""
+            if not self.downsampling or not self.items[key].get("pyramid", True) or len(x_data) == 0:
+                return None
+            pyramid = self.pyramids.get(key, None)
+            if pyramid is not None and len(pyramid) < len(y_data) and x_data[0] == pyramid.x[0]:
+                # The signal grew (see updateSignals), only the appended samples are added to the pyramid
+                try:
+                    pyramid.extend(x_data, y_data)
+                except ValueError:
+                    del self.pyramids[key]
+            if key not in self.pyramids or (pyramid is not None and len(pyramid) != len(y_data)):
+                try:
+                    pyramid = MinMaxPyramid(x_data, y_data)
+                except (ValueError, TypeError) as e:
+                    logger.debug(f"Signal {key} can't be downsampled with a pyramid: {e}")
+                    pyramid = None
+                self.pyramids[key] = pyramid
+            return pyramid
+
+        def curveStatistics(self, key: str) -> RangeStatistics | None:
+            """Return the range statistics of a displayed signal, or None if they can't be computed"""
+            data = self.loadSignal(key)
+            if data.get("x") is None:
+                return None
+            x_data, y_data = np.ravel(data["x"]), np.ravel(data["y"])
+            statistics = self.statistics.get(key, None)
+            if statistics is not None and len(statistics) < len(y_data) and x_data[0] == statistics.x[0]:
+                # The signal grew (see updateSignals), only the appended samples are reduced
+                try:
+                    statistics.extend(x_data, y_data)
+                except ValueError:
+                    del self.statistics[key]
+            if key not in self.statistics or (statistics is not None and len(statistics) != len(y_data)):
+                try:
+                    statistics = RangeStatistics(x_data, y_data)
+                except (ValueError, TypeError) as e:
+                    logger.debug(f"Statistics of signal {key} can't be computed: {e}")
+                    statistics = None
+                self.statistics[key] = statistics
+            return statistics
+
+        def rangeStatistics(self) -> dict[str, dict | None]:
+            """Statistics of the displayed signals over the visible time range (their whole data in XY mode)"""
+            x_range = self.plotItem.getViewBox().viewRange()[0] if self.x_component == "x" else (None, None)
+            results = {}
+            for key in self.curves:
+                statistics = self.curveStatistics(key)
+                results[key] = statistics.query(*x_range) if statistics is not None else None
+            return results
+
+        def attachCurve(self, curve: CurveReference, view: ViewBox, label: str) -> None:
+            # Clipping is disabled while the item is added to the scene, as it is not yet inside a ViewBox
+            curve.item.setClipToView(False)
+            if view is self.plotItem.getViewBox():
+                self.plotItem.addItem(curve.item)
+            else:
+                # Auxiliary views are not managed by the PlotItem, forward its clipping and downsampling settings
+                view.addItem(curve.item)
+                curve.item.setDownsampling(*self.plotItem.downsampleMode())
+                curve.item.setClipToView(self.plotItem.clipToViewMode())
+            curve.view = view
+            self.legend.addItem(curve.item, label)
+
+        def detachCurve(self, curve: CurveReference) -> None:
+            if curve.view is None:
+                return
+            if curve.batched:
+                # Its batch is updated by updateBatches
+                curve.batched = False
+            else:
+                self.removeFromView(curve.item, curve.view)
+                self.legend.removeItem(curve.item)
+            curve.view = None
+
+        def moveCurve(self, key: str, curve: CurveReference, view: ViewBox) -> None:
+            """Move a curve to a view. The curves which can be batched are only attached by updateBatches, to their own
+            item if there are not enough curves to batch."""
+            self.detachCurve(curve)
+            if self.isBatchable(curve):
+                curve.view, curve.batched = view, True
+            else:
+                self.attachCurve(curve, view, self.curveLabel(key, self.items[key]))
 
-            # Check if this units is already in the plot
-            elif units not in self.axes:
-                logger.debug(f"Creating new axis for units {units}")
-                # Create a new axis for this units
-                self.axes[units] = self.AxeReference(
-                    view=ViewBox(),
-                    axis=AxisItem('right'),
-                    line=InfiniteLine(pos=0, angle=0),
-                    units=units,
-                )
-                row = self.plotItem.layout.rowCount()
-                col = self.plotItem.layout.columnCount()
-                logger.debug(f"row {row} col {col}")
-                self.plotItem.layout.addItem(self.axes[units].axis, 2, col)
-                self.plotScene.addItem(self.axes[units].view)
-                self.axes[units].axis.linkToView(self.axes[units].view)
-                self.axes[units].view.setXLink(self.plotItem)
-                self.axes[units].axis.setLabel(units, units=units, color=intColor(sorted(list(self.axes.keys())).index(units)))
-                self.axes[units].view.addItem(self.axes[units].line)
-
-            # Update wether the axis is linked or not (Do not link separate axes)
-            self.axes[units].view.setYLink(self.plotItem if not self.separateAxes else None)
+        def addToView(self, item, view: ViewBox) -> None:
+            if view is self.plotItem.getViewBox():
+                self.plotItem.addItem(item)
+            else:
+                view.addItem(item)
 
-        def cleanAxes(self) -> None:
-            # Remove unused axis
-            for units in list(self.axes.keys()):
-                if (
-                    (
-                        units
-                        not in [
-                            data["units"]
-                            for data in self.items.values()
-                            if "units" in data and data["units"] is not None and data["state"]
-                        ]
-                    )
-                    or self.x_component != "x"
-                    or not self.separateAxes
-                ):
-                    logger.debug(f"Removing axis for units {units}")
-                    if self.axes[units].view is not self.plotItem.getViewBox():
-                        self.plotItem.layout.removeItem(self.axes[units].axis)
-                        self.plotScene.removeItem(self.axes[units].view)
-                        self.axes[units].view.deleteLater()
-                        self.axes[units].axis.deleteLater()
-                    del self.axes[units]
-
-        @pyqtSlot(list)
-        def setSignal(self, states) -> None:
-            self.sigstate = states
-
-            # update graph
-            self.clear()
-            for units, axis_item in self.axes.items():
-                axis_item.view.clear()
-                # Re-add the line which was removed by clear()
-                if axis_item.line is not None:
-                    axis_item.view.addItem(axis_item.line)
-
-            # Reset the y-axis label if axes are linked
-            if not self.separateAxes:
-                self.plotItem.setLabel("left", label=None, units=None)
+        def removeFromView(self, item, view: ViewBox) -> None:
+            if view is self.plotItem.getViewBox():
+                self.plotItem.removeItem(item)
+            else:
+                view.removeItem(item)
+
+        def isBatchable(self, curve: CurveReference) -> bool:
+            """Whether a curve can be drawn by a batch: time-based lines drawn from a pyramid"""
+            return bool(self.batch_size) and curve.item.pyramid is not None and curve.item.opts.get("symbol") is None
+
+        @profiled("plot.updateBatches")
+        def updateBatches(self) -> None:
+            """Draw the time-based curves sharing a view and a timebase with a single item (see BatchedCurveItem) when
+            there are at least `batch_size` of them, and the other curves with their own item"""
+            groups: dict[tuple, list[str]] = {}
+            for key, curve in self.curves.items():
+                if curve.view is not None and self.isBatchable(curve):
+                    x = curve.item.pyramid.x
+                    group = (id(curve.view), x.__array_interface__["data"][0], x.size, x.dtype.str)
+                    groups.setdefault(group, []).append(key)
+            groups = {group: keys for group, keys in groups.items() if len(keys) >= self.batch_size}
+            batched = {key for keys in groups.values() for key in keys}
+
+            for key, curve in self.curves.items():
+                if curve.batched and key not in batched:
+                    # Not enough curves in its group, drawn by its own item
+                    view, curve.view, curve.batched = curve.view, None, False
+                    self.attachCurve(curve, view, self.curveLabel(key, self.items[key]))
+                elif not curve.batched and key in batched:
+                    view = curve.view
+                    self.detachCurve(curve)
+                    curve.view, curve.batched = view, True
+
+            for group in [group for group in self.batches if group not in groups]:
+                self.removeBatch(group)
+            for group, keys in groups.items():
+                batch = self.batches.get(group)
+                if batch is None:
+                    batch = self.batches[group] = self.BatchReference(BatchedCurveItem(), self.curves[keys[0]].view)
+                    self.addToView(batch.item, batch.view)
+                pyramids = [self.curves[key].item.pyramid for key in keys]
+                if keys != batch.keys or any(a is not b for a, b in zip(pyramids, batch.pyramids)):
+                    batch.item.setRows(pyramids, [self.curves[key].item.opts["pen"] for key in keys])
+                    if keys != batch.keys:
+                        # The legend has a single entry per batch
+                        units = {self.curves[key].units for key in keys}
+                        label = f"{len(keys)} signals" + (f" ({units.pop()})" if len(units) == 1 and None not in units else "")
+                        self.legend.removeItem(batch.item)
+                        self.legend.addItem(batch.item, label)
+                    batch.keys, batch.pyramids = keys, pyramids
+                count("plot.batches")
+
+        def removeBatch(self, group: tuple) -> None:
+            batch = self.batches.pop(group)
+            self.removeFromView(batch.item, batch.view)
+            self.legend.removeItem(batch.item)
+
+        def placeCurve(self, key: str, curve: CurveReference) -> bool:
+            """Attach a curve to the view matching its units, updating its data if the X-axis component changed"""
+            data = self.items[key]
+
+            if curve.x_component != self.x_component:
+                if self.x_component == "x":
+                    xy_data = self.curveData(key, data)
+                    if xy_data is None:
+                        return False
+                    pyramid = self.curvePyramid(key, *xy_data)
+                    if pyramid is not None:
+                        curve.item.setPyramid(pyramid)
+                    else:
+                        curve.item.setData(*xy_data)
+                else:
+                    # XY mode: the trajectory is decimated on the pixels of the view
+                    trajectory = self.curveTrajectory(key)
+                    if trajectory is None:
+                        return False
+                    if self.downsampling:
+                        curve.item.setTrajectory(trajectory)
+                    else:
+                        curve.item.setData(trajectory.x, trajectory.y)
+                curve.x_component = self.x_component
+                # The legend label depends on the X-axis component
+                self.detachCurve(curve)
+
+            # If units is provided, use it to display the signal according to the respective axis
+            units = curve.units if self.separateAxes and self.x_component == "x" else None
+            if units != curve.axis_units:
+                if curve.axis_units is not None:
+                    self.axisManager.release(curve.axis_units)
+                curve.axis_units = units
+                if units is not None:
+                    self.axisManager.acquire(units)
+            view = self.axisManager.view(units) if units is not None else self.plotItem.getViewBox()
+
+            if curve.view is not view:
+                self.moveCurve(key, curve, view)
+            return True
+
+        def removeCurve(self, key: str) -> None:
+            curve = self.curves.pop(key)
+            self.detachCurve(curve)
+            if curve.axis_units is not None:
+                self.axisManager.release(curve.axis_units)
+
+        @profiled("plot.updateSignals")
+        def updateSignals(self, keys) -> None:
+            """Refresh the curves of signals whose data changed (only appending new samples is supported)"""
+            keys = list(keys)
+            self.xy_cache.invalidate(keys)
+            if self.x_component in keys:
+                # The trajectories of all the curves depend on the X-axis component
+                keys += [key for key in self.curves if key not in keys]
+            for key in keys:
+                if key not in self.curves:
+                    continue
+                try:
+                    # Force the data of the curve to be updated
+                    self.curves[key].x_component = None
+                    if not self.placeCurve(key, self.curves[key]):
+                        self.removeCurve(key)
+                except Exception as e:
+                    logger.error(f"Error updating signal {key}: {e}", exc_info=True)
+            self.updateBatches()
+            self.curvesChanged.emit()
+
+        @pyqtSlot(list, list)
+        @profiled("plot.updateSelection")
+        def updateSelection(self, added: list[str], removed: list[str]) -> None:
+            """Plot the signals added to the selection and remove the ones removed from it"""
+            for key in removed:
+                self.selected.pop(key, None)
+            for key in added:
+                if self.isSignal(key):
+                    self.selected[key] = None
+            self.setSignal()
+
+        @profiled("plot.setSignal")
+        def setSignal(self, states: dict | None = None) -> None:
+            """Plot the selected signals, `states` ({key: {"state": bool}}) replaces the selection if given"""
+            if states is not None:
+                self.selected = {key: None for key, value in states.items() if value["state"] and self.isSignal(key)}
+            selected = list(self.selected)
+
+            # Remove the curves of the signals which are not selected anymore
+            for key in [key for key in self.curves if key not in self.selected]:
+                self.removeCurve(key)
 
             self.cleanAxes()
 
-            # clear legend
-            self.legend.clear()
-
             # if X-axis is not default, change the label and units
             if self.x_component != "x":
                 self.plotItem.setLabel(
@@ -526,120 +907,193 @@ class PlotWindow(QWidget):
                 # Reset to default (Assume all signals are time-based)
                 self.plotItem.setLabel("bottom", "time", units="s")
 
-            # self.plot(self.time, self.data,name = "signal",pen=self.pen,symbol='+', symbolSize=5, symbolBrush='w')
-            data_to_plot = [(key, data) for key, data in self.items.items() if (data["state"] and "x" in data and "y" in data)]
-            for j, (key, data) in enumerate(data_to_plot):
-                # If units is provided, use it to display the signal according to the respective axis
+            # Place the existing curves (only moved if the axes changed) and create the new ones
+            for key in selected:
                 try:
-                    if self.x_component == "x":
-                        # Convert the data to 1D NumPy arrays
-                        x_data = np.array(data["x"]).flatten()
-                        y_data = np.array(data["y"]).flatten()
-                        # print(f"Plotting signal {key} with {data}")
-
-                        if self.separateAxes and "units" in data and data["units"] is not None:
-                            self.createAxis(data["units"])
-                            units = data["units"]
-                            if not data.get("scatter", False):
-                                plot = PlotCurveItem(
-                                    x_data, y_data, name=key, pen=mkPen(intColor(j, alpha=int(255 * data.get("alpha", 1.0))))
-                                )
-                            else:
-                                plot = PlotCurveItem(
-                                    x_data,
-                                    y_data,
-                                    name=key,
-                                    pen=None,
-                                    symbol='+',
-                                    symbolSize=5,
-                                    symbolBrush=mkBrush(intColor(j, alpha=int(255 * data.get("alpha", 1.0)))),
-                                    symbolPen=mkPen(intColor(j, alpha=int(255 * data.get("alpha", 1.0)))),
-                                )
-                            self.axes[units].view.addItem(plot)
-                            self.legend.addItem(plot, f"{key}" + (f" ({data['units']})" if "units" in data else ""))
-                        else:
-                            if not data.get("scatter", False):
-                                if isinstance(x_data, RecursiveDict):
-                                    # TODO: investigate why a RecusiveDict is being passed sometimes
-                                    continue
-                                self.plotItem.plot(
-                                    x_data, y_data, name=key, pen=mkPen(intColor(j, alpha=int(255 * data.get("alpha", 1.0))))
-                                )
-                            else:
-                                self.plotItem.plot(
-                                    x_data,
-                                    y_data,
-                                    name=key,
-                                    pen=None,
-                                    symbol='+',
-                                    symbolSize=5,
-                                    symbolBrush=mkBrush(intColor(j, alpha=int(255 * data.get("alpha", 1.0)))),
-                                    symbolPen=mkPen(intColor(j, alpha=int(255 * data.get("alpha", 1.0)))),
-                                )
-
-                    else:
-                        # if the signals don't have the same length, the plot will fail
-                        if len(self.items[self.x_component]["y"]) != len(data["y"]):
-                            logger.error(
-                                f"Signal {key} has different length for x and y components: "
-                                + f"{len(self.items[self.x_component]['y'])} != {len(data['y'])}"
-                            )
-                            continue
-                        if not data.get("scatter", False):
-                            self.plotItem.plot(
-                                self.items[self.x_component]["y"],
-                                data["y"],
-                                name=f"{key}" + (f" ({data['units']})" if "units" in data else ""),
-                                pen=mkPen(intColor(j, alpha=int(255 * data.get("alpha", 1.0)))),
-                            )
-                        else:
-                            self.plotItem.plot(
-                                self.items[self.x_component]["y"],
-                                data["y"],
-                                name=f"{key}" + (f" ({data['units']})" if "units" in data else ""),
-                                pen=None,
-                                symbol='+',
-                                symbolSize=5,
-                                symbolBrush=mkBrush(intColor(j, alpha=int(255 * data.get("alpha", 1.0)))),
-                                symbolPen=mkPen(intColor(j, alpha=int(255 * data.get("alpha", 1.0)))),
-                            )
+                    if key not in self.curves:
+                        # Use the first color which is not used by the displayed curves
+                        used_colors = {curve.color for curve in self.curves.values()}
+                        color = next(j for j in range(len(used_colors) + 1) if j not in used_colors)
+                        self.curves[key] = self.createCurve(key, self.items[key], color)
+                    if not self.placeCurve(key, self.curves[key]):
+                        self.removeCurve(key)
                 except Exception as e:
                     logger.error(f"Error plotting signal {key}: {e}", exc_info=True)
+                    if key in self.curves:
+                        self.removeCurve(key)
+
+            self.updateBatches()
+
             # Update the views
             self.updateViews()
 
+            # Unload the arrays of deselected lazy signals if the memory budget is exceeded
+            self.signal_cache.evict()
+
+            self.updateMathCurves()
+            self.curvesChanged.emit()
+
+        @profiled("math.plot")
+        def updateMathCurves(self) -> None:
+            # The math signals are plotted against the time of the last displayed signal
+            x_source = next(reversed(self.curves), None) if self.x_component == "x" else None
+            math_state = (self.math_version, x_source)
+            if math_state == self.math_state:
+                return
+            self.math_state = math_state
+
+            for item in self.math_curves:
+                self.plotItem.removeItem(item)
+            self.math_curves = []
+
             # If there is a math signal, plot it
-            if self.math_operations and self.x_component == "x":
-                for j, (eval_name, eval_data) in enumerate(zip(self.math_operations, self.math_signal), start=j + 1):
-                    try:
-                        logger.info(f"Plotting eval signal {eval_name}")
+            if not self.math_operations or x_source is None:
+                return
+            used_colors = {curve.color for curve in self.curves.values()}
+            colors = (j for j in range(len(used_colors) + len(self.math_operations) + 1) if j not in used_colors)
+            for color, eval_name, eval_data in zip(colors, self.math_operations, self.math_signal):
+                try:
+                    logger.info(f"Plotting eval signal {eval_name}")
+                    self.math_curves.append(
                         self.plotItem.plot(
-                            data["x"],
+                            self.items[x_source]["x"],
                             eval_data,
                             name=f"y = eval({eval_name})",
-                            pen=intColor(j + 1),
+                            pen=intColor(color),
                         )
-                    except Exception as e:
-                        logger.error(f"Error plotting eval signal {key}: {e}", exc_info=True)
+                    )
+                except Exception as e:
+                    logger.error(f"Error plotting eval signal {eval_name}: {e}", exc_info=True)
 
+        @profiled("math.eval_math_operation")
         def eval_math_operation(self, text: str) -> None:
-            self.math_signal = []
-            self.math_operations = []
+            """Evaluate the math operations of the text in the worker thread, cancelling the previous evaluation"""
+            self.math_generation += 1
+            tasks = []
             operations = text.split("||")
             for ope in operations:
                 try:
-                    globals_dict = RecursiveDict({key: value['y'] for key, value in self.items.items()})
-                    math_evaluation = eval(ope, None, globals_dict)
-                    if len(math_evaluation):
-                        self.math_signal.append(math_evaluation)
-                        self.math_operations.append(ope)
+                    # Only the signals referenced by the operation are bound, lazy signals are loaded on demand
+                    expression = self.math_engine.compile(ope)
+                    tasks.append((ope, expression, [self.loadSignal(key)["y"] for key in expression.signals]))
+                except Exception as e:
+                    logger.error(f"Error evaluating math operation: {e}", exc_info=True)
+                    tasks = []
+            self.math_future = self.math_executor.submit(self.evaluateMathOperations, self.math_generation, tasks)
+
+        def cancelMathEvaluation(self) -> None:
+            self.math_generation += 1
 
+        @profiled("math.evaluate")
+        def evaluateMathOperations(self, generation: int, tasks: list) -> None:
+            """Run in the worker thread, the results are sent to the GUI thread with the mathResult signal"""
+
+            def cancelled() -> bool:
+                return generation != self.math_generation
+
+            math_signal = []
+            math_operations = []
+            for ope, expression, inputs in tasks:
+                try:
+                    math_evaluation = self.math_engine.evaluate(expression, inputs, cancelled)
+                    count("math.evaluations")
+                    if len(math_evaluation):
+                        math_signal.append(math_evaluation)
+                        math_operations.append(ope)
+                except EvaluationCancelled:
+                    return
                 except Exception as e:
                     logger.error(f"Error evaluating math operation: {e}", exc_info=True)
-                    self.math_signal = []
-                    self.math_operations = []
-            self.setSignal(self.sigstate)  # Replot the signals using the saved signals state
-            return self.math_operations != []
+                    math_signal = []
+                    math_operations = []
+            if not cancelled():
+                self.mathResult.emit(generation, (math_operations, math_signal))
+
+        @pyqtSlot(int, object)
+        def setMathResult(self, generation: int, result: tuple) -> None:
+            if generation != self.math_generation:
+                return  # A newer evaluation has been requested meanwhile
+            math_operations, math_signal = result
+
+            # Only replot the math signals if their values changed (the results are memoized by the engine)
+            if math_operations != self.math_operations or any(
+                a is not b for a, b in zip(math_signal, self.math_signal)
+            ):
+                self.math_version += 1
+            self.math_signal = math_signal
+            self.math_operations = math_operations
+            self.updateMathCurves()
+            self.mathEvaluated.emit(self.math_operations != [])
+
+    class ProfilerOverlay(QLabel):
+        """Debug overlay showing the timers and counters of the profiler over the plot (enables the profiler)"""
+
+        def __init__(self, parent=None, interval: int = 500) -> None:
+            super().__init__(parent)
+            self.setAttribute(Qt.WA_TransparentForMouseEvents)
+            self.setStyleSheet(
+                "background: rgba(0, 0, 0, 180); color: rgb(200, 255, 200); font-family: monospace; padding: 4px;"
+            )
+            self.refreshTimer = QTimer(self)
+            self.refreshTimer.setInterval(interval)
+            self.refreshTimer.timeout.connect(self.refresh)
+            self.hide()
+
+        def refresh(self) -> None:
+            self.setText(PROFILER.report())
+            self.adjustSize()
+            self.move(8, 8)
+
+        def showEvent(self, event) -> None:
+            PROFILER.enable()
+            self.refresh()
+            self.refreshTimer.start()
+            super().showEvent(event)
+
+        def hideEvent(self, event) -> None:
+            self.refreshTimer.stop()
+            super().hideEvent(event)
+
+    class StatisticsPanel(QTableWidget):
+        """Table of the min, max, mean, RMS and peak-to-peak of the displayed signals over the visible time range"""
+
+        COLUMNS = [("Signal", None), ("Min", "min"), ("Max", "max"), ("Mean", "mean"), ("RMS", "rms"), ("Peak-to-peak", "ptp")]
+
+        def __init__(self, signalWidget: PlotWindow.SignalContainer, parent=None) -> None:
+            super().__init__(0, len(self.COLUMNS), parent)
+            self.signalWidget = signalWidget
+            self.setHorizontalHeaderLabels([title for title, _ in self.COLUMNS])
+            self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+            self.verticalHeader().setVisible(False)
+            self.setEditTriggers(QTableWidget.NoEditTriggers)
+            # The range changes many times per frame while panning, the table is refreshed once they are processed
+            self.refreshTimer = QTimer(self)
+            self.refreshTimer.setSingleShot(True)
+            self.refreshTimer.setInterval(0)
+            self.refreshTimer.timeout.connect(self.refresh)
+            signalWidget.plotItem.getViewBox().sigXRangeChanged.connect(self.scheduleRefresh)
+            signalWidget.curvesChanged.connect(self.scheduleRefresh)
+
+        def scheduleRefresh(self, *args) -> None:
+            if self.isVisible():
+                self.refreshTimer.start()
+
+        @profiled("statistics.refresh")
+        def refresh(self) -> None:
+            results = self.signalWidget.rangeStatistics()
+            self.setRowCount(len(results))
+            for row, (key, stats) in enumerate(results.items()):
+                units = self.signalWidget.curves[key].units
+                self.setItem(row, 0, QTableWidgetItem(key))
+                for column, (_, name) in enumerate(self.COLUMNS[1:], start=1):
+                    text = "" if stats is None else f"{stats[name]:.6g}" + (f" {units}" if units else "")
+                    item = QTableWidgetItem(text)
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    self.setItem(row, column, item)
+
+        def showEvent(self, event) -> None:
+            self.refresh()
+            super().showEvent(event)
 
     def initUI(self, **kwargs) -> None:
         self.setWindowTitle(self.title)
@@ -659,7 +1113,14 @@ class PlotWindow(QWidget):
 
         # Define the main widgets of the window
         self.listWidget = self.ListContainer(self.items, self.sub_goups)
-        self.signalWidget = self.SignalContainer(self.items, self.x_component)
+        self.signalWidget = self.SignalContainer(
+            self.items,
+            self.x_component,
+            downsampling=kwargs.get("downsampling", True),
+            memory_budget=kwargs.get("memory_budget", None),
+            batch_size=kwargs.get("batch_size", 0),
+            timebases=self.timebases,
+        )
 
         # Create the list container
         signals_label = QLabel("Signals:")
@@ -668,7 +1129,9 @@ class PlotWindow(QWidget):
         self.clearButton.setAutoFillBackground(True)
         self.clearButton.clicked.connect(self.listWidget.clearSignals)
         # List container
-        self.listWidget.changeItem.connect(self.signalWidget.setSignal)
+        self.listWidget.selection.selectionChanged.connect(self.signalWidget.updateSelection)
+        if len(self.listWidget.selection):
+            self.signalWidget.updateSelection(self.listWidget.selection.keys(), [])
 
         # Add the search bar
         self.searchbar = QLineEdit()
@@ -684,12 +1147,16 @@ class PlotWindow(QWidget):
         self.mathevalbar = QLineEdit()
         self.mathevalbar.setPlaceholderText("Math...")
         self.mathevalbar.textChanged.connect(self.eval_and_update)
+        self.signalWidget.mathEvaluated.connect(self.mathEvaluated)
 
         # Link axis checkbox
         self.linkAxis = QCheckBox("Link Y-axes")
         self.linkAxis.setChecked(True)
         self.linkAxis.toggled.connect(self.signalWidget.setSeparateAxes)
 
+        # Statistics panel checkbox
+        self.statisticsCheckBox = QCheckBox("Statistics")
+
         # Create the x_axis selector
         x_axis_label = QLabel("X axis:")
         self.x_axis = QComboBox()
@@ -706,13 +1173,24 @@ class PlotWindow(QWidget):
         self.selectorLayout.addWidget(self.linkAxis, 4, 0, 1, 3)
         self.selectorLayout.addWidget(x_axis_label, 5, 0, 1, 1)
         self.selectorLayout.addWidget(self.x_axis, 5, 1, 1, 2)
+        self.selectorLayout.addWidget(self.statisticsCheckBox, 6, 0, 1, 3)
         # endregion Selector Widget
 
         # region Plot Widget
         self.signalWidget.plotItem.vb.sigResized.connect(self.signalWidget.updateViews)
 
         # self.mainLayout.addLayout(self.signalLayout)
-        self.splitter.addWidget(self.signalWidget)
+        # The statistics panel is displayed below the plot
+        self.plotSplitter = QSplitter(Qt.Vertical)
+        self.plotSplitter.addWidget(self.signalWidget)
+        self.statisticsPanel = self.StatisticsPanel(self.signalWidget)
+        self.plotSplitter.addWidget(self.statisticsPanel)
+        self.plotSplitter.setStretchFactor(0, 4)
+        self.plotSplitter.setStretchFactor(1, 1)
+        self.statisticsPanel.setVisible(kwargs.get("statistics", False))
+        self.statisticsCheckBox.setChecked(kwargs.get("statistics", False))
+        self.statisticsCheckBox.toggled.connect(self.statisticsPanel.setVisible)
+        self.splitter.addWidget(self.plotSplitter)
 
         # Set Strecth factor to give plot the most space
         self.splitter.setStretchFactor(0, 1)
@@ -733,47 +1211,81 @@ class PlotWindow(QWidget):
         self.signalWidget.setDownsampling(
             ds=kwargs.get("downsampling", True),
             auto=True,
-            mode="subsample",
+            mode="peak",
         )
         self.legend = self.signalWidget.addLegend()  # add grid
+
+        # Debug overlay of the profiler, toggled with Ctrl+Shift+P
+        self.profilerOverlay = self.ProfilerOverlay(self.signalWidget)
+        self.profilerOverlay.setVisible(kwargs.get("profile", False))
+        self.profilerShortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        self.profilerShortcut.activated.connect(lambda: self.profilerOverlay.setVisible(not self.profilerOverlay.isVisible()))
         # endregion Plot Widget
 
         # Connect the sigYRangeChanged signal to the updateViews slot
         # self.signalWidget.plotItem.vb.sigYRangeChanged.connect(self.updateViews)
 
+    def updateSignals(self, keys) -> None:
+        """Refresh the displayed signals whose data was updated in the items dictionary"""
+        self.signalWidget.updateSignals(keys)
+
+    def addSignals(self, items: dict) -> None:
+        """Add new signals to the window (same format as the items of plot_window)"""
+        items = normalize_items({key: value for key, value in items.items() if key not in self.items}, self.timebases)
+        self.signalWidget.addItems(items)  # Before the list, which selects the new signals with a state
+        self.listWidget.addItems(items)
+        self.x_options.extend(items)
+        self.x_axis.addItems(list(items))
+        self.completer.model().setStringList(list(self.listWidget.listItem.keys()))
+
+    def setSignals(self, items: dict) -> None:
+        """Add new signals and replace the data and metadata of the existing ones (same format as the items of
+        plot_window)"""
+        new = {key: value for key, value in items.items() if key not in self.items}
+        updated = normalize_items({key: value for key, value in items.items() if key not in new}, self.timebases) or {}
+        for key, value in updated.items():
+            data = self.items[key]
+            if "loader" in value:
+                # The arrays of the previous data must not hide the new loader
+                data.pop("x", None)
+                data.pop("y", None)
+            elif "y" in value:
+                # The arrays replace the loader (e.g. of a pending signal)
+                data.pop("loader", None)
+            if "pending" not in value:
+                data.pop("pending", None)
+            data.update(value)
+            self.signalWidget.signal_cache.forget(key)
+            self.signalWidget.forgetSignalData(key)
+        if new:
+            self.addSignals(new)
+        if updated:
+            self.listWidget.model.refreshKeys(updated)
+            self.updateSignals(list(updated))
+
     def eval_and_update(self) -> None:
         if not self.mathevalbar.text():
+            self.signalWidget.cancelMathEvaluation()
             self.mathevalbar.setStyleSheet("")  # Reset the style
             return
-        success = self.signalWidget.eval_math_operation(self.mathevalbar.text())
+        self.mathevalbar.setStyleSheet("border: 1px solid orange;")  # Busy until the evaluation is done
+        self.signalWidget.eval_math_operation(self.mathevalbar.text())
+
+    def mathEvaluated(self, success: bool) -> None:
         if success:
             self.mathevalbar.setStyleSheet("")  # Reset the style
         else:
             self.mathevalbar.setStyleSheet("border: 1px solid red;")
 
+    def closeEvent(self, event) -> None:
+        # Stop a running math evaluation so that the worker thread does not delay the exit
+        self.signalWidget.cancelMathEvaluation()
+        self.signalWidget.math_executor.shutdown(wait=False)
+        super().closeEvent(event)
 
-def plot_window(
-    items: dict = None,
-    pre_select: list[str] = None,
-    x_component: str = None,
-    sub_groups: dict[str, list[str]] = None,
-    **kwargs,
-) -> None:
-    """
-    Initialize an oscilloscope-like window with the given signals.
-
-    Args:
-        items (dict): Dictionary of signals to be displayed. Each key is a signal name and the value is another dict with both "x" and "y" keys, each containing a numpy array with the signal data.
-        pre_select (list[str]): List of signal names to be pre-selected.
-        x_component (str): Name of the signal to be used as x axis. If None, the first signal will be used.
-
-    Returns:
-        None: None
-    """
-
-    app = QApplication(sys.argv)
 
-    # Now use a palette to switch to dark colors (personal preference)
+def dark_palette() -> QPalette:
+    """Dark color palette of the application (also used by the exported figures)"""
     # TODO: Allow the user to set the color palette (or at least switch between dark and light themes)
     palette = QPalette()
     palette.setColor(QPalette.Window, QColor(50, 50, 50))
@@ -790,7 +1302,18 @@ def plot_window(
     palette.setColor(QPalette.Highlight, QColor(99, 190, 231))
     palette.setColor(QPalette.HighlightedText, Qt.white)
     palette.setColor(QPalette.WindowText, Qt.white)
-    app.setPalette(palette)
+    return palette
+
+
+def get_application() -> QApplication:
+    """Return the Qt application of the process, creating and styling it if there is none yet"""
+    app = QApplication.instance()
+    if app is not None:
+        return app
+    app = QApplication(sys.argv)
+
+    # Now use a palette to switch to dark colors (personal preference)
+    app.setPalette(dark_palette())
 
     # Set custom arrow style as the color is not configurable through the palette
     app.setStyleSheet(
@@ -810,6 +1333,20 @@ def plot_window(
         QLineEdit { color: rgb(255,255,255); background: rgb(25, 25, 25); }
         """
     )
+    return app
+
+
+def create_window(
+    items: dict = None,
+    pre_select: list[str] = None,
+    x_component: str = None,
+    sub_groups: dict[str, list[str]] = None,
+    setup: Callable[[PlotWindow], None] = None,
+    **kwargs,
+) -> QMainWindow:
+    """Create and show the main window of the signals (see `plot_window` for the arguments), without waiting for it to
+    be closed. The PlotWindow is its central widget."""
+    get_application()
 
     # Check if the x_component is safe to use
     if x_component is not None:
@@ -829,9 +1366,47 @@ def plot_window(
     if pre_select is not None:
         ex.listWidget.set_manual_keys(pre_select)
 
+    if setup is not None:
+        setup(ex)
+
     # Show the window
     main_window.setFocus()
     main_window.show()
+    return main_window
+
+
+def plot_window(
+    items: dict = None,
+    pre_select: list[str] = None,
+    x_component: str = None,
+    sub_groups: dict[str, list[str]] = None,
+    setup: Callable[[PlotWindow], None] = None,
+    **kwargs,
+) -> None:
+    """
+    Initialize an oscilloscope-like window with the given signals, and wait for it to be closed.
+
+    The Qt application is created by the first call and reused by the following ones. See `signal_plotter.viewer` to
+    keep the script running while the window is displayed.
+
+    Args:
+        items (dict): Dictionary of signals to be displayed. Each key is a signal name and the value is another dict with both "x" and "y" keys, each containing a numpy array with the signal data.
+            The value can also be a LazySignal (or a callable returning the "x" and "y" arrays), loaded when the signal is first plotted.
+        pre_select (list[str]): List of signal names to be pre-selected.
+        x_component (str): Name of the signal to be used as x axis. If None, the first signal will be used.
+        setup (Callable[[PlotWindow], None]): Function called with the window before it is shown, e.g. to start timers
+            updating the signals.
+        memory_budget (int): Maximum size in bytes of the arrays of lazy signals kept loaded when they are not displayed.
+        batch_size (int): Minimum number of curves sharing an axis and a timebase drawn by a single item, which shows a
+            single legend entry for them (e.g. 32). 0 (the default) always draws the curves with their own item.
+        statistics (bool): Show the panel of the statistics of the displayed signals over the visible time range.
+        profile (bool): Show the debug overlay of the profiler (see signal_plotter.profiling), also toggled with Ctrl+Shift+P.
+
+    Returns:
+        None: None
+    """
+    app = get_application()
+    main_window = create_window(items, pre_select, x_component, sub_groups, setup, **kwargs)  # noqa: F841
 
     # Run the application and wait for the window to be closed
     app.exec()
@@ -0,0 +1,173 @@
+""" Opt-in instrumentation of the slow paths of the plotter
+
+The tree of signals, the plot, the axes, the math operations, the downsampling and the csv parser record the time they
+spend in named timers and count the work they do. Nothing is recorded unless the profiler is enabled, with the
+`SIGNAL_PLOTTER_PROFILE=1` environment variable, `PROFILER.enable()`, the debug overlay of the window (Ctrl+Shift+P) or
+the `--profile` / `--trace` options of the csv parser.
+
+The records can be dumped as a JSON summary (`dump_json`) or as a Chrome trace (`dump_chrome_trace`), which can be
+opened in chrome://tracing or https://ui.perfetto.dev to see the timeline of each thread.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+# Maximum number of events kept for the Chrome trace (the oldest ones are dropped)
+MAX_EVENTS = 100_000
+
+
+class _Timer:
+    """Context manager recording the time spent in its block"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> _Timer:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+
+
+class _NoTimer:
+    """Context manager doing nothing, used while the profiler is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> _NoTimer:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+class Profiler:
+    """Named timers (count, total, min and max durations) and counters, with the timeline of their events"""
+
+    def __init__(self, enabled: bool = False, max_events: int = MAX_EVENTS) -> None:
+        self.enabled = enabled
+        self.origin = time.perf_counter()  # Time origin of the events
+        self.timers: dict[str, list] = {}  # name -> [count, total, min, max]
+        self.counters: dict[str, int] = {}
+        # (phase, name, start, duration or counter value, thread id), phase "X" for timers and "C" for counters
+        self.events: deque[tuple] = deque(maxlen=max_events)
+        self._lock = threading.Lock()  # Timers are also recorded by the worker threads
+
+    def enable(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        with self._lock:
+            self.origin = time.perf_counter()
+            self.timers.clear()
+            self.counters.clear()
+            self.events.clear()
+
+    def timer(self, name: str) -> _Timer | _NoTimer:
+        """Context manager timing its block under `name`"""
+        return _Timer(self, name) if self.enabled else _NO_TIMER
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        with self._lock:
+            stats = self.timers.get(name)
+            if stats is None:
+                self.timers[name] = [1, duration, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = min(stats[2], duration)
+                stats[3] = max(stats[3], duration)
+            self.events.append(("X", name, start, duration, threading.get_ident()))
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add `value` to a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            total = self.counters[name] = self.counters.get(name, 0) + value
+            self.events.append(("C", name, time.perf_counter(), total, threading.get_ident()))
+
+    def summary(self) -> dict:
+        """Statistics of the timers (in seconds) and values of the counters"""
+        with self._lock:
+            timers = {
+                name: {"count": count, "total": total, "mean": total / count, "min": low, "max": high}
+                for name, (count, total, low, high) in self.timers.items()
+            }
+            return {"timers": timers, "counters": dict(self.counters)}
+
+    def report(self, limit: int = 12) -> str:
+        """Text table of the timers taking the most time, and of the counters"""
+        summary = self.summary()
+        timers = sorted(summary["timers"].items(), key=lambda item: item[1]["total"], reverse=True)[:limit]
+        lines = [f"{'timer':<28}{'count':>7}{'total ms':>11}{'max ms':>9}"]
+        lines += [
+            f"{name:<28}{stats['count']:>7}{stats['total'] * 1000:>11.1f}{stats['max'] * 1000:>9.1f}"
+            for name, stats in timers
+        ]
+        lines += [f"{name:<28}{value:>7}" for name, value in sorted(summary["counters"].items())]
+        return "\n".join(lines)
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=1)
+
+    def dump_chrome_trace(self, path: str) -> None:
+        """Write the events in the Trace Event Format of chrome://tracing (times in microseconds)"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            origin = self.origin
+        trace = []
+        for phase, name, start, value, thread in events:
+            event = {"name": name, "ph": phase, "ts": (start - origin) * 1e6, "pid": pid, "tid": thread}
+            if phase == "X":
+                event["dur"] = value * 1e6
+            else:
+                event["args"] = {name: value}
+            trace.append(event)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+
+PROFILER = Profiler(enabled=os.environ.get("SIGNAL_PLOTTER_PROFILE", "") not in ("", "0"))
+
+
+def timer(name: str) -> _Timer | _NoTimer:
+    """Context manager timing its block with the global profiler"""
+    return PROFILER.timer(name)
+
+
+def count(name: str, value: int = 1) -> None:
+    """Add `value` to a counter of the global profiler"""
+    PROFILER.count(name, value)
+
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """Decorator timing each call of a function with the global profiler"""
+
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with _Timer(PROFILER, name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,394 @@
+""" Publication of signals to the viewers of other processes through shared memory
+
+A `Publisher` places the arrays of its signals in named shared memory segments, preallocated so that the signals can
+grow in place, and accepts viewers on a local socket (a named pipe on Windows). Its control channel only carries the
+layouts of the segments, the metadata of the signals (units, scatter, alpha, group...) and their lengths: a
+`Subscriber` maps the segments and builds views on them without copying the data.
+
+The viewers are notified of the new, replaced and grown signals at most every `interval` seconds, by a background
+thread of the publisher: publishing never waits for a viewer. Several publishers (e.g. an acquisition and an analysis
+process) can be displayed by one viewer, and several viewers can subscribe to the same publisher:
+
+    # Producer process
+    publisher = Publisher("/tmp/acquisition.sock")
+    publisher.add_signal("card.voltage", units="V", group="card")
+    while True:
+        publisher.append("card.voltage", *read_acquisition_card())
+
+    # Viewer process
+    plot_subscriber(["/tmp/acquisition.sock", "/tmp/analysis.sock"])
+
+or `python -m signal_plotter.publisher /tmp/acquisition.sock /tmp/analysis.sock`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import TYPE_CHECKING
+
+import numpy
+
+from signal_plotter import shared_memory
+
+if TYPE_CHECKING:
+    from signal_plotter.plot_window import PlotWindow
+
+logger = logging.getLogger('plot_window_tree')
+
+
+class PublishedSignal:
+    """Arrays of a published signal in their shared memory segment, filled up to `length`"""
+
+    def __init__(self, x_dtype, y_dtype, capacity: int, metadata: dict) -> None:
+        self.segment, self.layout, arrays = shared_memory.create_arrays(
+            {"x": (x_dtype, (capacity,)), "y": (y_dtype, (capacity,))}
+        )
+        self.x, self.y = arrays["x"], arrays["y"]
+        self.length = 0
+        self.metadata = metadata
+
+    @property
+    def capacity(self) -> int:
+        return self.y.size
+
+    def describe(self) -> tuple:
+        """Description of the signal sent to the subscribers"""
+        return self.segment, self.layout, self.metadata, self.length
+
+
+class Publisher:
+    """Signals published in shared memory for the viewers of other processes.
+
+    The signals are append-only: `append` and `extend` write the new samples after the ones already published, which
+    the viewers keep mapped, and `publish` replaces the data of a signal with a new segment. The methods can be called
+    from any thread.
+    """
+
+    def __init__(
+        self, address=None, authkey: bytes | None = None, capacity: int = 100_000, interval: float = 0.02
+    ) -> None:
+        """
+        Args:
+            address: Address of the control channel (see `multiprocessing.connection.Listener`): the path of a Unix
+                socket, a named pipe on Windows, or a (host, port) tuple. A free address is chosen if None.
+            authkey (bytes): Key the subscribers must give to connect.
+            capacity (int): Default number of samples preallocated for each signal, doubled when it is exceeded.
+            interval (float): Minimum period in seconds of the notifications sent to the viewers.
+        """
+        self.capacity = capacity
+        self.interval = interval
+        self._authkey = authkey
+        self._listener = Listener(address, authkey=authkey)
+        self.address = self._listener.address
+
+        self._lock = threading.Lock()  # Protects the signals and the subscribers
+        self._notify_lock = threading.Lock()  # Only one thread writes to the subscribers
+        self._signals: dict[str, PublishedSignal] = {}
+        self._replaced: dict[str, None] = {}  # Signals added or replaced since the last notification
+        self._grown: set[str] = set()  # Signals which received samples since the last notification
+        self._subscribers: list[Connection] = []
+        self._new_subscribers: list[Connection] = []
+        self._unattached: dict[str, set[Connection]] = {}  # Segment -> subscribers which did not attach it yet
+        self._superseded: set[str] = set()  # Replaced segments, unlinked once all the subscribers attached them
+        self._closed = threading.Event()
+
+        self._accept_thread = threading.Thread(target=self._accept, name="signal_plotter publisher", daemon=True)
+        self._accept_thread.start()
+        self._notify_thread = threading.Thread(target=self._notify, name="signal_plotter notifier", daemon=True)
+        self._notify_thread.start()
+
+    def __enter__(self) -> Publisher:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._signals
+
+    def keys(self) -> list[str]:
+        return list(self._signals)
+
+    def add_signal(self, name: str, capacity: int | None = None, dtype=numpy.float64, **metadata) -> None:
+        """Declare an empty signal with its metadata (units, scatter, alpha, group...), or update the metadata of an
+        existing signal"""
+        with self._lock:
+            signal = self._signals.get(name)
+            if signal is not None:
+                signal.metadata.update(metadata)
+                self._replaced[name] = None
+                return
+            self._allocate(name, numpy.dtype(dtype), numpy.dtype(dtype), capacity or self.capacity, metadata)
+
+    def publish(self, name: str, x, y, capacity: int | None = None, **metadata) -> None:
+        """Publish a signal, or replace the data of an existing signal (its metadata is updated)"""
+        x, y = numpy.ravel(x), numpy.ravel(y)
+        if x.shape != y.shape:
+            raise ValueError(f"x and y of {name} must have the same length: {x.size} != {y.size}")
+        with self._lock:
+            previous = self._signals.get(name)
+            metadata = {**previous.metadata, **metadata} if previous is not None else metadata
+            signal = self._allocate(name, x.dtype, y.dtype, max(capacity or self.capacity, y.size), metadata)
+            signal.x[: x.size] = x
+            signal.y[: y.size] = y
+            signal.length = y.size
+
+    def append(self, name: str, x, y) -> None:
+        """Append samples (scalars or arrays) to a signal, declaring it if needed"""
+        self.extend({name: (x, y)})
+
+    def extend(self, samples: dict) -> None:
+        """Append samples to several signals at once: {name: (x, y)}"""
+        with self._lock:
+            for name, (x, y) in samples.items():
+                x, y = numpy.ravel(x), numpy.ravel(y)
+                if x.shape != y.shape:
+                    raise ValueError(f"x and y of {name} must have the same length: {x.size} != {y.size}")
+                signal = self._signals.get(name)
+                if signal is None:
+                    signal = self._allocate(name, x.dtype, y.dtype, max(self.capacity, y.size), {})
+                elif signal.length + y.size > signal.capacity:
+                    # The viewers keep the previous segment, the signal is moved to a larger one
+                    previous = signal
+                    capacity = max(2 * previous.capacity, previous.length + y.size)
+                    signal = self._allocate(name, previous.x.dtype, previous.y.dtype, capacity, previous.metadata)
+                    signal.x[: previous.length] = previous.x[: previous.length]
+                    signal.y[: previous.length] = previous.y[: previous.length]
+                    signal.length = previous.length
+                elif name not in self._replaced:
+                    self._grown.add(name)
+                signal.x[signal.length : signal.length + y.size] = x
+                signal.y[signal.length : signal.length + y.size] = y
+                signal.length += y.size
+
+    def _allocate(self, name: str, x_dtype, y_dtype, capacity: int, metadata: dict) -> PublishedSignal:
+        """Create the segment of a new or replaced signal (with the lock held)"""
+        previous = self._signals.get(name)
+        if previous is not None:
+            self._superseded.add(previous.segment)
+        signal = self._signals[name] = PublishedSignal(x_dtype, y_dtype, capacity, metadata)
+        self._replaced[name] = None
+        self._grown.discard(name)
+        return signal
+
+    def _accept(self) -> None:
+        while not self._closed.is_set():
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                return  # The listener was closed
+            except Exception as e:
+                logger.warning(f"Subscriber rejected: {e}")
+                continue
+            with self._lock:
+                self._new_subscribers.append(connection)
+
+    def _notify(self) -> None:
+        while not self._closed.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Notify the subscribers of the signals added, replaced or grown since the previous notification"""
+        with self._notify_lock:
+            with self._lock:
+                replaced = {name: self._signals[name].describe() for name in self._replaced}
+                grown = {name: self._signals[name].length for name in self._grown}
+                self._replaced.clear()
+                self._grown.clear()
+                subscribers, new_subscribers = list(self._subscribers), self._new_subscribers
+                self._new_subscribers = []
+                self._subscribers += new_subscribers
+                # The new subscribers receive all the signals
+                snapshot = {name: signal.describe() for name, signal in self._signals.items()} if new_subscribers else {}
+                for segment, *_ in replaced.values():
+                    self._unattached.setdefault(segment, set()).update(subscribers)
+                for segment, *_ in snapshot.values():
+                    self._unattached.setdefault(segment, set()).update(new_subscribers)
+
+            for connection, messages in [(c, (("signals", replaced), ("grown", grown))) for c in subscribers] + [
+                (c, (("signals", snapshot),)) for c in new_subscribers
+            ]:
+                try:
+                    for message in messages:
+                        if message[1]:
+                            connection.send(message)
+                except OSError:
+                    self._drop(connection)
+            self._collect()
+
+    def _collect(self) -> None:
+        """Process the acknowledgements of the subscribers and unlink the segments they all attached"""
+        for connection in list(self._subscribers):
+            try:
+                while connection.poll():
+                    message = connection.recv()
+                    if message[0] == "attached":
+                        with self._lock:
+                            for segment in message[1]:
+                                self._unattached.get(segment, set()).discard(connection)
+            except (EOFError, OSError):
+                self._drop(connection)
+        with self._lock:
+            for segment in [segment for segment in self._superseded if not self._unattached.get(segment)]:
+                self._superseded.discard(segment)
+                self._unattached.pop(segment, None)
+                shared_memory.release(segment, unlink=True)
+
+    def _drop(self, connection: Connection) -> None:
+        logger.info("Subscriber disconnected")
+        with self._lock:
+            if connection in self._subscribers:
+                self._subscribers.remove(connection)
+            for subscribers in self._unattached.values():
+                subscribers.discard(connection)
+        connection.close()
+
+    def close(self) -> None:
+        """Send the last notifications and stop publishing. The viewers keep displaying the signals."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        try:
+            # Wake up the thread waiting for subscribers
+            Client(self.address, authkey=self._authkey).close()
+        except Exception:
+            pass
+        self._listener.close()
+        self._notify_thread.join()
+        self.flush()
+        with self._lock:
+            for connection in self._subscribers + self._new_subscribers:
+                connection.close()
+            self._subscribers, self._new_subscribers = [], []
+            segments = self._superseded | {signal.segment for signal in self._signals.values()}
+            self._signals.clear()
+            self._superseded.clear()
+            self._unattached.clear()
+        for segment in segments:
+            shared_memory.release(segment, unlink=True)
+
+
+class Subscriber:
+    """Signals of one or several publishers of other processes, mapped without copying them.
+
+    `collect` has the interface of `SignalStream.collect`, a subscriber can be displayed with `stream_to_window`.
+    """
+
+    def __init__(self, addresses: list, authkey: bytes | None = None) -> None:
+        self.connections: list[Connection] = [Client(address, authkey=authkey) for address in addresses]
+        self.arrays: dict[str, dict[str, numpy.ndarray]] = {}  # Segment -> its (whole) arrays
+        self.segments: dict[str, str] = {}  # Signal -> segment of its arrays
+
+    @property
+    def connected(self) -> bool:
+        return bool(self.connections)
+
+    def _attach(self, name: str, segment: str, layout: list[tuple]) -> dict[str, numpy.ndarray] | None:
+        arrays = self.arrays.get(segment)
+        if arrays is None:
+            try:
+                arrays = self.arrays[segment] = shared_memory.attach_arrays(segment, layout, unlink=False)
+            except FileNotFoundError:
+                # The publisher replaced the signal again and exited before this subscriber attached it
+                logger.warning(f"Data of signal {name} not found")
+                return None
+        previous = self.segments.get(name)
+        self.segments[name] = segment
+        if previous is not None and previous != segment and previous not in self.segments.values():
+            del self.arrays[previous]
+            shared_memory.release(previous)
+        return arrays
+
+    def collect(self) -> tuple[dict[str, dict], dict[str, tuple]]:
+        """Return the signals added or replaced and the (x, y) views of the signals grown since the previous call"""
+        new, updated = {}, {}
+        for connection in list(self.connections):
+            try:
+                while connection.poll():
+                    message = connection.recv()
+                    if message[0] == "signals":
+                        for name, (segment, layout, metadata, length) in message[1].items():
+                            arrays = self._attach(name, segment, layout)
+                            if arrays is not None:
+                                new[name] = {**metadata, "x": arrays["x"][:length], "y": arrays["y"][:length]}
+                                updated.pop(name, None)
+                        connection.send(("attached", [segment for segment, *_ in message[1].values()]))
+                    elif message[0] == "grown":
+                        for name, length in message[1].items():
+                            arrays = self.arrays.get(self.segments.get(name))
+                            if arrays is None:
+                                continue
+                            x, y = arrays["x"][:length], arrays["y"][:length]
+                            if name in new:
+                                new[name].update(x=x, y=y)
+                            else:
+                                updated[name] = (x, y)
+            except (EOFError, OSError):
+                # The signals stay mapped and displayed
+                logger.info("Publisher closed")
+                self.connections.remove(connection)
+                connection.close()
+        return new, updated
+
+    def close(self) -> None:
+        for connection in self.connections:
+            connection.close()
+        self.connections = []
+
+
+def plot_subscriber(
+    addresses: list,
+    authkey: bytes | None = None,
+    max_fps: float = 30.0,
+    pre_select: list[str] = None,
+    **kwargs,
+) -> None:
+    """
+    Initialize an oscilloscope-like window displaying the signals of publishers running in other processes.
+
+    Args:
+        addresses (list): Addresses of the publishers.
+        authkey (bytes): Key of the publishers.
+        max_fps (float): Maximum number of redraws per second.
+        pre_select (list[str]): List of signal names to be selected when they are published.
+        **kwargs: Other arguments of plot_window. The signals published with a "group" are added to its sub_groups.
+
+    Returns:
+        None: None
+    """
+    # Qt is only imported by the viewers, not by the producers
+    from signal_plotter.plot_window import plot_window
+    from signal_plotter.streaming import stream_to_window
+
+    subscriber = Subscriber(addresses, authkey)
+
+    def setup(window: PlotWindow) -> None:
+        # Keep references to the subscriber and its timer in the window
+        window.subscriber = subscriber
+        window.stream_timer = stream_to_window(window, subscriber, max_fps, pre_select)
+
+    kwargs.setdefault("sub_groups", {})
+    plot_window({}, setup=setup, **kwargs)
+    subscriber.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Display the signals published by other processes")
+    parser.add_argument("address", type=str, nargs="+", help="Addresses of the publishers (socket path or host:port)")
+    parser.add_argument("-y", "--y", type=str, nargs="+", help="Signals selected when they are published")
+    parser.add_argument("--max-fps", type=float, default=30.0, help="Maximum number of redraws per second (default: 30)")
+    args = parser.parse_args(argv)
+
+    addresses = []
+    for address in args.address:
+        host, _, port = address.rpartition(":")
+        addresses.append((host, int(port)) if host and port.isdigit() else address)
+    plot_subscriber(addresses, max_fps=args.max_fps, pre_select=args.y)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
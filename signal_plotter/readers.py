@@ -0,0 +1,399 @@
+""" Readers of the signal files, picked from the extension of the file
+
+A reader returns the index (x axis) and the numerical columns of a file, and only reads the requested columns when the
+format allows it: Parquet, Feather (Arrow IPC), HDF5 and NPZ files store each column separately, and csv files skip the
+conversion of the columns which are not requested. Parquet, Feather and csv files (with pyarrow installed) are decoded
+by several threads.
+
+The libraries of the formats (pandas, pyarrow, h5py) are only imported when a file is read. Other formats can be added
+with `register_reader`.
+"""
+
+from __future__ import annotations
+
+import csv
+import fnmatch
+import importlib
+import importlib.util
+import logging
+import os
+import re
+import threading
+from typing import Callable
+
+import numpy
+
+from signal_plotter.lazy import LazySignal
+from signal_plotter.profiling import count, profiled
+
+logger = logging.getLogger('plot_window_tree')
+
+
+def _import(module: str, extension: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        package = module.split(".")[0]
+        raise ImportError(f"Reading {extension} files requires {package} (pip install {package})") from e
+
+
+def _is_numeric(array: numpy.ndarray) -> bool:
+    return array.ndim == 1 and array.dtype.kind in "biuf"
+
+
+class SignalReader:
+    """Reader of a file format. Unless the format stores its index, the first column is the index of the other ones."""
+
+    # Extensions of the files read by the reader (lower case, with the dot)
+    extensions: tuple[str, ...] = ()
+    # Whether reading some of the columns is cheaper than reading all of them at once
+    columnar = True
+
+    def header(self, path: str) -> tuple[str | None, list[str]]:
+        """Read the index name and the column names of a file, without reading the columns"""
+        raise NotImplementedError
+
+    def read(self, path: str, columns: list[str] | None = None) -> tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]]:
+        """Read the index and the numerical `columns` of a file (all of them if None).
+
+        Returns:
+            The index name, the index array and the dict of numerical column arrays.
+        """
+        raise NotImplementedError
+
+
+# Extension -> reader
+READERS: dict[str, SignalReader] = {}
+
+
+def register_reader(reader: SignalReader) -> SignalReader:
+    """Read the files with the extensions of the reader with it (replacing the previous reader of an extension)"""
+    for extension in reader.extensions:
+        READERS[extension.lower()] = reader
+    return reader
+
+
+def get_reader(path: str, default: SignalReader | None = None) -> SignalReader:
+    """Reader of a file, from its extension (`default` for the other extensions)"""
+    extension = os.path.splitext(path)[1].lower()
+    reader = READERS.get(extension, default)
+    if reader is None:
+        raise ValueError(f"No reader for the {extension or 'extension-less'} file {path} (supported: {', '.join(READERS)})")
+    return reader
+
+
+def expand_columns(names: list[str], patterns: list[str]) -> list[str]:
+    """Names matching one of the glob patterns (e.g. "motor.*"), in the order of the names"""
+    return [name for name in names if any(name == pattern or fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+class CsvReader(SignalReader):
+    """Csv files parsed with pandas, with its multithreaded pyarrow engine if pyarrow is installed"""
+
+    extensions = (".csv",)
+    # Every line is tokenized whatever the requested columns
+    columnar = False
+
+    def header(self, path: str) -> tuple[str | None, list[str]]:
+        with open(path, newline="") as f:
+            header = next(csv.reader(f), [])
+        if not header:
+            return None, []
+        return header[0] or None, header[1:]
+
+    @profiled("csv.parse")
+    def read(
+        self, path: str, columns: list[str] | None = None, progress: bool = False
+    ) -> tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]]:
+        pandas = _import("pandas", ".csv")
+
+        usecols = None
+        if columns is not None:
+            # The index and the requested columns, by position as column names may be duplicated
+            _, names = self.header(path)
+            requested = set(columns)
+            usecols = [0] + [i + 1 for i, name in enumerate(names) if name in requested]
+
+        df = None
+        if importlib.util.find_spec("pyarrow") is not None:
+            try:
+                df = pandas.read_csv(path, index_col=0, usecols=usecols, engine="pyarrow")
+            except Exception as e:
+                logger.debug(f"The pyarrow engine could not read {path} ({e}), using the default engine")
+        if df is None:
+            df = pandas.read_csv(path, index_col=0, usecols=usecols)
+
+        if progress:
+            import tqdm
+
+            names = tqdm.tqdm(df.columns, desc="Parsing columns")
+        else:
+            names = df.columns
+        arrays = {}
+        for column in names:
+            # Check if the column is a number
+            try:
+                arrays[column] = numpy.ravel(pandas.to_numeric(df[column]))
+            except ValueError:
+                logger.warning(f"The column {column} is not a numerical signal, skipping")
+                continue
+
+        count("csv.rows", len(df.index))
+        count("csv.columns", len(arrays))
+        return df.index.name, numpy.ravel(df.index), arrays
+
+
+class ArrowReader(SignalReader):
+    """Base of the readers of Arrow tables: the index is the one stored by pandas, or the first column"""
+
+    def _schema(self, path: str):
+        raise NotImplementedError
+
+    def _read_table(self, path: str, columns: list[str]):
+        raise NotImplementedError
+
+    def _index(self, schema) -> str:
+        metadata = schema.pandas_metadata or {}
+        stored = [column for column in metadata.get("index_columns", []) if isinstance(column, str)]
+        return stored[0] if len(stored) == 1 else schema.names[0]
+
+    @staticmethod
+    def _index_name(column: str) -> str | None:
+        # Unnamed pandas indexes are stored as "__index_level_0__"
+        return None if re.fullmatch(r"__index_level_\d+__", column) else column
+
+    def header(self, path: str) -> tuple[str | None, list[str]]:
+        schema = self._schema(path)
+        if not schema.names:
+            return None, []
+        index = self._index(schema)
+        # The columns which can't be signals are known from their type
+        types = _import("pyarrow.types", self.extensions[0])
+        numeric = (types.is_integer, types.is_floating, types.is_boolean)
+        return self._index_name(index), [
+            field.name for field in schema if field.name != index and any(is_type(field.type) for is_type in numeric)
+        ]
+
+    @profiled("readers.arrow")
+    def read(self, path: str, columns: list[str] | None = None) -> tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]]:
+        schema = self._schema(path)
+        index = self._index(schema)
+        names = [name for name in schema.names if name != index]
+        if columns is not None:
+            requested = set(columns)
+            names = [name for name in names if name in requested]
+
+        table = self._read_table(path, [index] + names)
+        arrays = {}
+        for name in names:
+            array = table.column(name).to_numpy()
+            if not _is_numeric(array):
+                logger.warning(f"The column {name} is not a numerical signal, skipping")
+                continue
+            arrays[name] = array
+        count("readers.columns", len(arrays))
+        return self._index_name(index), table.column(index).to_numpy(), arrays
+
+
+class ParquetReader(ArrowReader):
+    extensions = (".parquet", ".pq")
+
+    def _schema(self, path: str):
+        return _import("pyarrow.parquet", ".parquet").read_schema(path)
+
+    def _read_table(self, path: str, columns: list[str]):
+        parquet = _import("pyarrow.parquet", ".parquet")
+        # Only the column chunks of the requested columns are read, and decoded by several threads
+        return parquet.read_table(path, columns=columns, use_threads=True, memory_map=True)
+
+
+class FeatherReader(ArrowReader):
+    extensions = (".feather", ".arrow", ".ipc")
+
+    def _schema(self, path: str):
+        pyarrow = _import("pyarrow", ".feather")
+        ipc = _import("pyarrow.ipc", ".feather")
+        try:
+            with pyarrow.memory_map(path) as source:
+                return ipc.open_file(source).schema
+        except pyarrow.ArrowInvalid:
+            # Feather version 1 files are not Arrow IPC files
+            return self._read_table(path, None).schema
+
+    def _read_table(self, path: str, columns: list[str] | None):
+        feather = _import("pyarrow.feather", ".feather")
+        # Uncompressed columns are memory-mapped without copy, compressed ones are decoded by several threads
+        return feather.read_table(path, columns=columns, use_threads=True, memory_map=True)
+
+
+class Hdf5Reader(SignalReader):
+    """HDF5 files: the 1-D datasets of all the groups, named with their path joined by dots. The index is the dataset
+    named by the "index" attribute of the file, or the first dataset."""
+
+    extensions = (".h5", ".hdf5", ".hdf")
+
+    @staticmethod
+    def _datasets(f) -> tuple[str, list[str]]:
+        h5py = _import("h5py", ".h5")
+        paths = []
+        f.visititems(lambda path, node: paths.append(path) if isinstance(node, h5py.Dataset) and node.ndim == 1 else None)
+        index = f.attrs.get("index")
+        if isinstance(index, bytes):
+            index = index.decode()
+        if not isinstance(index, str) or index.strip("/") not in paths:
+            index = paths[0] if paths else None
+        else:
+            index = index.strip("/")
+        return index, [path for path in paths if path != index]
+
+    @staticmethod
+    def _name(path: str) -> str:
+        return path.replace("/", ".")
+
+    def header(self, path: str) -> tuple[str | None, list[str]]:
+        h5py = _import("h5py", ".h5")
+        with h5py.File(path, "r") as f:
+            index, paths = self._datasets(f)
+            # The datasets which can't be signals are known from their type
+            paths = [p for p in paths if f[p].dtype.kind in "biuf"]
+        return (self._name(index) if index is not None else None), [self._name(p) for p in paths]
+
+    @profiled("readers.hdf5")
+    def read(self, path: str, columns: list[str] | None = None) -> tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]]:
+        h5py = _import("h5py", ".h5")
+        arrays = {}
+        with h5py.File(path, "r") as f:
+            index, paths = self._datasets(f)
+            if index is None:
+                return None, numpy.empty(0), {}
+            if columns is not None:
+                requested = set(columns)
+                paths = [p for p in paths if self._name(p) in requested]
+            for p in paths:
+                array = f[p][()]
+                if not _is_numeric(array):
+                    logger.warning(f"The dataset {p} is not a numerical signal, skipping")
+                    continue
+                arrays[self._name(p)] = array
+            index_array = f[index][()]
+        count("readers.columns", len(arrays))
+        return self._name(index), index_array, arrays
+
+
+class NpzReader(SignalReader):
+    """Numpy archives: the first array is the index of the other ones. The arrays are only decompressed when read."""
+
+    extensions = (".npz",)
+
+    def header(self, path: str) -> tuple[str | None, list[str]]:
+        with numpy.load(path) as npz:
+            names = list(npz.files)
+            if not names:
+                return None, []
+            return names[0], [name for name in names[1:] if self._is_numeric(npz, name)]
+
+    @staticmethod
+    def _is_numeric(npz, name: str) -> bool:
+        """Whether an array of an archive is a numerical signal, from its header (without decompressing it)"""
+        try:
+            member = npz.zip.open(name + ".npy")
+        except KeyError:
+            return False  # Not a numpy array
+        with member:
+            version = numpy.lib.format.read_magic(member)
+            if version == (1, 0):
+                shape, _, dtype = numpy.lib.format.read_array_header_1_0(member)
+            else:
+                shape, _, dtype = numpy.lib.format.read_array_header_2_0(member)
+        return len(shape) == 1 and dtype.kind in "biuf"
+
+    @profiled("readers.npz")
+    def read(self, path: str, columns: list[str] | None = None) -> tuple[str | None, numpy.ndarray, dict[str, numpy.ndarray]]:
+        arrays = {}
+        with numpy.load(path) as npz:
+            if not npz.files:
+                return None, numpy.empty(0), {}
+            index, names = npz.files[0], npz.files[1:]
+            if columns is not None:
+                requested = set(columns)
+                names = [name for name in names if name in requested]
+            for name in names:
+                array = npz[name]
+                if not _is_numeric(array):
+                    logger.warning(f"The array {name} is not a numerical signal, skipping")
+                    continue
+                arrays[name] = array
+            index_array = npz[index]
+        count("readers.columns", len(arrays))
+        return index, index_array, arrays
+
+
+CSV_READER = register_reader(CsvReader())
+register_reader(ParquetReader())
+register_reader(FeatherReader())
+register_reader(Hdf5Reader())
+register_reader(NpzReader())
+
+
+class FileSignals:
+    """Signals of a file read on demand: the index is read once, and a column when its signal is first needed.
+
+    Non-columnar formats (csv) are read at once by the first read, which keeps all their columns. The columns which
+    turn out not to be numerical signals are removed from `names`, and never read again.
+    """
+
+    def __init__(self, path: str, reader: SignalReader | None = None) -> None:
+        self.path = path
+        self.reader = reader if reader is not None else get_reader(path)
+        self.index_name, self.names = self.reader.header(path)
+        self.index: numpy.ndarray | None = None
+        self.columns: dict[str, numpy.ndarray] = {}  # Columns kept by non-columnar readers
+        self.rejected: set[str] = set()  # Columns which are not numerical signals
+        self._lock = threading.Lock()
+
+    def read(self, columns: list[str]) -> dict[str, numpy.ndarray]:
+        """Read the index and the numerical arrays of some columns"""
+        with self._lock:
+            arrays = {name: self.columns[name] for name in columns if name in self.columns}
+            missing = [name for name in columns if name not in arrays and name not in self.rejected]
+            if not missing and self.index is not None:
+                return arrays
+            if not self.reader.columnar:
+                # One pass reads all the remaining columns
+                missing = [name for name in self.names if name not in self.columns]
+            index_name, index, read = self.reader.read(self.path, missing)
+            if self.index is None:
+                self.index = index
+            if not self.reader.columnar:
+                self.columns.update(read)
+            rejected = {name for name in missing if name not in read}
+            if rejected:
+                self.rejected |= rejected
+                self.names = [name for name in self.names if name not in rejected]
+            arrays.update((name, read[name]) for name in columns if name in read)
+            return arrays
+
+    def _loader(self, name: str) -> Callable[[], tuple]:
+        def load() -> tuple:
+            arrays = self.read([name]) if name not in self.rejected else {}
+            if name not in arrays:
+                raise ValueError(f"The column {name} of {self.path} is not a numerical signal")
+            return self.index, arrays[name]
+
+        return load
+
+    def items(self, prefix: str = "", columns: list[str] | None = None) -> dict:
+        """Items dictionary of the signals of the file, prefixed with `prefix`.
+
+        The signals matching the `columns` glob patterns are read right away, in a single projected read, the other
+        ones are lazy signals.
+        """
+        selected = [name for name in self.names if expand_columns([prefix + name], columns)] if columns else []
+        arrays = self.read(selected)
+        items = {}
+        for name in self.names:
+            if name in arrays:
+                items[prefix + name] = {"x": self.index, "y": arrays[name]}
+            elif name not in selected:
+                items[prefix + name] = LazySignal(self._loader(name))
+        return items
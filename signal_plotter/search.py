@@ -0,0 +1,144 @@
+""" Index of the signal names for the search bar
+
+A query is made of terms separated by "||", a name matches the query if it matches any of its terms:
+
+- `speed`: names containing the text
+- `*.speed` or `motor?.*`: glob pattern matching the whole name
+- `/^motor[0-9]+\\./`: regular expression searched in the name
+
+The search is case-insensitive unless the term contains upper case characters ("smart case").
+
+Names are indexed by the trigrams of their lower case UTF-8 bytes: each name is padded with two null bytes, so that
+every character starts a trigram. The (trigram, name) pairs are stored sorted in numpy arrays, the names containing a
+literal of three characters or more are the intersection of the names of its trigrams, and the names containing a
+shorter literal are found with a range of trigrams (all the trigrams starting with this literal).
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import re
+
+import numpy
+
+# Characters making a term a glob pattern
+GLOB_CHARACTERS = "*?["
+
+
+def _trigram(data: bytes, start: int = 0) -> int:
+    return data[start] << 16 | data[start + 1] << 8 | data[start + 2]
+
+
+class SearchIndex:
+    """Trigram index of a list of names, answering the queries of the search bar"""
+
+    def __init__(self, names=()) -> None:
+        self.names: list[str] = []
+        self.lower_names: list[str] = []
+        self.positions: dict[str, int] = {}
+        self.trigrams = numpy.empty(0, dtype=numpy.uint32)  # Sorted trigrams
+        self.ids = numpy.empty(0, dtype=numpy.int32)  # Position of the name of each trigram
+        self.add(names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.positions
+
+    def add(self, names) -> None:
+        """Add names to the index (names already indexed are ignored)"""
+        names = [name for name in dict.fromkeys(names) if name not in self.positions]
+        if not names:
+            return
+        for name in names:
+            self.positions[name] = len(self.names)
+            self.names.append(name)
+            self.lower_names.append(name.lower())
+        self._build()
+
+    def _build(self) -> None:
+        encoded = [name.encode() + b"\0\0" for name in self.lower_names]
+        lengths = numpy.fromiter(map(len, encoded), dtype=numpy.int64, count=len(encoded))
+        data = numpy.frombuffer(b"".join(encoded), dtype=numpy.uint8).astype(numpy.uint32)
+        ids = numpy.repeat(numpy.arange(len(encoded), dtype=numpy.uint64), lengths)
+
+        # A trigram starts at every byte of a name except the two padding bytes
+        valid = numpy.ones(data.size, dtype=bool)
+        ends = numpy.cumsum(lengths)
+        valid[ends - 1] = False
+        valid[ends - 2] = False
+        valid = valid[:-2]
+        trigrams = (data[:-2] << 16 | data[1:-1] << 8 | data[2:])[valid]
+
+        pairs = numpy.sort(trigrams.astype(numpy.uint64) << numpy.uint64(32) | ids[:-2][valid])
+        pairs = pairs[numpy.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        self.trigrams = (pairs >> numpy.uint64(32)).astype(numpy.uint32)
+        self.ids = (pairs & numpy.uint64(0xFFFFFFFF)).astype(numpy.int32)
+
+    def _range(self, low: int, high: int) -> numpy.ndarray:
+        """Positions of the names having a trigram in [low, high]"""
+        start = numpy.searchsorted(self.trigrams, numpy.uint32(low), side="left")
+        stop = numpy.searchsorted(self.trigrams, numpy.uint32(high), side="right")
+        return self.ids[start:stop]
+
+    def candidates(self, literal: str) -> numpy.ndarray:
+        """Sorted positions of the names which may contain a literal (ignoring case).
+
+        The result is exact for literals of at most three bytes, longer literals may have false positives.
+        """
+        data = literal.lower().encode()
+        if not data:
+            return numpy.arange(len(self.names), dtype=numpy.int32)
+        if len(data) < 3:
+            # Names having a trigram starting with the literal, a name can have several of them
+            low = data[0] << 16 | (data[1] << 8 if len(data) == 2 else 0)
+            found = numpy.zeros(len(self.names), dtype=bool)
+            found[self._range(low, low | (0xFF if len(data) == 2 else 0xFFFF))] = True
+            return numpy.flatnonzero(found).astype(numpy.int32)
+        postings = sorted(
+            (self._range(code, code) for code in {_trigram(data, i) for i in range(len(data) - 2)}), key=len
+        )
+        result = postings[0]
+        for posting in postings[1:]:
+            if not result.size:
+                break
+            result = numpy.intersect1d(result, posting, assume_unique=True)
+        return result
+
+    def _search_term(self, term: str, case_sensitive: bool | None) -> numpy.ndarray:
+        if case_sensitive is None:
+            case_sensitive = term != term.lower()
+        flags = 0 if case_sensitive else re.IGNORECASE
+        names = self.names if case_sensitive else self.lower_names
+
+        if len(term) > 2 and term.startswith("/") and term.endswith("/"):
+            search = re.compile(term[1:-1], flags).search
+            return numpy.array([i for i, name in enumerate(self.names) if search(name)], dtype=numpy.int32)
+
+        if any(character in term for character in GLOB_CHARACTERS):
+            match = re.compile(fnmatch.translate(term), flags).match
+            candidates = None
+            for literal in re.split(r"\*|\?|\[[^\]]*\]?", term):
+                if literal:
+                    positions = self.candidates(literal)
+                    candidates = positions if candidates is None else numpy.intersect1d(candidates, positions, True)
+            candidates = range(len(self.names)) if candidates is None else candidates.tolist()
+            return numpy.array([i for i in candidates if match(self.names[i])], dtype=numpy.int32)
+
+        candidates = self.candidates(term)
+        if not case_sensitive and len(term.encode()) <= 3 and term == term.lower():
+            return candidates  # The trigram lookup is exact
+        term = term if case_sensitive else term.lower()
+        return numpy.array([i for i in candidates.tolist() if term in names[i]], dtype=numpy.int32)
+
+    def search(self, query: str, case_sensitive: bool | None = None) -> numpy.ndarray:
+        """Sorted positions of the names matching a query (smart case if case_sensitive is None)"""
+        results = [self._search_term(term, case_sensitive) for term in query.split("||")]
+        if len(results) == 1:
+            return results[0]
+        return numpy.unique(numpy.concatenate(results))
+
+    def matching(self, query: str, case_sensitive: bool | None = None) -> list[str]:
+        """Names matching a query, in the order they were added"""
+        return [self.names[i] for i in self.search(query, case_sensitive).tolist()]
@@ -0,0 +1,58 @@
+""" Selection of the displayed signals, shared by the tree of signals, the subgroups and the plot"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+from pyqtgraph.Qt.QtCore import QObject, Signal
+
+
+class SelectionModel(QObject):
+    """Ordered set of the selected signal keys.
+
+    Each change emits `selectionChanged` with only the keys which were added and removed, so that the views update
+    the affected signals instead of comparing the state of every signal.
+    """
+
+    selectionChanged = Signal(list, list)  # (added keys, removed keys)
+
+    def __init__(self, keys: Iterable[str] = (), parent=None) -> None:
+        super().__init__(parent)
+        self.selected: dict[str, None] = dict.fromkeys(keys)  # Keys in selection order
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.selected
+
+    def __len__(self) -> int:
+        return len(self.selected)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.selected)
+
+    def keys(self) -> list[str]:
+        return list(self.selected)
+
+    def update(self, added: Iterable[str] = (), removed: Iterable[str] = ()) -> tuple[list[str], list[str]]:
+        """Select and deselect keys, and return the keys whose selection actually changed"""
+        removed = [key for key in dict.fromkeys(removed) if key in self.selected]
+        for key in removed:
+            del self.selected[key]
+        added = [key for key in dict.fromkeys(added) if key not in self.selected]
+        self.selected.update(dict.fromkeys(added))
+        if added or removed:
+            self.selectionChanged.emit(added, removed)
+        return added, removed
+
+    def select(self, keys: Iterable[str]) -> list[str]:
+        return self.update(added=keys)[0]
+
+    def deselect(self, keys: Iterable[str]) -> list[str]:
+        return self.update(removed=keys)[1]
+
+    def setSelection(self, keys: Iterable[str]) -> tuple[list[str], list[str]]:
+        """Select exactly the given keys"""
+        keys = dict.fromkeys(keys)
+        return self.update(added=keys, removed=[key for key in self.selected if key not in keys])
+
+    def clear(self) -> list[str]:
+        return self.deselect(list(self.selected))
@@ -0,0 +1,189 @@
+""" Hand numpy arrays over to another process through shared memory, without pickling copies
+
+The producer copies its arrays once into a named shared memory segment and only sends the (small) layout of the segment
+to the consumer, which maps the same memory and builds numpy views on it.
+"""
+
+from __future__ import annotations
+
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy
+
+from signal_plotter.lazy import normalize_items
+
+# Alignment of the arrays inside a segment (cache line)
+ALIGNMENT = 64
+
+# Entries of a signal dict which are specific to the process holding it, and not shared
+LOCAL_KEYS = {"x", "y", "loader", "state", "visible", "pending"}
+
+# Segments kept alive by this process: the numpy views are only valid as long as their segment is mapped
+_segments: dict[str, SharedMemory] = {}
+# Number of times each segment was created or attached by this process, and not released yet
+_references: dict[str, int] = {}
+# Released segments still used by views, unmapped once the views are garbage collected
+_released: list[SharedMemory] = []
+
+
+def _create_segment(size: int) -> SharedMemory:
+    try:
+        return SharedMemory(create=True, size=max(size, 1), track=False)
+    except TypeError:
+        # Python < 3.13: the segment is unregistered so that it is not destroyed when the producer process exits, the
+        # consumer takes the ownership of the segment when attaching it
+        segment = SharedMemory(create=True, size=max(size, 1))
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def _open_segment(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: the segment would be destroyed when this process exits, while others still use its name
+        segment = SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def create_arrays(specs: dict[str, tuple]) -> tuple[str, list[tuple], dict[str, numpy.ndarray]]:
+    """Allocate writable arrays in a new shared memory segment, from their (dtype, shape).
+
+    Returns:
+        The segment name and its layout, to be passed to `attach_arrays`, and the arrays.
+    """
+    layout = []
+    offset = 0
+    for name, (dtype, shape) in specs.items():
+        dtype, shape = numpy.dtype(dtype), tuple(shape)
+        layout.append((name, dtype.str, shape, offset))
+        offset += -(-dtype.itemsize * int(numpy.prod(shape)) // ALIGNMENT) * ALIGNMENT
+
+    segment = _create_segment(offset)
+    _segments[segment.name] = segment
+    _references[segment.name] = 1
+    arrays = {
+        name: numpy.frombuffer(segment.buf, dtype=dtype, count=int(numpy.prod(shape)), offset=offset).reshape(shape)
+        for name, dtype, shape, offset in layout
+    }
+    return segment.name, layout, arrays
+
+
+def share_arrays(arrays: dict[str, numpy.ndarray]) -> tuple[str, list[tuple]]:
+    """Copy arrays into a new shared memory segment.
+
+    The segment stays mapped in this process until `release` is called, which allows the consumer to attach it even on
+    platforms where a segment is destroyed as soon as no process has it open.
+
+    Returns:
+        The segment name and its layout, to be passed to `attach_arrays`.
+    """
+    arrays = {name: numpy.asarray(array) for name, array in arrays.items()}
+    name, layout, shared = create_arrays({key: (array.dtype, array.shape) for key, array in arrays.items()})
+    for key, array in arrays.items():
+        shared[key][...] = array
+    return name, layout
+
+
+def attach_arrays(name: str, layout: list[tuple], unlink: bool = True) -> dict[str, numpy.ndarray]:
+    """Map a shared memory segment created by `share_arrays` and return read-only views on its arrays.
+
+    With `unlink`, the segment name is removed right away: the memory is released by the system once every process
+    has closed it, so nothing leaks if this process exits without cleaning up.
+    """
+    segment = _segments.get(name)
+    if segment is not None:
+        # Already mapped by this process (e.g. a publisher and a subscriber of the same process)
+        if unlink:
+            _unlink(segment)
+    else:
+        segment = _segments[name] = SharedMemory(name=name) if unlink else _open_segment(name)
+        if unlink:
+            segment.unlink()
+    _references[name] = _references.get(name, 0) + 1
+
+    arrays = {}
+    for key, dtype, shape, offset in layout:
+        # frombuffer keeps the buffer exported while the views are alive, which prevents unmapping it under them
+        count = int(numpy.prod(shape))
+        array = numpy.frombuffer(segment.buf, dtype=dtype, count=count, offset=offset).reshape(shape)
+        array.flags.writeable = False
+        arrays[key] = array
+    return arrays
+
+
+def share_items(items: dict) -> tuple[str, list[tuple], dict[str, dict]]:
+    """Copy the arrays of an items dictionary of `plot_window` into a new shared memory segment. An array used by
+    several signals (e.g. the same x vector) is copied once, lazy signals are loaded.
+
+    Returns:
+        The segment name and layout, and the metadata of each signal (units, scatter...) with the names of its "x" and
+        "y" arrays in the segment, to be passed to `attach_items`.
+    """
+    arrays, names, signals = {}, {}, {}
+    for key, value in normalize_items(items).items():
+        metadata = {k: v for k, v in value.items() if k not in LOCAL_KEYS}
+        x, y = value["loader"].load() if "y" not in value else (value.get("x"), value["y"])
+        for axis, array in (("x", x), ("y", y)):
+            if array is None:
+                continue
+            name = names.get(id(array))
+            if name is None:
+                name = names[id(array)] = str(len(arrays))
+                arrays[name] = array
+            metadata[axis] = name
+        signals[key] = metadata
+    name, layout = share_arrays(arrays)
+    return name, layout, signals
+
+
+def attach_items(name: str, layout: list[tuple], signals: dict[str, dict], unlink: bool = True) -> dict[str, dict]:
+    """Map a segment created by `share_items` and return the items dictionary of its signals (see `attach_arrays`)"""
+    arrays = attach_arrays(name, layout, unlink=unlink)
+    return {
+        key: {k: (arrays[v] if k in ("x", "y") else v) for k, v in metadata.items()} for key, metadata in signals.items()
+    }
+
+
+def _unlink(segment: SharedMemory) -> None:
+    """Remove the name of a segment created or opened by this module, which is not tracked by the resource tracker"""
+    tracked = sys.version_info < (3, 13)
+    if tracked:
+        # Python < 3.13: unlink always unregisters the segment from the resource tracker
+        resource_tracker.register(segment._name, "shared_memory")
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        # Already unlinked by a consumer
+        if tracked:
+            resource_tracker.unregister(segment._name, "shared_memory")
+
+
+def _close(segment: SharedMemory) -> bool:
+    try:
+        segment.close()
+        return True
+    except BufferError:
+        return False
+
+
+def release(name: str, unlink: bool = False) -> None:
+    """Stop keeping a segment mapped in this process. It is unmapped once the views on it are garbage collected.
+
+    With `unlink`, the segment name is also removed, for segments attached by several consumers with `unlink=False`.
+    """
+    _released[:] = [segment for segment in _released if not _close(segment)]
+    segment = _segments.get(name)
+    if segment is not None:
+        if unlink:
+            _unlink(segment)
+        _references[name] -= 1
+        if _references[name] > 0:
+            return
+        del _segments[name], _references[name]
+        if not _close(segment):
+            # Views are still alive, the segment is closed by a later release
+            _released.append(segment)
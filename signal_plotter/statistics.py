@@ -0,0 +1,176 @@
+""" Statistics (min, max, mean, RMS, peak-to-peak) of a signal over any range of its samples in bounded time
+
+The samples are grouped in blocks whose sums, sums of squares, finite counts, minimums and maximums are computed once.
+A range is then reduced from the prefix sums of the blocks, a sparse table of their minimums and maximums (two lookups
+for any number of blocks), and the samples of the partial blocks at its ends.
+
+This is not strictly constant time: a query also scans up to two partial blocks. Prefix sums over every sample would
+make the sums O(1), but at 24 bytes per sample (and the minimums and maximums would still need the blocks). Instead, the
+block size grows with the signal so that the size of the sparse table stays reasonable, up to `MAX_BLOCK` samples: a
+query costs at most two table lookups and `2 * MAX_BLOCK` samples, whatever the length of the range and of the signal.
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from signal_plotter.profiling import profiled
+
+# Minimum and maximum number of samples per block (powers of two). MAX_BLOCK bounds the samples scanned by a query.
+MIN_BLOCK = 1024
+MAX_BLOCK = 1 << 16
+# Number of blocks above which the blocks are made larger (up to MAX_BLOCK), which bounds the size of the sparse table
+# (MAX_BLOCKS * log2(MAX_BLOCKS) per envelope) for signals of less than MAX_BLOCK * MAX_BLOCKS samples
+MAX_BLOCKS = 1 << 16
+# Number of samples reduced at once when building the blocks
+CHUNK = 1 << 20
+
+
+def _block_size(size: int) -> int:
+    block = MIN_BLOCK
+    while size > block * MAX_BLOCKS and block < MAX_BLOCK:
+        block *= 2
+    return block
+
+
+class RangeStatistics:
+    """Min, max, mean, RMS and peak-to-peak of a signal over ranges of its samples (NaN samples are ignored).
+
+    The sums are accumulated relatively to the first finite sample, to keep their precision when the signal has a
+    large offset.
+    """
+
+    @profiled("statistics.build")
+    def __init__(self, x, y) -> None:
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.block = MIN_BLOCK
+        self.offset = 0.0
+        self._sums = np.empty(0)  # Sums of the complete blocks (relative to the offset)
+        self._squares = np.empty(0)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._mins = np.empty(0)
+        self._maxs = np.empty(0)
+        self.extend(x, y)
+
+    def __len__(self) -> int:
+        return self.y.size
+
+    @profiled("statistics.extend")
+    def extend(self, x, y) -> None:
+        """Update the statistics for new values of the signal, whose first samples are the ones already processed"""
+        x = np.asarray(x).ravel()
+        y = np.asarray(y).ravel()
+        if x.shape != y.shape:
+            raise ValueError(f"x and y must have the same length: {x.size} != {y.size}")
+        if y.size < self.y.size:
+            raise ValueError("The statistics can only be extended with new samples")
+        block = _block_size(y.size)
+        done = self._counts.size if block == self.block else 0  # Complete blocks already reduced
+        if done == 0:
+            finite = y[np.isfinite(y)][:1]
+            self.offset = float(finite[0]) if finite.size else 0.0
+        self.x, self.y, self.block = x, y, block
+
+        # Reduce the new complete blocks (the samples of the last partial block are reduced by the queries), by chunks
+        # to bound the memory of the temporary arrays
+        sums, squares, counts = [self._sums[:done]], [self._squares[:done]], [self._counts[:done]]
+        mins, maxs = [self._mins[:done]], [self._maxs[:done]]
+        chunk = max(CHUNK // block, 1)
+        for start in range(done, y.size // block, chunk):
+            stop = min(start + chunk, y.size // block)
+            values = y[start * block : stop * block].reshape(stop - start, block).astype(np.float64) - self.offset
+            finite = np.isfinite(values)
+            with np.errstate(invalid="ignore"):
+                mins.append(np.fmin.reduce(values, axis=1))
+                maxs.append(np.fmax.reduce(values, axis=1))
+            values[~finite] = 0.0
+            sums.append(values.sum(axis=1))
+            squares.append(np.square(values, out=values).sum(axis=1))
+            counts.append(finite.sum(axis=1))
+        self._sums, self._squares, self._counts = np.concatenate(sums), np.concatenate(squares), np.concatenate(counts)
+        self._mins, self._maxs = np.concatenate(mins), np.concatenate(maxs)
+        self._prefix_sums = np.concatenate(([0.0], np.cumsum(self._sums)))
+        self._prefix_squares = np.concatenate(([0.0], np.cumsum(self._squares)))
+        self._prefix_counts = np.concatenate(([0], np.cumsum(self._counts)))
+
+        # Sparse tables: level k holds the extremum of the 2**k blocks starting at each block
+        self._min_table = [self._mins]
+        self._max_table = [self._maxs]
+        width = 1
+        while 2 * width <= self._mins.size:
+            self._min_table.append(np.fmin(self._min_table[-1][:-width], self._min_table[-1][width:]))
+            self._max_table.append(np.fmax(self._max_table[-1][:-width], self._max_table[-1][width:]))
+            width *= 2
+
+    def indices(self, start: float, stop: float) -> tuple[int, int]:
+        """Range [first, last) of the samples whose x is between start and stop (x must be increasing)"""
+        return self._search(start, "left"), self._search(stop, "right")
+
+    def _search(self, value: float, side: str) -> int:
+        # The value is given the dtype of x, otherwise numpy would convert the whole array to compare them
+        dtype = self.x.dtype
+        if np.issubdtype(dtype, np.integer):
+            info = np.iinfo(dtype)
+            value = min(max(value, info.min), info.max)
+            value = dtype.type(math.ceil(value) if side == "left" else math.floor(value))
+        elif np.issubdtype(dtype, np.floating):
+            value = dtype.type(value)
+        return int(np.searchsorted(self.x, value, side=side))
+
+    def query(self, start: float | None = None, stop: float | None = None) -> dict | None:
+        """Statistics of the samples whose x is between start and stop (the whole signal if not given), or None if
+        there is no finite sample in the range"""
+        first, last = self.indices(
+            -np.inf if start is None else start,
+            np.inf if stop is None else stop,
+        )
+        return self.reduce(first, last)
+
+    def reduce(self, first: int, last: int) -> dict | None:
+        """Statistics of the samples [first, last), from the blocks and at most `2 * block` samples at the ends"""
+        first, last = max(first, 0), min(last, self.y.size)
+        if first >= last:
+            return None
+        block = self.block
+        # Complete blocks of the range, the samples before and after them are reduced directly
+        first_block = -(-first // block)
+        last_block = min(last // block, self._counts.size)
+        if first_block >= last_block:
+            parts = [self.y[first:last]]
+            first_block = last_block = 0
+        else:
+            parts = [self.y[first : first_block * block], self.y[last_block * block : last]]
+
+        total = self._prefix_sums[last_block] - self._prefix_sums[first_block]
+        squares = self._prefix_squares[last_block] - self._prefix_squares[first_block]
+        count = int(self._prefix_counts[last_block] - self._prefix_counts[first_block])
+        low, high = np.inf, -np.inf
+        if last_block > first_block:
+            level = (last_block - first_block).bit_length() - 1
+            other = last_block - (1 << level)
+            low = np.fmin(self._min_table[level][first_block], self._min_table[level][other])
+            high = np.fmax(self._max_table[level][first_block], self._max_table[level][other])
+        for part in parts:
+            values = part[np.isfinite(part)].astype(np.float64) - self.offset
+            if values.size:
+                total += values.sum()
+                squares += np.square(values).sum()
+                count += values.size
+                low, high = min(low, values.min()), max(high, values.max())
+        if count == 0:
+            return None
+
+        mean = total / count
+        # Mean of the squares of the values: E[(v + offset)^2] = E[v^2] + 2 offset E[v] + offset^2
+        mean_square = squares / count + 2 * self.offset * mean + self.offset**2
+        return {
+            "count": count,
+            "min": float(low + self.offset),
+            "max": float(high + self.offset),
+            "mean": float(mean + self.offset),
+            "rms": float(np.sqrt(max(mean_square, 0.0))),
+            "ptp": float(high - low),
+        }
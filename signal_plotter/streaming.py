@@ -0,0 +1,152 @@
+""" Live plotting of signals pushed by producer threads or asyncio tasks
+
+Producers append samples to a `SignalStream`, which keeps a bounded history of each signal in preallocated ring
+buffers. The window redraws at a capped frame rate: each frame coalesces all the samples appended since the previous
+one and only refreshes the displayed signals which received new samples.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import numpy
+from pyqtgraph.Qt.QtCore import QTimer
+
+from signal_plotter.buffers import RingBuffer
+from signal_plotter.plot_window import PlotWindow, plot_window
+
+
+class SignalStream:
+    """Thread-safe container of live signals.
+
+    `append` and `extend` only hold a lock while copying the samples into the ring buffers, they can be called from
+    any thread (including the thread of an asyncio event loop) without blocking on the GUI.
+    """
+
+    def __init__(self, capacity: int = 100_000) -> None:
+        self.capacity = capacity  # Default number of samples kept for each signal
+        self._lock = threading.Lock()
+        self._buffers: dict[str, tuple[RingBuffer, RingBuffer]] = {}
+        self._metadata: dict[str, dict] = {}
+        self._new: list[str] = []  # Signals added since the last collect
+        self._dirty: set[str] = set()  # Signals which received samples since the last collect
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._buffers
+
+    def keys(self) -> list[str]:
+        return list(self._buffers)
+
+    def add_signal(self, name: str, capacity: int | None = None, **metadata) -> None:
+        """Declare a signal with its metadata (units, scatter, alpha...) and the number of samples kept"""
+        with self._lock:
+            self._add_signal(name, capacity, metadata)
+
+    def _add_signal(self, name: str, capacity: int | None, metadata: dict) -> None:
+        if name in self._buffers:
+            self._metadata[name].update(metadata)
+            return
+        capacity = capacity if capacity is not None else self.capacity
+        self._buffers[name] = (RingBuffer(capacity), RingBuffer(capacity))
+        self._metadata[name] = metadata
+        self._new.append(name)
+
+    def append(self, name: str, x, y) -> None:
+        """Append samples (scalars or arrays) to a signal, declaring it if needed"""
+        self.extend({name: (x, y)})
+
+    def extend(self, samples: dict) -> None:
+        """Append samples to several signals at once: {name: (x, y)}"""
+        with self._lock:
+            for name, (x, y) in samples.items():
+                x, y = numpy.ravel(x), numpy.ravel(y)
+                if x.shape != y.shape:
+                    raise ValueError(f"x and y of {name} must have the same length: {x.size} != {y.size}")
+                if name not in self._buffers:
+                    self._add_signal(name, None, {})
+                x_buffer, y_buffer = self._buffers[name]
+                x_buffer.extend(x)
+                y_buffer.extend(y)
+                self._dirty.add(name)
+
+    def collect(self) -> tuple[dict[str, dict], dict[str, tuple]]:
+        """Return the signals added and the (x, y) views of the signals updated since the previous call"""
+        with self._lock:
+            new = {
+                name: {
+                    **self._metadata[name],
+                    # The history of a ring buffer is not append-only, it can't be downsampled with a pyramid
+                    "pyramid": False,
+                    "x": self._buffers[name][0].data,
+                    "y": self._buffers[name][1].data,
+                }
+                for name in self._new
+            }
+            updated = {name: (self._buffers[name][0].data, self._buffers[name][1].data) for name in self._dirty}
+            self._new = []
+            self._dirty = set()
+        return new, updated
+
+
+def stream_to_window(
+    window: PlotWindow, stream: SignalStream, max_fps: float = 30.0, pre_select: list[str] | None = None
+) -> QTimer:
+    """Redraw the window with the samples of the stream at most `max_fps` times per second.
+
+    Signals of `pre_select` are selected as soon as they appear in the stream. The stream can be any object whose
+    `collect` returns the signals added (or replaced) and updated, like `SignalStream.collect`. Signals with a "group"
+    metadata are added to the sub groups of the window, if it has sub groups.
+    """
+
+    def add_groups(new: dict) -> None:
+        sub_groups = window.listWidget.listSubGroups
+        if sub_groups is None:
+            return
+        changed = False
+        for name, value in new.items():
+            group = value.get("group")
+            if group is not None and name not in sub_groups.get(group, ()):
+                sub_groups.setdefault(group, []).append(name)
+                changed = True
+        if changed and all(name in window.items for name in new):
+            window.listWidget.resetUI()  # Otherwise done when the new signals are added
+
+    def redraw() -> None:
+        new, updated = stream.collect()
+        if new:
+            add_groups(new)
+            window.setSignals(new)
+            selected = [name for name in new if pre_select is not None and name in pre_select]
+            if selected:
+                window.listWidget.selection.select(selected)
+        for name, (x, y) in updated.items():
+            window.items[name]["x"] = x
+            window.items[name]["y"] = y
+        if updated:
+            window.updateSignals(updated.keys())
+
+    timer = QTimer(window)
+    timer.timeout.connect(redraw)
+    timer.start(max(int(1000 / max_fps), 1))
+    return timer
+
+
+def plot_stream(stream: SignalStream, max_fps: float = 30.0, pre_select: list[str] = None, **kwargs) -> None:
+    """
+    Initialize an oscilloscope-like window displaying the live signals of a stream.
+
+    Args:
+        stream (SignalStream): Stream filled by the producers, which must be started before calling this function.
+        max_fps (float): Maximum number of redraws per second.
+        pre_select (list[str]): List of signal names to be selected when they appear in the stream.
+        **kwargs: Other arguments of plot_window.
+
+    Returns:
+        None: None
+    """
+
+    def setup(window: PlotWindow) -> None:
+        # Keep a reference to the timer in the window
+        window.stream_timer = stream_to_window(window, stream, max_fps, pre_select)
+
+    plot_window({}, setup=setup, **kwargs)
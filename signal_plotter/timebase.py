@@ -0,0 +1,73 @@
+""" Normalization of the arrays of the signals when they are given to the plotter
+
+The arrays of a signal are converted once, when the signal is added to the window, into contiguous 1D read-only
+arrays: the plot then only passes views of them around instead of converting or copying them at each replot. Arrays
+which already are contiguous are not copied (a read-only view is taken).
+
+Signals logged together usually share the same x vector, possibly as separate but identical arrays (e.g. one
+`numpy.linspace` per signal, or one index per csv file). The `TimebaseRegistry` detects them and keeps a single array.
+"""
+
+from __future__ import annotations
+
+import weakref
+
+import numpy
+
+# Number of values of a vector compared before comparing the whole vectors
+FINGERPRINT_SAMPLES = 32
+
+
+def as_signal_array(values) -> numpy.ndarray:
+    """Contiguous 1D read-only array of the values, without copying them if they already are a contiguous array"""
+    array = numpy.ravel(values)
+    if not array.flags.c_contiguous:
+        array = numpy.ascontiguousarray(array)
+    if array.flags.writeable:
+        array = array.view()
+        array.flags.writeable = False
+    return array
+
+
+class TimebaseRegistry:
+    """Registry of the x vectors of the signals, returning the same array for identical vectors.
+
+    Vectors are first compared by a fingerprint (size, dtype and a sample of their values), then by value. The registry
+    only holds weak references: a timebase is released as soon as no signal uses it.
+    """
+
+    def __init__(self) -> None:
+        self.timebases: dict[tuple, list[weakref.ref]] = {}  # fingerprint -> timebases
+        self.sources: dict[int, tuple[weakref.ref, weakref.ref]] = {}  # id of a registered array -> (array, timebase)
+
+    def __len__(self) -> int:
+        return sum(ref() is not None for refs in self.timebases.values() for ref in refs)
+
+    @staticmethod
+    def fingerprint(x: numpy.ndarray) -> tuple:
+        step = max(x.size // FINGERPRINT_SAMPLES, 1)
+        return x.size, x.dtype.str, x[::step].tobytes(), x[-1:].tobytes()
+
+    def register(self, values) -> numpy.ndarray:
+        """Normalized x vector of a signal, shared with the signals having the same values"""
+        if isinstance(values, numpy.ndarray):
+            # The same array is usually given for many signals, it is only compared once
+            source = self.sources.get(id(values))
+            if source is not None and source[0]() is values and source[1]() is not None:
+                return source[1]()
+
+        x = as_signal_array(values)
+        refs = self.timebases.setdefault(self.fingerprint(x), [])
+        refs[:] = [ref for ref in refs if ref() is not None]
+        for ref in refs:
+            timebase = ref()
+            if timebase is not None and numpy.array_equal(timebase, x):
+                break
+        else:
+            timebase = x
+            refs.append(weakref.ref(timebase))
+
+        if isinstance(values, numpy.ndarray):
+            key = id(values)
+            self.sources[key] = (weakref.ref(values, lambda _, key=key: self.sources.pop(key, None)), weakref.ref(timebase))
+        return timebase
@@ -0,0 +1,473 @@
+""" Item model of the tree of signals
+
+The dotted signal names are indexed once in a tree of `TreeNode`, each node knowing how many signals are below it and
+how many of them are checked or match the search. The `SignalTreeModel` exposes this tree to a QTreeView:
+
+- the rows of a node are only computed (sorted and filtered by the search) when the view asks for them, i.e. when the
+  node is expanded, and they are given to the view by batches (`fetchMore`) for nodes with many children;
+- the search only inserts and removes the rows which appear or disappear, in the nodes whose rows were computed;
+- checking a row selects the signals below it which match the search in the `SelectionModel`, and the changes of the
+  selection only update the counters of the affected signals and of their ancestors, and the rows which are currently
+  loaded by the view;
+- pending signals (listed before their data is available) are greyed out and can't be checked.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Callable, Iterable
+
+from pyqtgraph.Qt.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+from signal_plotter.profiling import profiled
+from signal_plotter.selection import SelectionModel
+
+# Number of rows given to the view at once
+FETCH_BATCH = 1000
+# Number of rows shown or hidden by a search above which the view is told of a layout change (which keeps its expanded
+# and selected rows) instead of the insertion and removal of each run of rows
+MAX_ROW_CHANGES = 100
+
+
+def _int(value) -> int:
+    """Integer value of a Qt enum (enums are not ints with every Qt binding)"""
+    return int(getattr(value, "value", value))
+
+
+def _runs(rows: list[int]) -> list[tuple[int, int]]:
+    """Runs (first, last) of consecutive numbers of a sorted list"""
+    runs = []
+    for row in rows:
+        if runs and runs[-1][1] == row - 1:
+            runs[-1] = (runs[-1][0], row)
+        else:
+            runs.append((row, row))
+    return runs
+
+
+class TreeNode:
+    """Node of the name tree, for a path segment of the signal names"""
+
+    __slots__ = (
+        "name",
+        "path",
+        "parent",
+        "children",
+        "is_signal",
+        "matches",
+        "total",
+        "checked",
+        "visible",
+        "visible_checked",
+        "rows",
+        "loaded",
+        "row",
+        "generation",
+    )
+
+    def __init__(self, name: str, path: str, parent: TreeNode | None) -> None:
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.children: dict[str, TreeNode] | None = None
+        self.is_signal = False  # Whether the path is the key of a signal
+        self.matches = True  # Whether the signal of this node matches the search
+        self.total = 0  # Number of signals at or below this node
+        self.checked = 0  # Number of checked signals at or below this node
+        self.visible = 0  # Number of signals matching the search at or below this node
+        self.visible_checked = 0  # Number of checked signals matching the search at or below this node
+        self.rows: list[TreeNode] | None = None  # Children shown by the view, computed on demand
+        self.loaded = 0  # Number of rows given to the view
+        self.row = 0  # Row of this node in the rows of its parent
+        self.generation = -1  # Model generation of `rows`
+
+    def signals(self, matching: bool = False) -> Iterable[TreeNode]:
+        """Nodes of the signals at or below this node (only the ones matching the search if `matching`)"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.is_signal and (node.matches or not matching):
+                yield node
+            if node.children:
+                stack.extend(child for child in node.children.values() if child.visible or not matching)
+
+
+class SignalTreeModel(QAbstractItemModel):
+    """Two columns model (name with a check box, units) of a tree of dotted signal names"""
+
+    def __init__(
+        self,
+        keys: Iterable[str] = (),
+        selection: SelectionModel | None = None,
+        units: Callable[[str], str | None] = None,
+        pending: Callable[[str], bool] = None,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self.root = TreeNode("", "", None)
+        self.nodes: dict[str, TreeNode] = {}  # Nodes of the signals, by key
+        self.selection = selection if selection is not None else SelectionModel(parent=self)
+        self.selection.selectionChanged.connect(self.selectionChanged)
+        self.units = units if units is not None else (lambda key: None)
+        self.pending = pending if pending is not None else (lambda key: False)
+        self.generation = 0  # Incremented when the rows are invalidated (reset of the model)
+        self._insert(keys)
+
+    # region Name index
+    def _insert(self, keys: Iterable[str]) -> list[str]:
+        inserted = []
+        for key in keys:
+            if key in self.nodes:
+                continue
+            node = self.root
+            path = ""
+            for name in key.split("."):
+                path = f"{path}.{name}" if path else name
+                if node.children is None:
+                    node.children = {}
+                child = node.children.get(name)
+                if child is None:
+                    child = node.children[name] = TreeNode(name, path, node)
+                node = child
+            node.is_signal = True
+            self.nodes[key] = node
+            inserted.append(key)
+        nodes = [self.nodes[key] for key in inserted]
+        self._propagate(nodes, "total", 1)
+        self._propagate(nodes, "visible", 1)
+        checked = [node for node in nodes if node.path in self.selection]
+        self._propagate(checked, "checked", 1)
+        self._propagate(checked, "visible_checked", 1)
+        return inserted
+
+    def addKeys(self, keys: Iterable[str]) -> None:
+        """Add signals to the tree (the rows are recomputed)"""
+        self.beginResetModel()
+        self._insert(keys)
+        self.generation += 1
+        self.endResetModel()
+
+    @profiled("tree.model.setVisibleKeys")
+    def setVisibleKeys(self, shown: Iterable[str], hidden: Iterable[str]) -> None:
+        """Show the rows of the `shown` signals and hide the ones of the `hidden` signals.
+
+        Only the rows which appear or disappear are inserted or removed, in the nodes whose rows were computed: the
+        other rows, and the expanded and selected rows of the view, are kept.
+        """
+        updated = set()
+        for keys, matches in ((shown, True), (hidden, False)):
+            nodes = [node for node in map(self.nodes.__getitem__, keys) if node.matches != matches]
+            for node in nodes:
+                node.matches = matches
+            updated.update(self._propagate(nodes, "visible", 1 if matches else -1))
+            checked = [node for node in nodes if node.path in self.selection]
+            updated.update(self._propagate(checked, "visible_checked", 1 if matches else -1))
+
+        children: dict[TreeNode, list[TreeNode]] = {}
+        for node in updated:
+            if node.parent is not None and node.parent.generation == self.generation:
+                if bool(node.visible) != self._isRow(node):
+                    children.setdefault(node.parent, []).append(node)
+        # From the root to the leaves, so that the rows below a removed row are not updated
+        parents = sorted(children, key=lambda node: node.path.count(".") if node is not self.root else -1)
+        if sum(map(len, children.values())) > MAX_ROW_CHANGES:
+            self._relayout(parents, children)
+        else:
+            for parent in parents:
+                if self._isStale(parent):
+                    continue
+                self._updateRows(parent, children[parent])
+        # The check boxes of the groups only count the signals matching the search
+        self.refresh(updated)
+
+    def _isStale(self, parent: TreeNode) -> bool:
+        """Whether the rows of a node don't need to be updated, forgetting them if the view doesn't know them (they are
+        computed again if they are needed)"""
+        if parent.generation != self.generation:
+            return True
+        if not self.isLoaded(parent):
+            self._invalidate(parent)
+            return True
+        return False
+
+    def _isRow(self, node: TreeNode) -> bool:
+        """Whether a node is in the (computed) rows of its parent"""
+        rows = node.parent.rows
+        return node.row < len(rows) and rows[node.row] is node
+
+    def _invalidate(self, node: TreeNode) -> None:
+        """Forget the computed rows of a node and of the nodes below it"""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.generation == self.generation:
+                node.generation = -1
+                stack.extend(node.rows)
+
+    def _renumber(self, parent: TreeNode, first: int, last: int) -> None:
+        for row in range(first, min(last, len(parent.rows))):
+            parent.rows[row].row = row
+
+    def _relayout(self, parents: list[TreeNode], children: dict[TreeNode, list[TreeNode]]) -> None:
+        """Compute the rows of the parents again, in a single layout change of the view"""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        nodes = [index.internalPointer() for index in persistent]
+        for parent in parents:
+            if self._isStale(parent):
+                continue
+            for node in children[parent]:
+                if not node.visible:
+                    self._invalidate(node)
+            parent.rows = sorted((child for child in parent.children.values() if child.visible), key=lambda child: child.name)
+            parent.loaded = min(len(parent.rows), max(parent.loaded, FETCH_BATCH))
+            self._renumber(parent, 0, len(parent.rows))
+        self.changePersistentIndexList(
+            persistent,
+            [
+                self.indexFromNode(node, index.column()) if self.isLoaded(node) else QModelIndex()
+                for node, index in zip(nodes, persistent)
+            ],
+        )
+        self.layoutChanged.emit()
+
+    def _updateRows(self, parent: TreeNode, nodes: list[TreeNode]) -> None:
+        """Remove the rows of the hidden `nodes` of a parent, and insert the rows of its shown `nodes`, by runs of
+        consecutive rows. Only the rows given to the view are notified, the numbers of the other rows are updated at
+        the end."""
+        index = self.indexFromNode(parent)
+        rows = parent.rows
+
+        # From the last run, so that the rows of the previous runs don't move
+        removed = sorted(node.row for node in nodes if not node.visible)
+        for first, last in reversed(_runs(removed)):
+            for node in rows[first : last + 1]:
+                self._invalidate(node)
+            if first < parent.loaded:
+                shown = min(last, parent.loaded - 1)
+                self.beginRemoveRows(index, first, shown)
+                del rows[first : last + 1]
+                parent.loaded -= shown - first + 1
+                self._renumber(parent, first, parent.loaded)
+                self.endRemoveRows()
+            else:
+                del rows[first : last + 1]
+
+        inserted = sorted((node for node in nodes if node.visible), key=lambda node: node.name)
+        if inserted:
+            # Final row of each inserted node in the merged rows, sorted by name
+            merged = sorted(rows + inserted, key=lambda node: node.name)
+            new = {id(node) for node in inserted}
+            positions = [row for row, node in enumerate(merged) if id(node) in new]
+            for first, last in _runs(positions):
+                visible = first < parent.loaded or parent.loaded == len(rows)
+                if visible:
+                    self.beginInsertRows(index, first, last)
+                rows[first:first] = merged[first : last + 1]
+                if visible:
+                    parent.loaded += last - first + 1
+                    self._renumber(parent, first, parent.loaded)
+                    self.endInsertRows()
+        self._renumber(parent, 0, len(rows))
+
+    def _propagate(self, nodes: Iterable[TreeNode], counter: str, step: int) -> list[TreeNode]:
+        """Add `step` to a counter of the nodes and of their ancestors, level by level, and return the updated nodes"""
+        updated = []
+        level = Counter(nodes)
+        while level:
+            parents = Counter()
+            for node, count in level.items():
+                setattr(node, counter, getattr(node, counter) + step * count)
+                updated.append(node)
+                if node.parent is not None:
+                    parents[node.parent] += count
+            level = parents
+        return updated
+
+    # endregion Name index
+
+    # region Rows
+    def nodeFromIndex(self, index: QModelIndex) -> TreeNode:
+        return index.internalPointer() if index.isValid() else self.root
+
+    def rowsOf(self, node: TreeNode) -> list[TreeNode]:
+        """Visible children of a node, sorted by name"""
+        if node.generation != self.generation:
+            children = node.children.values() if node.children else ()
+            node.rows = sorted((child for child in children if child.visible), key=lambda child: child.name)
+            for row, child in enumerate(node.rows):
+                child.row = row
+            node.loaded = min(len(node.rows), FETCH_BATCH)
+            node.generation = self.generation
+        return node.rows
+
+    def isLoaded(self, node: TreeNode) -> bool:
+        """Whether the row of a node has been given to the view"""
+        while node.parent is not None:
+            parent = node.parent
+            if parent.generation != self.generation or node.row >= parent.loaded or parent.rows[node.row] is not node:
+                return False
+            node = parent
+        return True
+
+    def indexFromNode(self, node: TreeNode, column: int = 0) -> QModelIndex:
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+    def indexFromPath(self, path: str) -> QModelIndex:
+        """Index of the row of a path, loading the rows leading to it, or an invalid index if it is not shown"""
+        node = self.root
+        for name in path.split("."):
+            child = node.children.get(name) if node.children else None
+            if child is None or not child.visible:
+                return QModelIndex()
+            self.rowsOf(node)
+            if child.row >= node.loaded:
+                self.beginInsertRows(self.indexFromNode(node), node.loaded, child.row)
+                node.loaded = child.row + 1
+                self.endInsertRows()
+            node = child
+        return self.indexFromNode(node)
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        node = self.nodeFromIndex(parent)
+        rows = self.rowsOf(node)
+        if row < 0 or row >= node.loaded or column < 0 or column > 1:
+            return QModelIndex()
+        return self.createIndex(row, column, rows[row])
+
+    def parent(self, index: QModelIndex = None) -> QModelIndex:
+        if index is None:
+            return super().parent()  # QObject.parent
+        if not index.isValid():
+            return QModelIndex()
+        return self.indexFromNode(index.internalPointer().parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        node = self.nodeFromIndex(parent)
+        self.rowsOf(node)
+        return node.loaded
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if parent.column() > 0:
+            return False
+        node = self.nodeFromIndex(parent)
+        return node.visible - (1 if node.is_signal and node.matches else 0) > 0
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        node = self.nodeFromIndex(parent)
+        return node.generation == self.generation and node.loaded < len(node.rows)
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        node = self.nodeFromIndex(parent)
+        loaded = min(len(node.rows), node.loaded + FETCH_BATCH)
+        self.beginInsertRows(parent, node.loaded, loaded - 1)
+        node.loaded = loaded
+        self.endInsertRows()
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 2
+
+    # endregion Rows
+
+    # region Data
+    def checkState(self, node: TreeNode):
+        """Check state of a row, from the signals matching the search below it (all of them if none matches)"""
+        checked, total = (node.visible_checked, node.visible) if node.visible else (node.checked, node.total)
+        if checked == 0:
+            return Qt.Unchecked
+        if checked == total:
+            return Qt.Checked
+        return Qt.PartiallyChecked
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if index.column() == 0:
+            if role == Qt.DisplayRole:
+                return node.name
+            if role == Qt.CheckStateRole:
+                return self.checkState(node)
+        elif index.column() == 1 and node.is_signal:
+            if role == Qt.DisplayRole:
+                units = self.units(node.path)
+                return f"[{units}]" if units is not None else ""
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignRight
+        return None
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        node = index.internalPointer()
+        if node.is_signal and not node.children and self.pending(node.path):
+            return Qt.ItemIsSelectable
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        # Only the signals shown by the search are checked or unchecked
+        keys = sorted(node.path for node in index.internalPointer().signals(matching=True) if not self.pending(node.path))
+        if _int(value) == _int(Qt.Checked):
+            self.selection.select(keys)
+        else:
+            self.selection.deselect(keys)
+        return True
+
+    @profiled("tree.model.selectionChanged")
+    def selectionChanged(self, added: list[str], removed: list[str]) -> None:
+        """Update the check boxes of the signals whose selection changed and of their ancestors"""
+        updated = []
+        for keys, step in ((added, 1), (removed, -1)):
+            nodes = [self.nodes[key] for key in keys if key in self.nodes]
+            updated += self._propagate(nodes, "checked", step)
+            self._propagate([node for node in nodes if node.matches], "visible_checked", step)
+        if len(updated) > FETCH_BATCH:
+            self.refreshLoaded()
+        else:
+            self.refresh(updated)
+
+    def refresh(self, nodes: Iterable[TreeNode], all_columns: bool = False) -> None:
+        """Emit dataChanged for the rows of the nodes which are loaded by the view, grouped by parent (only for their
+        check state, unless `all_columns`)"""
+        ranges: dict[int, list] = {}
+        for node in nodes:
+            if node is self.root or not self.isLoaded(node):
+                continue
+            entry = ranges.setdefault(id(node.parent), [node.parent, node.row, node.row])
+            entry[1] = min(entry[1], node.row)
+            entry[2] = max(entry[2], node.row)
+        for parent, first, last in ranges.values():
+            self.dataChanged.emit(
+                self.createIndex(first, 0, parent.rows[first]),
+                self.createIndex(last, 1 if all_columns else 0, parent.rows[last]),
+                [] if all_columns else [Qt.CheckStateRole],
+            )
+
+    def refreshKeys(self, keys: Iterable[str]) -> None:
+        """Emit dataChanged for the rows of signals whose state or metadata changed (e.g. no longer pending)"""
+        self.refresh((self.nodes[key] for key in keys if key in self.nodes), all_columns=True)
+
+    def refreshLoaded(self) -> None:
+        """Emit dataChanged for all the rows loaded by the view"""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.generation != self.generation or not node.loaded:
+                continue
+            self.dataChanged.emit(
+                self.createIndex(0, 0, node.rows[0]),
+                self.createIndex(node.loaded - 1, 0, node.rows[node.loaded - 1]),
+                [Qt.CheckStateRole],
+            )
+            stack.extend(node.rows[: node.loaded])
+
+    # endregion Data
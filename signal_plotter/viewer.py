@@ -0,0 +1,251 @@
+""" Non-blocking viewers: display signals while the script keeps running, and push new or updated signals to them
+
+`Viewer` displays the window with the Qt application of the current process (reused if it already exists, e.g. in an
+IPython session with `%gui qt`), `ProcessViewer` runs it in a child process so that a plain script is never blocked by
+the event loop. Both return immediately and have the same interface:
+
+    viewer = view(items, pre_select=["motor.speed"], process=True)
+    ...
+    viewer.set_signals({"motor.speed": {"x": t, "y": speed}})  # New or updated signals
+    viewer.wait()  # Optional: block until the window is closed
+
+The arrays pushed to a `ProcessViewer` are copied once into shared memory (see `shared_memory.share_items`) and mapped
+by the child process without another copy. The script unmaps its segment as soon as the child has attached it, and the
+child releases it once all its signals were replaced.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+
+from pyqtgraph.Qt.QtCore import QEventLoop, QTimer
+
+from signal_plotter import shared_memory
+from signal_plotter.plot_window import PlotWindow, create_window, get_application
+
+logger = logging.getLogger('plot_window_tree')
+
+
+class Viewer:
+    """Window displayed by the Qt application of this process, without waiting for it to be closed.
+
+    The window is only redrawn while the event loop runs: in an interactive session integrated with Qt, or during
+    `process_events` and `wait`. The methods must be called from the thread of the Qt application.
+    """
+
+    def __init__(
+        self,
+        items: dict | None = None,
+        pre_select: list[str] | None = None,
+        x_component: str | None = None,
+        sub_groups: dict[str, list[str]] | None = None,
+        **kwargs,
+    ) -> None:
+        self.app = get_application()
+        self.main_window = create_window(items if items is not None else {}, pre_select, x_component, sub_groups, **kwargs)
+        self.window: PlotWindow = self.main_window.centralWidget()
+
+    @property
+    def is_open(self) -> bool:
+        return self.main_window.isVisible()
+
+    def set_signals(self, items: dict) -> None:
+        """Add new signals and replace the data of the existing ones (same format as the items of plot_window)"""
+        self.window.setSignals(items)
+
+    def select(self, keys: list[str]) -> None:
+        """Add signals to the selection (unknown signals are ignored)"""
+        _select(self.window, keys)
+
+    def process_events(self) -> None:
+        """Process the pending events of the window (redraws, user inputs)"""
+        self.app.processEvents()
+
+    def wait(self) -> None:
+        """Run the event loop until the window is closed"""
+        while self.is_open:
+            self.app.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents)
+
+    def close(self) -> None:
+        self.main_window.close()
+
+
+def _select(window: PlotWindow, keys: list[str]) -> None:
+    window.listWidget.selection.select([key for key in keys if key in window.items])
+
+
+def _attach(connection: Connection, segment: tuple | None, owners: dict[str, set[str]]) -> dict:
+    """Map the signals of a segment in the viewer process and acknowledge it, so that the script can unmap it"""
+    if segment is None:
+        return {}
+    name, layout, signals = segment
+    items = shared_memory.attach_items(name, layout, signals)
+    connection.send(("attached", name))
+
+    # Release the segments whose signals were all replaced
+    for previous, keys in list(owners.items()):
+        keys.difference_update(items)
+        if not keys:
+            del owners[previous]
+            shared_memory.release(previous)
+    owners[name] = set(items)
+    return items
+
+
+def _run_viewer(
+    connection: Connection,
+    segment: tuple | None,
+    pre_select: list[str] | None,
+    x_component: str | None,
+    sub_groups: dict[str, list[str]] | None,
+    interval: float,
+    kwargs: dict,
+) -> None:
+    """Main function of the viewer process: display the window and apply the messages of the script"""
+    owners: dict[str, set[str]] = {}  # Segment name -> signals whose arrays are in the segment
+    items = _attach(connection, segment, owners)
+    app = get_application()
+    main_window = create_window(items, pre_select, x_component, sub_groups, **kwargs)
+    window: PlotWindow = main_window.centralWidget()
+
+    def poll() -> None:
+        try:
+            while connection.poll():
+                message = connection.recv()
+                if message[0] == "signals":
+                    window.setSignals(_attach(connection, message[1], owners))
+                elif message[0] == "select":
+                    _select(window, message[1])
+                elif message[0] == "close":
+                    main_window.close()
+        except (EOFError, OSError):
+            # The script exited, the window stays open until the user closes it
+            timer.stop()
+
+    timer = QTimer(main_window)
+    timer.timeout.connect(poll)
+    timer.start(max(int(interval * 1000), 1))
+    app.exec()
+
+
+class ProcessViewer:
+    """Window displayed by a child process, the script can keep running and push signals to it.
+
+    The script waits for the window to be closed before exiting (see `multiprocessing`), unless `close` is called.
+    """
+
+    def __init__(
+        self,
+        items: dict | None = None,
+        pre_select: list[str] | None = None,
+        x_component: str | None = None,
+        sub_groups: dict[str, list[str]] | None = None,
+        interval: float = 0.05,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            items, pre_select, x_component, sub_groups, **kwargs: Arguments of plot_window (the loaders of lazy
+                signals are called in this process).
+            interval (float): Period in seconds at which the viewer process checks for new signals.
+        """
+        # Qt is not safe to fork, the viewer process is spawned
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.pending: set[str] = set()  # Segments not attached by the viewer process yet
+        segment = self._share(items)
+        self.process = context.Process(
+            target=_run_viewer,
+            args=(child_connection, segment, pre_select, x_component, sub_groups, interval, kwargs),
+            name="signal_plotter viewer",
+        )
+        self.process.start()
+        child_connection.close()
+
+    @property
+    def is_open(self) -> bool:
+        return self.process.is_alive()
+
+    def _share(self, items: dict | None) -> tuple | None:
+        if not items:
+            return None
+        segment = shared_memory.share_items(items)
+        self.pending.add(segment[0])
+        return segment
+
+    def _collect(self) -> None:
+        """Unmap the segments attached by the viewer process"""
+        try:
+            while self.connection.poll():
+                message = self.connection.recv()
+                if message[0] == "attached":
+                    self.pending.discard(message[1])
+                    shared_memory.release(message[1])
+        except (EOFError, OSError):
+            pass
+        if not self.process.is_alive():
+            # The viewer process will not attach the remaining segments
+            for name in self.pending:
+                shared_memory.release(name, unlink=True)
+            self.pending.clear()
+
+    def _send(self, message: tuple) -> None:
+        self._collect()
+        if not self.process.is_alive():
+            raise RuntimeError("The viewer window was closed")
+        try:
+            self.connection.send(message)
+        except OSError as e:
+            raise RuntimeError("The viewer window was closed") from e
+
+    def set_signals(self, items: dict) -> None:
+        """Add new signals and replace the data of the existing ones (same format as the items of plot_window)"""
+        if not self.process.is_alive():
+            raise RuntimeError("The viewer window was closed")
+        segment = self._share(items)
+        try:
+            self._send(("signals", segment))
+        except RuntimeError:
+            self._collect()
+            raise
+
+    def select(self, keys: list[str]) -> None:
+        """Add signals to the selection (unknown signals are ignored)"""
+        self._send(("select", list(keys)))
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Block until the window is closed (or the timeout in seconds expires)"""
+        self.process.join(timeout)
+        self._collect()
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Close the window and wait for the viewer process to exit"""
+        if self.process.is_alive():
+            try:
+                self.connection.send(("close",))
+            except OSError:
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self._collect()
+
+
+def view(
+    items: dict | None = None,
+    pre_select: list[str] | None = None,
+    x_component: str | None = None,
+    sub_groups: dict[str, list[str]] | None = None,
+    process: bool = False,
+    **kwargs,
+) -> Viewer | ProcessViewer:
+    """Display signals without blocking the script (see plot_window for the arguments).
+
+    With `process`, the window is displayed by a child process (`ProcessViewer`), which does not need the event loop
+    of this process to run. Otherwise it uses the Qt application of this process (`Viewer`).
+    """
+    viewer_class = ProcessViewer if process else Viewer
+    return viewer_class(items, pre_select, x_component, sub_groups, **kwargs)
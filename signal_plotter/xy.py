@@ -0,0 +1,64 @@
+""" XY mode: signals plotted against another signal instead of time
+
+The x signal and the plotted signal may be sampled at different times: the plotted signal is then linearly
+interpolated at the times of the x signal. The resulting trajectories are cached per (x signal, signal) pair, with
+their decimation (see `XYTrajectory`), so that switching the X-axis component back and forth or replotting the same
+pairs does not resample them again.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from typing import Iterable
+
+import numpy
+
+from signal_plotter.downsampling import XYTrajectory
+from signal_plotter.profiling import profiled
+
+logger = logging.getLogger('plot_window_tree')
+
+
+@profiled("xy.resample")
+def resample(time: numpy.ndarray, values: numpy.ndarray, target_time: numpy.ndarray) -> numpy.ndarray:
+    """Values of a signal sampled at `time`, at the times of another signal (NaN outside of the signal)"""
+    time, values, target_time = numpy.ravel(time), numpy.ravel(values), numpy.ravel(target_time)
+    if time.shape != values.shape:
+        raise ValueError(f"time and values must have the same length: {time.size} != {values.size}")
+    if time is target_time or (time.shape == target_time.shape and numpy.array_equal(time, target_time)):
+        return values
+    if time.size > 1 and not numpy.all(time[1:] >= time[:-1]):
+        raise ValueError("The time of the signal must be monotonically increasing to resample it")
+    return numpy.interp(target_time, time, values, left=numpy.nan, right=numpy.nan)
+
+
+class XYCache:
+    """LRU cache of the trajectories of the (x signal, signal) pairs"""
+
+    def __init__(self, size: int = 32) -> None:
+        self.size = size
+        self.trajectories: OrderedDict[tuple[str, str], XYTrajectory] = OrderedDict()
+
+    def __contains__(self, pair: tuple[str, str]) -> bool:
+        return pair in self.trajectories
+
+    def get(self, x_key: str, x_data: dict, key: str, data: dict) -> XYTrajectory:
+        """Trajectory of the signal `key` against the values of the signal `x_key`"""
+        pair = (x_key, key)
+        trajectory = self.trajectories.get(pair)
+        if trajectory is None:
+            logger.debug(f"Resampling {key} on the time of {x_key}")
+            trajectory = XYTrajectory(x_data["y"], resample(data["x"], data["y"], x_data["x"]))
+            self.trajectories[pair] = trajectory
+            if len(self.trajectories) > self.size:
+                self.trajectories.popitem(last=False)
+        else:
+            self.trajectories.move_to_end(pair)
+        return trajectory
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        """Forget the trajectories involving signals whose data changed"""
+        keys = set(keys)
+        for pair in [pair for pair in self.trajectories if pair[0] in keys or pair[1] in keys]:
+            del self.trajectories[pair]
@@ -0,0 +1,69 @@
+import os
+import unittest
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from signal_plotter.plot_window import PlotWindow, get_application  # noqa: E402
+
+
+class TestAxisManager(unittest.TestCase):
+    def setUp(self):
+        get_application()
+        t = np.linspace(0, 10, 1_000)
+        units = {"speed": "rpm", "current": "A", "voltage": "V", "torque": "rpm"}
+        self.items = {key: {"x": t, "y": np.sin(t), "units": unit} for key, unit in units.items()}
+        self.widget = PlotWindow.SignalContainer(self.items)
+        self.widget.setSeparateAxes(False)
+        self.widget.updateSelection(list(self.items), [])
+
+    def view(self, key):
+        return self.widget.curves[key].item.getViewBox()
+
+    def test_reference_counting(self):
+        widget = self.widget
+        manager = widget.axisManager
+        self.assertEqual(list(widget.axes), ["rpm", "A", "V"])
+        self.assertIs(widget.axes["rpm"].view, widget.plotItem.getViewBox())
+        self.assertEqual(manager.references, {"rpm": 2, "A": 1, "V": 1})
+        self.assertIs(self.view("current"), widget.axes["A"].view)
+
+        # The axis is hidden when its last curve is removed, and reused when a curve with its units is displayed
+        current_axis = manager.pool["A"]
+        widget.updateSelection([], ["current"])
+        self.assertNotIn("A", widget.axes)
+        self.assertFalse(current_axis.axis.isVisible())
+        widget.updateSelection(["current"], [])
+        self.assertIs(widget.axes["A"], current_axis)
+        self.assertTrue(current_axis.axis.isVisible())
+        self.assertIs(self.view("current"), current_axis.view)
+        self.assertEqual(len(manager.pool), 2)
+
+        widget.updateSelection([], ["speed"])
+        self.assertEqual(manager.references["rpm"], 1)
+        self.assertIs(self.view("torque"), widget.plotItem.getViewBox())
+
+    def test_promote(self):
+        widget = self.widget
+        widget.updateSelection([], ["speed", "torque"])
+        # The units of the first right axis take the main axis
+        self.assertEqual(list(widget.axes), ["A", "V"])
+        self.assertIs(widget.axes["A"].view, widget.plotItem.getViewBox())
+        self.assertIs(self.view("current"), widget.plotItem.getViewBox())
+        self.assertFalse(widget.axisManager.pool["A"].view.isVisible())
+        self.assertEqual(widget.plotItem.getAxis("left").labelText, "A")
+
+    def test_link_axes(self):
+        widget = self.widget
+        pool = dict(widget.axisManager.pool)
+        widget.setSeparateAxes(True)
+        self.assertEqual(widget.axes, {})
+        self.assertTrue(all(self.view(key) is widget.plotItem.getViewBox() for key in self.items))
+        widget.setSeparateAxes(False)
+        self.assertEqual(widget.axisManager.pool, pool)
+        self.assertIs(self.view("voltage"), pool["V"].view)
+
+
+if __name__ == '__main__':
+    unittest.main()
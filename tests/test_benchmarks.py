@@ -0,0 +1,24 @@
+import copy
+import io
+import unittest
+
+from benchmarks import compare, run
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_run_and_compare(self):
+        results = run.run_benchmarks(list(run.BENCHMARKS), signals=[10], samples=[100], repeat=1, output=io.StringIO())
+        self.assertEqual([result["benchmark"] for result in results], list(run.BENCHMARKS))
+        before = {(result["benchmark"], result["signals"], result["samples"]): result for result in results}
+        after = copy.deepcopy(before)
+        after["csv", 10, 100]["min"] = before["csv", 10, 100]["min"] * 2 + 1
+        rows = compare.compare(before, after)
+        self.assertEqual([row["case"] for row in rows if row["regression"]], [("csv", 10, 100)])
+
+    def test_max_cells(self):
+        results = run.run_benchmarks(["namespace"], signals=[10, 100], samples=[100], max_cells=1000, output=io.StringIO())
+        self.assertEqual([result["signals"] for result in results], [10])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from signal_plotter.buffers import GrowableArray, RingBuffer
+
+
+class TestGrowableArray(unittest.TestCase):
+    def test_extend(self):
+        array = GrowableArray([1, 2], dtype=float, capacity=2)
+        array.extend(np.arange(10))
+        self.assertEqual(len(array), 12)
+        self.assertGreaterEqual(array.capacity, 12)
+        np.testing.assert_array_equal(array.data, [1, 2] + list(range(10)))
+
+    def test_truncate(self):
+        array = GrowableArray(np.arange(10))
+        array.truncate(4)
+        array.extend([9])
+        np.testing.assert_array_equal(array.data, [0, 1, 2, 3, 9])
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_last_values(self):
+        ring = RingBuffer(5, slack=2)
+        values = []
+        for chunk in ([1, 2], [3], [4, 5, 6, 7], list(range(8, 20)), [20]):
+            ring.extend(chunk)
+            values += chunk
+            np.testing.assert_array_equal(ring.data, values[-5:])
+        self.assertEqual(len(ring), 5)
+
+    def test_view_not_modified_within_slack(self):
+        ring = RingBuffer(5, slack=2)
+        ring.extend(np.arange(13))
+        view = ring.data
+        expected = view.copy()
+        ring.extend([100, 101])
+        np.testing.assert_array_equal(view, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from signal_plotter import cache
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "log.csv")
+        with open(self.source, "w") as f:
+            f.write("time,a\n0,1\n1,2\n")
+        self.index = np.arange(10, dtype=float)
+        self.columns = {"a": np.sin(self.index), "b.c": np.arange(10)}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_missing(self):
+        self.assertIsNone(cache.load(self.source))
+
+    def test_roundtrip(self):
+        self.assertTrue(cache.save(self.source, "time", self.index, self.columns))
+        index_name, index, columns = cache.load(self.source)
+        self.assertEqual(index_name, "time")
+        self.assertIsInstance(index, np.memmap)
+        np.testing.assert_array_equal(index, self.index)
+        self.assertEqual(list(columns), ["a", "b.c"])
+        np.testing.assert_array_equal(columns["b.c"], self.columns["b.c"])
+
+    def test_outdated(self):
+        cache.save(self.source, "time", self.index, self.columns)
+        with open(self.source, "a") as f:
+            f.write("2,3\n")
+        self.assertIsNone(cache.load(self.source))
+
+    def test_object_columns_not_cached(self):
+        self.assertFalse(cache.save(self.source, "time", self.index, {"s": np.array(["x"] * 10, dtype=object)}))
+        self.assertFalse(os.path.exists(cache.cache_path(self.source)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from signal_plotter.csv_parser import BackgroundReader, CsvFollower, follow, read_csv_files, read_header  # noqa: E402
+from signal_plotter.lazy import LazySignal  # noqa: E402
+
+
+class TestBackgroundReader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = []
+        for name in ("first", "second"):
+            path = os.path.join(self.directory.name, f"{name}.csv")
+            with open(path, "w") as f:
+                f.write("time,speed,label\n")
+                f.writelines(f"{i * 0.1},{i * 2},x\n" for i in range(100))
+            self.files.append(path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_header(self):
+        self.assertEqual(read_header(self.files[0]), ("time", ["speed", "label"]))
+
+    def test_pending_signals(self):
+        reader = BackgroundReader(self.files, use_cache=False)
+        pending = reader.pending_items(1)
+        self.assertEqual(list(pending), ["second.speed", "second.label"])
+        self.assertIsInstance(pending["second.speed"], LazySignal)
+        self.assertTrue(pending["second.speed"].metadata["pending"])
+
+        # Loading a pending signal waits for its file
+        x, y = pending["second.speed"].load()
+        np.testing.assert_array_equal(y, np.arange(100) * 2)
+        with self.assertRaises(ValueError):
+            pending["second.label"].load()  # Not a numerical signal
+
+        collected = []
+        for _ in range(100):
+            collected += reader.collect()
+            if reader.finished:
+                break
+            time.sleep(0.05)
+        self.assertEqual(sorted(collected), [0, 1])
+        self.assertEqual(list(reader.items(0)), ["first.speed"])
+        np.testing.assert_allclose(reader.items(0)["first.speed"]["x"], np.arange(100) * 0.1)
+
+        # The columns which could not be read are not pending anymore
+        failed = reader.failed_items(0)
+        self.assertEqual(list(failed), ["first.label"])
+        self.assertFalse(failed["first.label"].metadata.get("pending", False))
+        with self.assertRaises(ValueError):
+            failed["first.label"].load()
+
+    def test_failed_file(self):
+        with open(self.files[1], "w") as f:
+            f.write("time,speed\n0,1\n1,2,3,4\n")
+        reader = BackgroundReader(self.files, use_cache=False, jobs=2, progress=True)
+        with self.assertLogs(level="ERROR"):
+            self.assertIsNone(reader.result(1))
+        self.assertIsNotNone(reader.result(0))
+        self.assertEqual(reader.items(1), {})
+        self.assertEqual(list(reader.failed_items(1)), ["second.speed"])
+
+
+class TestReadCsvFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = []
+        for name in ("first", "second"):
+            path = os.path.join(self.directory.name, f"{name}.csv")
+            with open(path, "w") as f:
+                f.write("date,speed\n")
+                f.writelines(f"2024-01-01 00:00:{i:02d},{i * 2}\n" for i in range(50))
+            self.files.append(path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_timestamp_index_in_parallel(self):
+        # Non-numerical indexes are not sent through shared memory
+        for use_cache in (False, True):
+            serial = read_csv_files(self.files, use_cache=use_cache, jobs=1)
+            parallel = read_csv_files(self.files, use_cache=use_cache, jobs=2)
+            for (name, index, columns), (expected_name, expected_index, expected_columns) in zip(parallel, serial):
+                self.assertEqual(name, "date")
+                self.assertEqual(index[0], "2024-01-01 00:00:00")
+                np.testing.assert_array_equal(index, expected_index)
+                np.testing.assert_array_equal(columns["speed"], expected_columns["speed"])
+
+
+class TestCsvFollower(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "log.csv")
+        self.write("time,speed\n", "w")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text, mode="a"):
+        with open(self.path, mode) as f:
+            f.write(text)
+
+    def test_header_only_start(self):
+        follower = CsvFollower(self.path)
+        items = follower.read()
+        self.assertEqual(list(items), ["speed"])
+        self.assertEqual(len(items["speed"]["x"]), 0)
+
+        self.write("".join(f"{i * 0.1},{i}\n" for i in range(5000)))
+        self.assertEqual(follower.poll(), ["speed"])
+        self.assertEqual(follower.items["speed"]["x"].dtype, np.float64)
+        np.testing.assert_allclose(follower.items["speed"]["x"], np.arange(5000) * 0.1)
+        np.testing.assert_array_equal(follower.items["speed"]["y"], np.arange(5000))
+
+    def test_partial_line(self):
+        follower = CsvFollower(self.path)
+        self.write("0.0,1\n0.1,2\n0.2,")
+        follower.read()
+        np.testing.assert_array_equal(follower.items["speed"]["y"], [1, 2])
+
+        # The last line is only read once it is complete
+        self.write("3")
+        self.assertEqual(follower.poll(), [])
+        self.write("\n")
+        self.assertEqual(follower.poll(), ["speed"])
+        np.testing.assert_array_equal(follower.items["speed"]["y"], [1, 2, 3])
+        np.testing.assert_allclose(follower.items["speed"]["x"], [0.0, 0.1, 0.2])
+
+    def test_follow_window(self):
+        from signal_plotter.plot_window import PlotWindow, get_application
+
+        app = get_application()
+        self.write("0.0,1\n")
+        follower = CsvFollower(self.path)
+        window = PlotWindow(follower.read())
+        window.listWidget.selection.select(["speed"])
+        timer = follow(window, [follower], 0.001)
+        self.write("0.1,2\n")
+        for _ in range(100):
+            app.processEvents()
+            if len(window.items["speed"]["y"]) == 2:
+                break
+            time.sleep(0.01)
+        timer.stop()
+        np.testing.assert_array_equal(window.items["speed"]["y"], [1, 2])
+        np.testing.assert_array_equal(window.signalWidget.curves["speed"].item.getData()[1], [1, 2])
+
+    def test_truncation(self):
+        follower = CsvFollower(self.path)
+        self.write("0.0,1\n0.1,2\n0.2,3\n")
+        follower.read()
+
+        # A rewritten (shorter) file is read again from its start
+        self.write("time,speed\n5.0,10\n", "w")
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(follower.poll(), ["speed"])
+        np.testing.assert_array_equal(follower.items["speed"]["y"], [10])
+        np.testing.assert_array_equal(follower.items["speed"]["x"], [5.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import unittest
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from signal_plotter.downsampling import BatchedCurveItem, MinMaxPyramid  # noqa: E402
+from signal_plotter.plot_window import PlotWindow, get_application  # noqa: E402
+
+
+class TestMinMaxPyramid(unittest.TestCase):
+    def setUp(self):
+        self.x = np.arange(100_000, dtype=float)
+        self.y = np.sin(self.x / 1000)
+        self.y[12345] = 10.0
+        self.y[67890] = -10.0
+        self.pyramid = MinMaxPyramid(self.x, self.y, mean=True)
+
+    def test_levels(self):
+        self.assertGreater(self.pyramid.levels, 1)
+        self.assertLessEqual(self.pyramid.mins[-1].size, self.pyramid.min_buckets)
+
+    def test_query_preserves_peaks(self):
+        x, y = self.pyramid.query(0, 100_000, pixels=500)
+        self.assertLess(x.size, 10_000)
+        self.assertEqual(y.max(), 10.0)
+        self.assertEqual(y.min(), -10.0)
+
+    def test_query_raw_when_zoomed(self):
+        x, y = self.pyramid.query(12340, 12350, pixels=500)
+        np.testing.assert_array_equal(x, self.x[12340:12351])
+        np.testing.assert_array_equal(y, self.y[12340:12351])
+
+    def test_query_mean(self):
+        x, y = self.pyramid.query(0, 100_000, pixels=500, envelope="mean")
+        self.assertEqual(x.size, y.size)
+        self.assertLess(y.max(), 10.0)
+
+    def test_bounds(self):
+        self.assertEqual(self.pyramid.bounds(), (-10.0, 10.0))
+        lo, hi = self.pyramid.bounds(20_000, 30_000)
+        self.assertLess(hi, 10.0)
+
+    def test_nan_gaps(self):
+        y = self.y.copy()
+        y[:5000] = np.nan
+        pyramid = MinMaxPyramid(self.x, y)
+        _, y_out = pyramid.query(0, 100_000, pixels=100)
+        self.assertEqual(np.nanmax(y_out), 10.0)
+
+    def test_non_monotonic(self):
+        with self.assertRaises(ValueError):
+            MinMaxPyramid(self.y, self.x)
+
+
+class TestBatchedCurveItem(unittest.TestCase):
+    def setUp(self):
+        get_application()
+        self.x = np.arange(100_000, dtype=float)
+        self.rows = [np.sin(self.x / 1000 + i) for i in range(5)]
+        self.rows[3][4321] = np.nan
+
+    def test_envelopes(self):
+        pyramids = [MinMaxPyramid(self.x, y) for y in self.rows]
+        item = BatchedCurveItem()
+        item.setRows(pyramids, ["r", "g", "r", "b", "g"])
+        self.assertEqual(len(item.paths), 3)  # One path per pen
+        for level in (0, 2):
+            x, y = item.envelopes(1000, 9000, level)
+            self.assertEqual(y.shape, (5, x.size))
+            for row, pyramid in zip(y, pyramids):
+                np.testing.assert_array_equal(row, pyramid.query(1000, 9000, level=level)[1])
+        self.assertEqual(item.dataBounds(0), (0.0, 99_999.0))
+        np.testing.assert_allclose(item.dataBounds(1), (-1, 1), atol=1e-6)
+
+        with self.assertRaises(ValueError):
+            item.setRows([pyramids[0], MinMaxPyramid(self.x[:10], self.rows[1][:10])], ["r", "g"])
+
+    def test_signal_container(self):
+        items = {f"s{i}": {"x": self.x, "y": self.rows[i % 5], "units": "V" if i < 6 else "A"} for i in range(10)}
+        widget = PlotWindow.SignalContainer(items, batch_size=4)
+        widget.updateSelection(list(items), [])
+        self.assertEqual(len(widget.batches), 1)
+        batch = next(iter(widget.batches.values()))
+        self.assertEqual(batch.keys, list(items))
+        self.assertTrue(all(curve.batched and curve.item.getViewBox() is None for curve in widget.curves.values()))
+
+        # Separate axes: the 6 curves in V are still batched, not the 4 in A
+        widget.batch_size = 5
+        widget.setSeparateAxes(False)
+        self.assertEqual([batch.keys for batch in widget.batches.values()], [list(items)[:6]])
+        self.assertFalse(any(widget.curves[key].batched for key in list(items)[6:]))
+        self.assertIs(widget.curves["s9"].item.getViewBox(), widget.axes["A"].view)
+
+        widget.updateSelection([], list(items)[1:])
+        self.assertEqual(widget.batches, {})
+        self.assertIs(widget.curves["s0"].item.getViewBox(), widget.plotItem.getViewBox())
+
+    def test_not_batched_by_default(self):
+        items = {f"s{i}": {"x": self.x, "y": self.rows[i % 5]} for i in range(40)}
+        widget = PlotWindow.SignalContainer(items)
+        widget.updateSelection(list(items), [])
+        self.assertEqual(widget.batches, {})
+        self.assertEqual(len(widget.legend.items), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from signal_plotter.export import check_figures, export_figure, export_figures, selected_signals
+
+
+def make_items():
+    t = np.linspace(0, 10, 10_000)
+    return {
+        "motor.speed": {"x": t, "y": np.sin(t), "units": "rpm"},
+        "motor.current": {"x": t, "y": np.cos(t), "units": "A"},
+        "battery.voltage": {"x": t, "y": 12 + 0.1 * t, "units": "V"},
+    }
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.items = make_items()
+        self.sub_groups = {"motor": ["motor.speed", "motor.current"]}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_selected_signals(self):
+        keys = selected_signals(self.items, ["battery.voltage", "unknown"], ["motor"], self.sub_groups)
+        self.assertEqual(keys, ["battery.voltage", "motor.speed", "motor.current"])
+        with self.assertRaises(ValueError):
+            selected_signals(self.items, groups=["unknown"], sub_groups=self.sub_groups)
+
+    def test_export_png_and_svg(self):
+        png = export_figure(
+            self.items, self.path("plot.png"), pre_select=["motor.speed"], x_range=(2, 5), width=400, height=300
+        )
+        with open(png, "rb") as f:
+            self.assertEqual(f.read(8), b"\x89PNG\r\n\x1a\n")
+        svg = export_figure(
+            self.items,
+            self.path("sub/xy.svg"),
+            groups=["motor"],
+            sub_groups=self.sub_groups,
+            x_component="battery.voltage",
+            separate_axes=True,
+        )
+        with open(svg) as f:
+            self.assertIn("<svg", f.read())
+
+    def test_invalid_figures(self):
+        with self.assertRaises(ValueError):
+            export_figure(self.items, self.path("plot.gif"), pre_select=["motor.speed"])
+        with self.assertRaises(ValueError):
+            check_figures([{"output": "plot.png", "colour": "red"}])
+        with self.assertRaises(ValueError):
+            check_figures([{"pre_select": ["motor.speed"]}])
+
+    def test_export_figures_in_processes(self):
+        figures = [
+            {"output": self.path("a.png"), "groups": ["motor"], "width": 200, "height": 100},
+            {"output": self.path("b.png"), "pre_select": ["battery.voltage"], "width": 200, "height": 100},
+            {"output": self.path("c.bad"), "pre_select": ["battery.voltage"]},
+        ]
+        results = export_figures(self.items, figures, sub_groups=self.sub_groups, jobs=2)
+        self.assertEqual([output for output, _ in results], [figure["output"] for figure in figures])
+        self.assertEqual([error is None for _, error in results], [True, True, False])
+        self.assertTrue(os.path.exists(self.path("a.png")) and os.path.exists(self.path("b.png")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import re
+import subprocess
+import sys
+import unittest
+
+# Third-party modules which must only be imported when they are used
+HEAVY_MODULES = ["pandas", "tqdm", "pyqtgraph", "PySide6", "PyQt5", "PyQt6", "PySide2"]
+
+# Modules which must not import them
+LIGHT_MODULES = [
+    "signal_plotter.csv_parser",
+    "signal_plotter.cache",
+    "signal_plotter.lazy",
+    "signal_plotter.publisher",
+    "signal_plotter.readers",
+    "signal_plotter.shared_memory",
+    "signal_plotter.statistics",
+]
+
+# Budget in seconds of the import of the signal_plotter modules themselves (their dependencies excluded)
+IMPORT_BUDGET = 0.05
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Self import time in microseconds of each module imported by a module, in a new interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+\d+ \|(\s*)(\S+)", line)
+        if match:
+            times[match.group(3)] = int(match.group(1))
+    return times
+
+
+class TestImports(unittest.TestCase):
+    def test_light_modules(self):
+        for module in LIGHT_MODULES:
+            with self.subTest(module=module):
+                times = import_times(module)
+                self.assertIn(module, times)
+                heavy = [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+                self.assertEqual(heavy, [])
+                own = sum(time for name, time in times.items() if name.split(".")[0] == "signal_plotter")
+                self.assertLess(own / 1e6, IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
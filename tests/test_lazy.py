@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from signal_plotter.lazy import LazySignal, SignalCache, normalize_items
+
+
+class TestLazy(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def loader(i):
+            def load():
+                self.calls.append(i)
+                return {"x": np.arange(100.0), "y": np.full(100, i, dtype=float)}
+
+            return load
+
+        self.items = normalize_items(
+            {
+                "a": LazySignal(loader(0), units="V"),
+                "b": loader(1),
+                "c": LazySignal(loader(2)),
+                "eager": {"x": np.arange(3), "y": np.arange(3)},
+            }
+        )
+
+    def test_normalize(self):
+        self.assertEqual(self.items["a"]["units"], "V")
+        self.assertIn("loader", self.items["b"])
+        self.assertNotIn("x", self.items["a"])
+        self.assertNotIn("loader", self.items["eager"])
+        self.assertEqual(self.calls, [])
+
+    def test_load_once(self):
+        cache = SignalCache()
+        cache.load("a", self.items["a"])
+        cache.load("a", self.items["a"])
+        self.assertEqual(self.calls, [0])
+        np.testing.assert_array_equal(self.items["a"]["y"], np.zeros(100))
+        self.assertIs(cache.load("eager", self.items["eager"]), self.items["eager"])
+        self.assertNotIn("eager", cache)
+
+    def test_budget(self):
+        evicted = []
+        cache = SignalCache(budget=2 * 1600, pinned=lambda key: key == "a", on_evict=evicted.append)
+        for key in "abc":
+            cache.load(key, self.items[key])
+        self.assertEqual(evicted, ["b"])
+        self.assertNotIn("y", self.items["b"])
+        self.assertEqual(cache.nbytes, 2 * 1600)
+        cache.load("b", self.items["b"])
+        self.assertEqual(evicted, ["b", "c"])
+        self.assertEqual(self.calls, [0, 1, 2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import weakref
+
+import numpy as np
+
+from signal_plotter.math_engine import EvaluationCancelled, MathEngine
+
+
+class TestMathEngine(unittest.TestCase):
+    def setUp(self):
+        self.signals = {
+            "a": np.arange(10.0),
+            "b.c": np.full(10, 2.0),
+            "b.c.d": np.ones(10),
+            "big": np.linspace(0, 1, 1000),
+        }
+        self.engine = MathEngine(lambda key: key in self.signals, chunk_size=64)
+
+    def evaluate(self, text):
+        expression = self.engine.compile(text)
+        return self.engine.evaluate(expression, [self.signals[key] for key in expression.signals])
+
+    def test_binds_referenced_signals(self):
+        expression = self.engine.compile("a * b.c + a")
+        self.assertEqual(expression.signals, ("a", "b.c"))
+        np.testing.assert_array_equal(self.evaluate("a * b.c + a"), np.arange(10.0) * 3)
+
+    def test_longest_prefix(self):
+        self.assertEqual(self.engine.compile("b.c.d").signals, ("b.c.d",))
+        self.assertEqual(self.engine.compile("a.size").signals, ("a",))
+        self.assertEqual(self.evaluate("a.size"), 10)
+
+    def test_chunked(self):
+        expression = self.engine.compile("np.sin(big) * 2 + abs(big - 0.5) > 1")
+        self.assertTrue(expression.elementwise)
+        big = self.signals["big"]
+        np.testing.assert_array_equal(self.evaluate(expression.text), np.sin(big) * 2 + abs(big - 0.5) > 1)
+
+    def test_not_elementwise(self):
+        expression = self.engine.compile("np.cumsum(big) - big.mean()")
+        self.assertFalse(expression.elementwise)
+        big = self.signals["big"]
+        np.testing.assert_allclose(self.evaluate(expression.text), np.cumsum(big) - big.mean())
+
+    def test_memoized(self):
+        result = self.evaluate("a + 1")
+        self.assertIs(self.evaluate("a + 1"), result)
+        self.signals["a"] = np.zeros(10)
+        np.testing.assert_array_equal(self.evaluate("a + 1"), np.ones(10))
+
+    def test_memo_budget(self):
+        self.engine = MathEngine(lambda key: key in self.signals, memo_budget=2 * self.signals["big"].nbytes)
+        for text in ("big + 1", "big + 2", "big + 3"):
+            self.evaluate(text)
+        self.assertEqual(list(self.engine.results), ["big + 2", "big + 3"])
+        self.assertEqual(self.engine.nbytes, 2 * self.signals["big"].nbytes)
+
+        # The memo doesn't keep its inputs alive
+        big = weakref.ref(self.signals["big"])
+        self.signals["big"] = np.linspace(0, 2, 1000)
+        self.assertIsNone(big())
+        np.testing.assert_array_equal(self.evaluate("big + 3"), self.signals["big"] + 3)
+        self.assertEqual(self.engine.nbytes, 2 * self.signals["big"].nbytes)
+
+    def test_cancelled(self):
+        checks = []
+
+        def cancelled():
+            checks.append(None)
+            return len(checks) > 3
+
+        expression = self.engine.compile("big * 2")
+        with self.assertRaises(EvaluationCancelled):
+            self.engine.evaluate(expression, [self.signals["big"]], cancelled)
+        self.assertEqual(len(checks), 4)
+        self.assertNotIn("big * 2", self.engine.results)
+
+    def test_invalidate(self):
+        with self.assertRaises(NameError):
+            self.evaluate("e * 2")
+        self.signals["e"] = np.ones(3)
+        self.engine.invalidate()
+        np.testing.assert_array_equal(self.evaluate("e * 2"), [2, 2, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
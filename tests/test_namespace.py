@@ -0,0 +1,50 @@
+import unittest
+
+from signal_plotter.namespace import SignalNamespace
+
+
+class TestSignalNamespace(unittest.TestCase):
+    def setUp(self):
+        self.namespace = SignalNamespace({"a.x": {"y": 1}, "b": {"y": 2}, "a.y.z": {"y": 3}, "a": {"y": 4}})
+
+    def test_lookup(self):
+        self.assertEqual(self.namespace["a.y.z"], {"y": 3})
+        self.assertEqual(self.namespace["a"], {"y": 4})
+        self.assertEqual(self.namespace.get_path(["a", "x"]), {"y": 1})
+        self.assertEqual(len(self.namespace), 4)
+
+    def test_lookup_has_no_side_effect(self):
+        with self.assertRaises(KeyError):
+            self.namespace["a.y"]  # A group, not a signal
+        self.assertIsNone(self.namespace.get("c.d"))
+        self.assertNotIn("a.y", self.namespace)
+        self.assertEqual(len(self.namespace), 4)
+        self.assertEqual(sorted(self.namespace), ["a", "a.x", "a.y.z", "b"])
+
+    def test_groups(self):
+        self.assertTrue(self.namespace.is_group("a.y"))
+        self.assertFalse(self.namespace.is_group("b"))
+        self.assertEqual(self.namespace.children("a"), ["x", "y"])
+        self.assertEqual(self.namespace.group("a"), {"a.x": {"y": 1}, "a.y.z": {"y": 3}})
+        self.assertEqual(self.namespace.longest_prefix(["a", "y", "z", "max"]), 3)
+        self.assertEqual(self.namespace.longest_prefix(["a", "y", "w"]), 1)
+
+    def test_signal_becoming_group(self):
+        self.namespace["b.c"] = {"y": 5}
+        self.assertEqual(self.namespace["b"], {"y": 2})
+        self.assertEqual(self.namespace["b.c"], {"y": 5})
+        del self.namespace["b"]
+        self.assertEqual(list(self.namespace.group("b")), ["b.c"])
+        self.assertEqual(len(self.namespace), 4)
+
+    def test_delete(self):
+        del self.namespace["a.y.z"]
+        self.assertFalse(self.namespace.is_group("a.y"))
+        self.assertEqual(self.namespace.children("a"), ["x"])
+        with self.assertRaises(KeyError):
+            del self.namespace["a.y.z"]
+        self.assertEqual(len(self.namespace), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+import unittest
+
+from signal_plotter.profiling import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled(self):
+        profiler = Profiler()
+        with profiler.timer("a"):
+            pass
+        profiler.count("b")
+        self.assertEqual(profiler.summary(), {"timers": {}, "counters": {}})
+
+    def test_timers_and_counters(self):
+        profiler = Profiler(enabled=True)
+        for _ in range(3):
+            with profiler.timer("a"):
+                pass
+        profiler.count("b", 5)
+        profiler.count("b")
+        summary = profiler.summary()
+        self.assertEqual(summary["timers"]["a"]["count"], 3)
+        self.assertLessEqual(summary["timers"]["a"]["min"], summary["timers"]["a"]["max"])
+        self.assertEqual(summary["counters"], {"b": 6})
+        self.assertIn("a", profiler.report())
+
+    def test_chrome_trace(self):
+        profiler = Profiler(enabled=True, max_events=2)
+        for name in ("a", "b", "c"):
+            with profiler.timer(name):
+                pass
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            profiler.dump_chrome_trace(path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+        self.assertEqual([event["name"] for event in events], ["b", "c"])
+        self.assertEqual({event["ph"] for event in events}, {"X"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from signal_plotter.publisher import Publisher, Subscriber
+
+
+class TestPublisher(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.publisher = Publisher(os.path.join(self.directory.name, "publisher.sock"), capacity=100, interval=0.01)
+
+    def tearDown(self):
+        self.publisher.close()
+        self.directory.cleanup()
+
+    def collect(self, subscriber, items, duration=0.3):
+        """Apply the notifications of the publisher to the items for a while"""
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            self.publisher.flush()
+            new, updated = subscriber.collect()
+            items.update(new)
+            for name, (x, y) in updated.items():
+                items[name]["x"], items[name]["y"] = x, y
+            time.sleep(0.01)
+        return items
+
+    def test_signals(self):
+        subscriber = Subscriber([self.publisher.address])
+        self.publisher.add_signal("card.voltage", units="V", group="card")
+        self.publisher.publish("card.current", np.arange(10.0), np.arange(10.0) * 2, scatter=True)
+        items = self.collect(subscriber, {})
+        self.assertEqual(items["card.voltage"]["units"], "V")
+        self.assertEqual(items["card.voltage"]["group"], "card")
+        self.assertEqual(items["card.voltage"]["y"].size, 0)
+        self.assertTrue(items["card.current"]["scatter"])
+        np.testing.assert_array_equal(items["card.current"]["y"], np.arange(10.0) * 2)
+        self.assertFalse(items["card.current"]["y"].flags.writeable)
+
+        # Grown in place, then moved to a larger segment
+        for start in range(0, 250, 50):
+            t = np.arange(start, start + 50, dtype=float)
+            self.publisher.append("card.voltage", t, np.sin(t))
+            self.collect(subscriber, items)
+            np.testing.assert_array_equal(items["card.voltage"]["x"], np.arange(start + 50, dtype=float))
+            np.testing.assert_array_equal(items["card.voltage"]["y"], np.sin(np.arange(start + 50, dtype=float)))
+        self.assertEqual(items["card.voltage"]["units"], "V")
+        subscriber.close()
+
+    def test_late_subscribers(self):
+        self.publisher.publish("a", np.arange(5), np.ones(5), units="V")
+        self.publisher.publish("a", np.arange(7), np.zeros(7))  # Replaced before any subscriber
+        first = Subscriber([self.publisher.address])
+        items = self.collect(first, {})
+        self.publisher.append("a", 7, 1.0)
+        second = Subscriber([self.publisher.address])
+        for subscriber in (first, second):
+            items = self.collect(subscriber, items if subscriber is first else {})
+            np.testing.assert_array_equal(items["a"]["y"], [0, 0, 0, 0, 0, 0, 0, 1])
+            self.assertEqual(items["a"]["units"], "V")
+
+        self.publisher.close()
+        self.collect(first, items)
+        self.assertFalse(first.connected)
+        np.testing.assert_array_equal(items["a"]["x"], np.arange(8))  # Still mapped
+
+
+if __name__ == '__main__':
+    unittest.main()
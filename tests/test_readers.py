@@ -0,0 +1,149 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from signal_plotter import readers
+from signal_plotter.csv_parser import load_items
+from signal_plotter.lazy import LazySignal
+
+
+class TestReaders(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.time = np.arange(50) * 0.1
+        self.columns = {"motor.speed": np.arange(50) * 2.0, "motor.torque": np.arange(50) * 3.0, "voltage": np.ones(50)}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_get_reader(self):
+        self.assertIsInstance(readers.get_reader("log.NPZ"), readers.NpzReader)
+        self.assertIsInstance(readers.get_reader("log.parquet"), readers.ParquetReader)
+        with self.assertRaises(ValueError):
+            readers.get_reader("log.txt")
+        self.assertIs(readers.get_reader("log.txt", default=readers.CSV_READER), readers.CSV_READER)
+
+    def test_expand_columns(self):
+        names = ["motor.speed", "motor.torque", "voltage"]
+        self.assertEqual(readers.expand_columns(names, ["voltage", "motor.*"]), names)
+        self.assertEqual(readers.expand_columns(names, ["*.torque", "missing"]), ["motor.torque"])
+
+    def test_npz(self):
+        path = self.path("log.npz")
+        np.savez(path, time=self.time, label=np.array(["a"] * 50), **self.columns)
+        reader = readers.get_reader(path)
+        self.assertEqual(reader.header(path), ("time", ["motor.speed", "motor.torque", "voltage"]))  # Not label
+
+        index_name, index, arrays = reader.read(path, ["motor.torque", "label"])
+        self.assertEqual(index_name, "time")
+        np.testing.assert_array_equal(index, self.time)
+        self.assertEqual(list(arrays), ["motor.torque"])  # Not a numerical signal
+        np.testing.assert_array_equal(arrays["motor.torque"], self.columns["motor.torque"])
+
+    def test_csv_projection(self):
+        path = self.path("log.csv")
+        with open(path, "w") as f:
+            f.write("time,motor.speed,motor.torque,voltage\n")
+            f.writelines(f"{t},{s},{q},{v}\n" for t, s, q, v in zip(self.time, *self.columns.values()))
+
+        index_name, index, arrays = readers.CSV_READER.read(path, ["voltage"])
+        self.assertEqual(index_name, "time")
+        np.testing.assert_allclose(index, self.time)
+        self.assertEqual(list(arrays), ["voltage"])
+
+        items, index_names = load_items([path], use_cache=False, columns=["motor.*"])
+        self.assertEqual(index_names, ["time"])
+        self.assertIsInstance(items["motor.speed"], dict)
+        self.assertIsInstance(items["voltage"], LazySignal)
+        x, y = items["voltage"].load()
+        np.testing.assert_allclose(x, self.time)
+        np.testing.assert_array_equal(y, self.columns["voltage"])
+
+    def test_csv_text_column(self):
+        path = self.path("log.csv")
+        with open(path, "w") as f:
+            f.write("t,a,name,b\n")
+            f.writelines(f"{t},{a},x{t},{b}\n" for t, a, b in zip(self.time, self.time * 2, self.time * 3))
+        signals = readers.FileSignals(path)
+        self.assertEqual(signals.names, ["a", "name", "b"])
+        read = []
+        read_columns = signals.reader.read
+        signals.reader.read = lambda path, columns=None: read.append(columns) or read_columns(path, columns)
+
+        # The first read parses all the columns, and drops the text one
+        items = signals.items("", ["a"])
+        self.assertEqual(list(items), ["a", "b"])
+        self.assertEqual(signals.names, ["a", "b"])
+        self.assertIsInstance(items["b"], LazySignal)
+        x, y = items["b"].load()
+        np.testing.assert_allclose(y, self.time * 3)
+
+        # A column known not to be numerical is not read again
+        with self.assertRaises(ValueError):
+            signals._loader("name")()
+        self.assertEqual(len(read), 1)
+
+    def test_projection_in_parallel(self):
+        paths = [self.path("first.npz"), self.path("second.npz")]
+        for path in paths:
+            np.savez(path, time=self.time, **self.columns)
+        items, index_names = load_items(paths, use_cache=False, jobs=2, columns=["*.voltage"])
+        self.assertEqual(index_names, ["time", "time"])
+        self.assertEqual(list(items)[:3], ["first.motor.speed", "first.motor.torque", "first.voltage"])
+        np.testing.assert_array_equal(items["second.voltage"]["y"], self.columns["voltage"])
+        self.assertIsInstance(items["second.motor.speed"], LazySignal)
+
+    def test_file_signals(self):
+        path = self.path("log.npz")
+        np.savez(path, time=self.time, **self.columns)
+        signals = readers.FileSignals(path)
+        read = []
+        read_columns = signals.reader.read
+        signals.reader.read = lambda path, columns=None: read.append(columns) or read_columns(path, columns)
+
+        items = signals.items("log.", ["log.voltage"])
+        self.assertEqual(read, [["voltage"]])
+        self.assertEqual(list(items), ["log.motor.speed", "log.motor.torque", "log.voltage"])
+        np.testing.assert_array_equal(items["log.voltage"]["x"], self.time)
+
+        # Only the column of a lazy signal is read
+        x, y = items["log.motor.speed"].load()
+        self.assertEqual(read[-1], ["motor.speed"])
+        np.testing.assert_array_equal(y, self.columns["motor.speed"])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow
+        import pyarrow.parquet
+
+        path = self.path("log.parquet")
+        pyarrow.parquet.write_table(pyarrow.table({"time": self.time, "label": ["a"] * 50, **self.columns}), path)
+        self.assertEqual(readers.get_reader(path).header(path), ("time", list(self.columns)))
+        index_name, index, arrays = readers.get_reader(path).read(path, ["voltage"])
+        self.assertEqual(index_name, "time")
+        np.testing.assert_array_equal(index, self.time)
+        self.assertEqual(list(arrays), ["voltage"])
+
+    @unittest.skipUnless(importlib.util.find_spec("h5py"), "h5py is not installed")
+    def test_hdf5(self):
+        import h5py
+
+        path = self.path("log.h5")
+        with h5py.File(path, "w") as f:
+            f["time"] = self.time
+            f["motor/speed"] = self.columns["motor.speed"]
+            f["label"] = np.array([b"a"] * 50)
+            f.attrs["index"] = "time"
+        self.assertEqual(readers.get_reader(path).header(path), ("time", ["motor.speed"]))
+        index_name, index, arrays = readers.get_reader(path).read(path, ["motor.speed"])
+        np.testing.assert_array_equal(arrays["motor.speed"], self.columns["motor.speed"])
+
+
+if __name__ == '__main__':
+    unittest.main()
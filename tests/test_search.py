@@ -0,0 +1,43 @@
+import unittest
+
+from signal_plotter.search import SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.names = ["Motor.speed", "motor.current", "axis1.pos", "axis2.pos", "axis12.vel", "température", "a"]
+        self.index = SearchIndex(self.names)
+
+    def test_substring(self):
+        self.assertEqual(self.index.matching("pos"), ["axis1.pos", "axis2.pos"])
+        self.assertEqual(self.index.matching("s1"), ["axis1.pos", "axis12.vel"])
+        self.assertEqual(self.index.matching("l"), ["axis12.vel"])
+        self.assertEqual(self.index.matching("is12.v"), ["axis12.vel"])
+        self.assertEqual(self.index.matching("ratu"), ["température"])
+        self.assertEqual(self.index.matching(""), self.names)
+
+    def test_smart_case(self):
+        self.assertEqual(self.index.matching("motor"), ["Motor.speed", "motor.current"])
+        self.assertEqual(self.index.matching("Motor"), ["Motor.speed"])
+        self.assertEqual(self.index.matching("motor", case_sensitive=True), ["motor.current"])
+
+    def test_terms(self):
+        self.assertEqual(self.index.matching("speed||vel"), ["Motor.speed", "axis12.vel"])
+
+    def test_glob(self):
+        self.assertEqual(self.index.matching("axis?.pos"), ["axis1.pos", "axis2.pos"])
+        self.assertEqual(self.index.matching("*.pos"), ["axis1.pos", "axis2.pos"])
+        self.assertEqual(self.index.matching("motor*"), ["Motor.speed", "motor.current"])
+        self.assertEqual(self.index.matching("axis[2-9]*"), ["axis2.pos"])
+
+    def test_regex(self):
+        self.assertEqual(self.index.matching("/^axis\\d+\\.(pos|vel)$/"), ["axis1.pos", "axis2.pos", "axis12.vel"])
+
+    def test_add(self):
+        self.index.add(["axis3.pos", "axis1.pos"])
+        self.assertEqual(len(self.index), len(self.names) + 1)
+        self.assertEqual(self.index.matching("pos"), ["axis1.pos", "axis2.pos", "axis3.pos"])
+
+
+if __name__ == '__main__':
+    unittest.main()
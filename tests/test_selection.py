@@ -0,0 +1,31 @@
+import unittest
+
+from signal_plotter.selection import SelectionModel
+
+
+class TestSelectionModel(unittest.TestCase):
+    def setUp(self):
+        self.selection = SelectionModel(["a", "b"])
+        self.changes = []
+        self.selection.selectionChanged.connect(lambda added, removed: self.changes.append((added, removed)))
+
+    def test_deltas(self):
+        self.assertEqual(self.selection.select(["b", "c", "c"]), ["c"])
+        self.assertEqual(self.selection.deselect(["a", "z"]), ["a"])
+        self.assertEqual(self.changes, [(["c"], []), ([], ["a"])])
+        self.assertEqual(self.selection.keys(), ["b", "c"])
+
+    def test_no_change(self):
+        self.selection.select(["a"])
+        self.selection.deselect(["z"])
+        self.assertEqual(self.changes, [])
+
+    def test_set_selection(self):
+        self.assertEqual(self.selection.setSelection(["b", "d"]), (["d"], ["a"]))
+        self.assertEqual(self.selection.clear(), ["b", "d"])
+        self.assertEqual(len(self.selection), 0)
+        self.assertEqual(self.changes, [(["d"], ["a"]), ([], ["b", "d"])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from signal_plotter import shared_memory
+
+
+class TestSharedMemory(unittest.TestCase):
+    def test_roundtrip(self):
+        arrays = {"index": np.arange(1000, dtype=float), "a": np.arange(33, dtype=np.int16), "empty": np.array([])}
+        name, layout = shared_memory.share_arrays(arrays)
+        shared = shared_memory.attach_arrays(name, layout)
+        self.assertEqual(list(shared), list(arrays))
+        for key, array in arrays.items():
+            np.testing.assert_array_equal(shared[key], array)
+            self.assertEqual(shared[key].dtype, array.dtype)
+            self.assertFalse(shared[key].flags.writeable)
+        del shared
+        shared_memory.release(name)
+
+    def test_items(self):
+        t = np.linspace(0, 1, 100)
+        items = {"a": {"x": t, "y": t**2, "units": "V", "state": True}, "b": {"x": t, "y": -t}}
+        name, layout, signals = shared_memory.share_items(items)
+        self.assertEqual(len(layout), 3)  # The x vector is shared once
+        shared = shared_memory.attach_items(name, layout, signals)
+        self.assertEqual(shared["a"]["units"], "V")
+        self.assertNotIn("state", shared["a"])
+        np.testing.assert_array_equal(shared["b"]["y"], -t)
+        self.assertIs(shared["a"]["x"], shared["b"]["x"])
+
+        # The segment is only unmapped once the views are not used anymore
+        y = shared["a"]["y"][10:]
+        del shared
+        shared_memory.release(name)
+        np.testing.assert_array_equal(y, t[10:] ** 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
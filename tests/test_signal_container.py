@@ -0,0 +1,53 @@
+import os
+import unittest
+
+import numpy as np
+import pyqtgraph as pg
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from signal_plotter.plot_window import PlotWindow  # noqa: E402
+
+
+class TestIncrementalUpdate(unittest.TestCase):
+    def setUp(self):
+        pg.mkQApp()
+        t = np.linspace(0, 10, 1_000)
+        self.items = {key: {"x": t, "y": np.sin(t) * i} for i, key in enumerate(("a", "b", "c"))}
+        self.widget = PlotWindow.SignalContainer(self.items)
+        self.widget.updateSelection(["a", "b"], [])
+        self.before = {key: curve.item for key, curve in self.widget.curves.items()}
+
+        # The data of the curves which are kept must not be set again
+        self.updated = []
+        for key, item in self.before.items():
+            item.setData = item.setPyramid = lambda *args, key=key, **kwargs: self.updated.append(key)
+
+    def assertUntouched(self, keys):
+        for key in keys:
+            self.assertIs(self.widget.curves[key].item, self.before[key])
+            self.assertIs(self.widget.curves[key].item.getViewBox(), self.widget.plotItem.getViewBox())
+        self.assertEqual(self.updated, [])
+
+    def test_add(self):
+        self.widget.updateSelection(["c"], [])
+        self.assertEqual(list(self.widget.curves), ["a", "b", "c"])
+        self.assertUntouched(["a", "b"])
+        self.assertNotIn(self.widget.curves["c"].item, self.before.values())
+        self.assertEqual(len(self.widget.legend.items), 3)
+
+    def test_remove(self):
+        self.widget.updateSelection([], ["a"])
+        self.assertEqual(list(self.widget.curves), ["b"])
+        self.assertUntouched(["b"])
+        self.assertIsNone(self.before["a"].getViewBox())
+        self.assertEqual(len(self.widget.legend.items), 1)
+
+    def test_states(self):
+        self.widget.setSignal({"a": {"state": False}, "b": {"state": True}, "c": {"state": True}})
+        self.assertEqual(sorted(self.widget.curves), ["b", "c"])
+        self.assertUntouched(["b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from signal_plotter import statistics
+from signal_plotter.statistics import RangeStatistics
+
+
+class TestRangeStatistics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.arange(100_003, dtype=float)
+        self.y = rng.normal(1000.0, 1.0, self.x.size)
+        self.y[5:3000] = np.nan
+        self.statistics = RangeStatistics(self.x, self.y)
+
+    def assertMatches(self, result, values):
+        values = values[np.isfinite(values)]
+        self.assertEqual(result["count"], values.size)
+        self.assertAlmostEqual(result["min"], values.min())
+        self.assertAlmostEqual(result["max"], values.max())
+        self.assertAlmostEqual(result["ptp"], values.max() - values.min())
+        self.assertAlmostEqual(result["mean"], values.mean())
+        self.assertAlmostEqual(result["rms"], np.sqrt(np.mean(values**2)))
+
+    def test_reduce(self):
+        for first, last in [(0, 10), (3, 2000), (4000, 4030), (1023, 5000), (100, 99_999), (0, 100_003)]:
+            with self.subTest(first=first, last=last):
+                self.assertMatches(self.statistics.reduce(first, last), self.y[first:last])
+
+    def test_query(self):
+        self.assertMatches(self.statistics.query(10.5, 20_000), self.y[11:20_001])
+        self.assertMatches(self.statistics.query(), self.y)
+        self.assertIsNone(self.statistics.query(10, 20))  # Only NaN
+        self.assertIsNone(self.statistics.query(200_000, 300_000))
+
+    def test_integer_x(self):
+        result = RangeStatistics(np.arange(10), np.arange(10.0)).query(2.5, 7.5)
+        self.assertEqual((result["count"], result["min"], result["max"]), (5, 3.0, 7.0))
+
+    def test_extend(self):
+        grown = RangeStatistics(self.x[:50_000], self.y[:50_000])
+        grown.extend(self.x, self.y)
+        self.assertMatches(grown.reduce(0, self.x.size), self.y)
+        with self.assertRaises(ValueError):
+            grown.extend(self.x[:10], self.y[:10])
+
+    def test_block_size_bounded(self):
+        max_blocks, max_block = statistics.MAX_BLOCKS, statistics.MAX_BLOCK
+        try:
+            statistics.MAX_BLOCKS = 16
+            result = RangeStatistics(self.x, self.y)
+            self.assertLessEqual(result.y.size // result.block, 16)
+            self.assertMatches(result.reduce(7, 90_000), self.y[7:90_000])
+
+            # The samples scanned by a query are bounded whatever the length of the signal
+            statistics.MAX_BLOCK = 2048
+            result = RangeStatistics(self.x, self.y)
+            self.assertEqual(result.block, 2048)
+            self.assertMatches(result.reduce(7, 90_000), self.y[7:90_000])
+        finally:
+            statistics.MAX_BLOCKS, statistics.MAX_BLOCK = max_blocks, max_block
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import gc
+import unittest
+
+import numpy as np
+
+from signal_plotter.lazy import normalize_items
+from signal_plotter.timebase import TimebaseRegistry, as_signal_array
+
+
+class TestTimebase(unittest.TestCase):
+    def test_signal_array(self):
+        values = np.arange(10.0)
+        array = as_signal_array(values)
+        self.assertTrue(np.shares_memory(array, values))
+        self.assertFalse(array.flags.writeable)
+        self.assertTrue(values.flags.writeable)
+
+        array = as_signal_array(np.arange(20.0).reshape(10, 2)[:, 0])
+        self.assertTrue(array.flags.c_contiguous)
+        np.testing.assert_array_equal(as_signal_array([[1, 2], [3, 4]]), [1, 2, 3, 4])
+
+    def test_shared_timebase(self):
+        registry = TimebaseRegistry()
+        x = registry.register(np.linspace(0, 1, 1000))
+        self.assertIs(registry.register(np.linspace(0, 1, 1000)), x)
+        self.assertIs(registry.register(list(np.linspace(0, 1, 1000))), x)
+        other = registry.register(np.linspace(0, 2, 1000))
+        self.assertIsNot(other, x)
+        self.assertEqual(len(registry), 2)
+
+        # The timebases are released with the last signal using them
+        del x, other
+        gc.collect()
+        self.assertEqual(len(registry), 0)
+
+    def test_normalize_items(self):
+        registry = TimebaseRegistry()
+        items = normalize_items({f"s{i}": {"x": np.arange(100.0), "y": [i] * 100} for i in range(3)}, registry)
+        self.assertIs(items["s0"]["x"], items["s2"]["x"])
+        self.assertIsInstance(items["s1"]["y"], np.ndarray)
+        self.assertFalse(items["s1"]["y"].flags.writeable)
+
+    def test_normalize_copies(self):
+        x, y = np.arange(10.0), [1] * 10
+        signal = {"x": x, "y": y, "units": "V"}
+        items = normalize_items({"s": signal}, TimebaseRegistry())
+        self.assertIsNot(items["s"], signal)
+        self.assertEqual(items["s"]["units"], "V")
+        self.assertEqual(signal, {"x": x, "y": y, "units": "V"})  # The dict of the caller is not modified
+        self.assertIs(signal["y"], y)
+
+
+if __name__ == '__main__':
+    unittest.main()
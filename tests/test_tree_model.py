@@ -0,0 +1,157 @@
+import random
+import unittest
+
+from pyqtgraph.Qt.QtCore import QModelIndex, QPersistentModelIndex, Qt
+
+from signal_plotter import tree_model
+from signal_plotter.tree_model import SignalTreeModel
+
+
+class TestSignalTreeModel(unittest.TestCase):
+    def setUp(self):
+        self.keys = ["b.y", "b.x", "a", "a.z", "c.d.e"]
+        self.model = SignalTreeModel(self.keys, units=lambda key: "V" if key == "b.x" else None)
+
+    def names(self, parent=QModelIndex()):
+        return [self.model.data(self.model.index(row, 0, parent)) for row in range(self.model.rowCount(parent))]
+
+    def test_rows(self):
+        self.assertEqual(self.names(), ["a", "b", "c"])
+        b = self.model.indexFromPath("b")
+        self.assertEqual(self.names(b), ["x", "y"])
+        self.assertEqual(self.model.parent(self.model.index(0, 0, b)), b)
+        self.assertEqual(self.model.data(self.model.index(0, 1, b)), "[V]")
+        self.assertTrue(self.model.hasChildren(self.model.indexFromPath("a")))
+        self.assertFalse(self.model.hasChildren(self.model.indexFromPath("a.z")))
+
+    def test_check(self):
+        changes = []
+        self.model.selection.selectionChanged.connect(lambda added, removed: changes.append((added, removed)))
+        b = self.model.indexFromPath("b")
+        self.model.setData(self.model.indexFromPath("b.x"), Qt.Checked, Qt.CheckStateRole)
+        self.assertEqual(self.model.data(b, Qt.CheckStateRole), Qt.PartiallyChecked)
+        self.model.setData(b, Qt.Checked, Qt.CheckStateRole)
+        self.assertEqual(self.model.data(b, Qt.CheckStateRole), Qt.Checked)
+        self.assertEqual(changes, [(["b.x"], []), (["b.y"], [])])
+
+        self.model.selection.setSelection(["a"])
+        self.assertEqual(self.model.data(b, Qt.CheckStateRole), Qt.Unchecked)
+        self.assertEqual(self.model.data(self.model.indexFromPath("a"), Qt.CheckStateRole), Qt.PartiallyChecked)
+        self.model.addKeys(["a.w"])
+        self.assertEqual(self.model.nodes["a"].parent.checked, 1)
+
+    def test_search(self):
+        self.model.setVisibleKeys([], ["b.x", "a", "a.z"])
+        self.assertEqual(self.names(), ["b", "c"])
+        self.assertEqual(self.names(self.model.indexFromPath("b")), ["y"])
+        self.assertFalse(self.model.indexFromPath("a").isValid())
+        self.model.setVisibleKeys(["a"], [])
+        self.assertEqual(self.names(), ["a", "b", "c"])
+        self.assertFalse(self.model.hasChildren(self.model.indexFromPath("a")))
+
+    def test_check_with_search(self):
+        model = SignalTreeModel(["motor.speed", "motor.current", "motor.temp", "other"])
+        model.setVisibleKeys(["motor.speed"], ["motor.current", "motor.temp"])
+        motor = model.indexFromPath("motor")
+        model.setData(motor, Qt.Checked, Qt.CheckStateRole)
+        self.assertEqual(model.selection.keys(), ["motor.speed"])  # Only the signals shown by the search
+        self.assertEqual(model.data(motor, Qt.CheckStateRole), Qt.Checked)
+
+        # The hidden signals count again once they are shown
+        model.setVisibleKeys(["motor.current", "motor.temp"], [])
+        self.assertEqual(model.data(motor, Qt.CheckStateRole), Qt.PartiallyChecked)
+        model.selection.select(["motor.temp"])
+        model.setVisibleKeys([], ["motor.current"])
+        self.assertEqual(model.data(motor, Qt.CheckStateRole), Qt.Checked)
+        model.setData(motor, Qt.Unchecked, Qt.CheckStateRole)
+        self.assertEqual(model.selection.keys(), [])
+
+    def test_search_updates_rows(self):
+        b = QPersistentModelIndex(self.model.indexFromPath("b"))
+        self.assertEqual(self.names(QModelIndex(b)), ["x", "y"])
+        events = []
+        self.model.modelReset.connect(lambda: events.append("reset"))
+        self.model.rowsRemoved.connect(lambda parent, first, last: events.append(("removed", parent.row(), first, last)))
+        self.model.rowsInserted.connect(lambda parent, first, last: events.append(("inserted", parent.row(), first, last)))
+
+        self.model.setVisibleKeys([], ["b.x", "c.d.e"])
+        self.assertEqual(events, [("removed", -1, 2, 2), ("removed", 1, 0, 0)])
+        self.assertTrue(b.isValid())  # The other rows are kept
+        self.assertEqual(self.names(QModelIndex(b)), ["y"])
+
+        events.clear()
+        self.model.setVisibleKeys(["b.x", "c.d.e"], [])
+        self.assertEqual(events, [("inserted", -1, 2, 2), ("inserted", 1, 0, 0)])
+        self.assertEqual(self.names(), ["a", "b", "c"])
+        self.assertEqual(self.names(QModelIndex(b)), ["x", "y"])
+
+    def test_search_layout_change(self):
+        b, y = QPersistentModelIndex(self.model.indexFromPath("b")), QPersistentModelIndex(self.model.indexFromPath("b.y"))
+        events = []
+        self.model.layoutChanged.connect(lambda: events.append("layout"))
+        max_row_changes = tree_model.MAX_ROW_CHANGES
+        try:
+            tree_model.MAX_ROW_CHANGES = 1
+            self.model.setVisibleKeys([], ["a", "a.z", "b.x"])
+        finally:
+            tree_model.MAX_ROW_CHANGES = max_row_changes
+        self.assertEqual(events, ["layout"])
+        self.assertEqual((b.row(), y.row()), (0, 0))
+        self.assertEqual(QModelIndex(y).parent(), QModelIndex(b))
+        self.assertEqual(self.names(), ["b", "c"])
+
+    def test_search_matches_new_model(self):
+        rng = random.Random(0)
+        keys = sorted({".".join(rng.choice("abcd") for _ in range(rng.randint(1, 4))) for _ in range(200)})
+        max_row_changes = tree_model.MAX_ROW_CHANGES
+        try:
+            # Insertions and removals of rows, and layout changes
+            for tree_model.MAX_ROW_CHANGES in (max_row_changes, 10):
+                model = SignalTreeModel(keys)
+                hidden = set()
+                for _ in range(50):
+                    for key in rng.sample(keys, 3):
+                        model.indexFromPath(key)  # Load some rows
+                    changed = set(rng.sample(keys, rng.randint(0, 30)))
+                    model.setVisibleKeys(changed & hidden, changed - hidden)
+                    hidden ^= changed
+                    expected = SignalTreeModel(keys)
+                    expected.setVisibleKeys([], hidden)
+                    self.assertEqual(self.tree(model), self.tree(expected))
+        finally:
+            tree_model.MAX_ROW_CHANGES = max_row_changes
+
+    def tree(self, model, parent=QModelIndex()):
+        while model.canFetchMore(parent):
+            model.fetchMore(parent)
+        rows = [model.index(row, 0, parent) for row in range(model.rowCount(parent))]
+        return [(model.data(index), self.tree(model, index)) for index in rows]
+
+    def test_pending(self):
+        pending = {"b.y"}
+        model = SignalTreeModel(self.keys, pending=pending.__contains__)
+        b, y = model.indexFromPath("b"), model.indexFromPath("b.y")
+        self.assertFalse(model.flags(y) & Qt.ItemIsEnabled)
+        self.assertTrue(model.flags(b) & Qt.ItemIsUserCheckable)
+        model.setData(b, Qt.Checked, Qt.CheckStateRole)
+        self.assertEqual(model.selection.keys(), ["b.x"])  # Pending signals are not selected
+
+        changes = []
+        model.dataChanged.connect(lambda first, last, roles: changes.append((first.row(), last.column())))
+        pending.clear()
+        model.refreshKeys(["b.y"])
+        self.assertEqual(changes, [(1, 1)])
+        self.assertTrue(model.flags(y) & Qt.ItemIsUserCheckable)
+
+    def test_fetch_more(self):
+        model = SignalTreeModel(f"s{i:05d}" for i in range(2 * tree_model.FETCH_BATCH + 10))
+        self.assertEqual(model.rowCount(), tree_model.FETCH_BATCH)
+        self.assertTrue(model.canFetchMore(QModelIndex()))
+        model.fetchMore(QModelIndex())
+        model.fetchMore(QModelIndex())
+        self.assertEqual(model.rowCount(), 2 * tree_model.FETCH_BATCH + 10)
+        self.assertFalse(model.canFetchMore(QModelIndex()))
+
+
+if __name__ == '__main__':
+    unittest.main()
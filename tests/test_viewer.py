@@ -0,0 +1,55 @@
+import os
+import unittest
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from signal_plotter.viewer import ProcessViewer, Viewer, view  # noqa: E402
+
+
+def make_items():
+    t = np.linspace(0, 10, 10_000)
+    return {"motor.speed": {"x": t, "y": np.sin(t), "units": "rpm"}}
+
+
+class TestViewer(unittest.TestCase):
+    def test_set_signals(self):
+        viewer = view(make_items(), pre_select=["motor.speed"])
+        self.assertIsInstance(viewer, Viewer)
+        self.assertTrue(viewer.is_open)
+
+        t = np.linspace(0, 20, 5_000)
+        viewer.set_signals({"motor.speed": {"x": t, "y": np.cos(t)}, "motor.current": {"x": t, "y": t}})
+        viewer.select(["motor.current", "unknown"])
+        viewer.process_events()
+        window = viewer.window
+        np.testing.assert_array_equal(window.items["motor.speed"]["y"], np.cos(t))
+        self.assertEqual(window.items["motor.speed"]["units"], "rpm")
+        self.assertEqual(window.listWidget.selectedKeys(), ["motor.speed", "motor.current"])
+
+        viewer.close()
+        self.assertFalse(viewer.is_open)
+
+
+class TestProcessViewer(unittest.TestCase):
+    def test_set_signals(self):
+        viewer = view(make_items(), pre_select=["motor.speed"], process=True)
+        self.assertIsInstance(viewer, ProcessViewer)
+        try:
+            t = np.linspace(0, 20, 5_000)
+            viewer.set_signals({"motor.speed": {"x": t, "y": np.cos(t)}, "motor.current": {"x": t, "y": t}})
+            viewer.select(["motor.current"])
+            viewer.wait(1.0)
+            self.assertTrue(viewer.is_open)
+        finally:
+            viewer.close()
+        self.assertFalse(viewer.is_open)
+        self.assertEqual(viewer.process.exitcode, 0)
+        self.assertFalse(viewer.pending)
+        with self.assertRaises(RuntimeError):
+            viewer.set_signals(make_items())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from signal_plotter.downsampling import XYTrajectory
+from signal_plotter.xy import XYCache, resample
+
+
+class TestResample(unittest.TestCase):
+    def test_same_time(self):
+        time = np.arange(10.0)
+        values = time * 2
+        self.assertTrue(np.shares_memory(resample(time, values, time.copy()), values))
+
+    def test_interpolation(self):
+        time = np.arange(10.0)
+        result = resample(time, time * 2, np.array([-1.0, 0.5, 4.25, 9.0, 12.0]))
+        np.testing.assert_array_equal(result, [np.nan, 1.0, 8.5, 18.0, np.nan])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            resample(np.arange(3.0), np.arange(4.0), np.arange(3.0))
+        with self.assertRaises(ValueError):
+            resample(np.array([0.0, 2.0, 1.0]), np.arange(3.0), np.arange(2.0))
+
+
+class TestXYTrajectory(unittest.TestCase):
+    def setUp(self):
+        # A circle traced 100 times
+        t = np.linspace(0, 200 * np.pi, 1_000_000)
+        self.trajectory = XYTrajectory(np.cos(t), np.sin(t))
+
+    def test_bounds(self):
+        self.assertAlmostEqual(self.trajectory.x_bounds[0], -1.0)
+        self.assertAlmostEqual(self.trajectory.y_bounds[1], 1.0)
+        self.assertLess(len(self.trajectory.overview[0]), len(self.trajectory))
+
+    def test_query_decimates(self):
+        x, y = self.trajectory.query((-1.5, 1.5), (-1.5, 1.5), 500, 500)
+        self.assertEqual(x.size % 2, 0)
+        # Retraced segments are drawn once
+        self.assertLess(x.size, 10_000)
+        np.testing.assert_allclose(np.hypot(x, y), 1.0, atol=1e-3)
+
+    def test_query_zoomed(self):
+        x, y = self.trajectory.query((0.9, 1.1), (-0.1, 0.1), 100, 100)
+        self.assertGreater(x.size, 0)
+        # The trajectory leaves the view and comes back: the segments drawn through the view follow the circle
+        t = np.linspace(0, 1, 50)[:, None]
+        px, py = x[0::2] + t * (x[1::2] - x[0::2]), y[0::2] + t * (y[1::2] - y[0::2])
+        inside = (np.abs(px - 1.0) < 0.1) & (np.abs(py) < 0.1)
+        np.testing.assert_allclose(np.hypot(px, py)[inside], 1.0, atol=0.01)
+
+    def test_nan_gaps(self):
+        trajectory = XYTrajectory([0.0, 1.0, np.nan, 2.0, 3.0], [0.0, 1.0, np.nan, 2.0, 3.0])
+        x, y = trajectory.query((0, 3), (0, 3), 100, 100)
+        self.assertFalse(np.isnan(x).any())
+        self.assertEqual(x.size, 4)
+
+    def test_empty(self):
+        x, y = XYTrajectory([np.nan], [np.nan]).query((0, 1), (0, 1), 10, 10)
+        self.assertEqual(x.size, 0)
+
+
+class TestXYCache(unittest.TestCase):
+    def test_cache(self):
+        cache = XYCache(size=2)
+        time = np.arange(10.0)
+        data = {k: {"x": time, "y": time * i} for i, k in enumerate("abc")}
+        trajectory = cache.get("a", data["a"], "b", data["b"])
+        self.assertIs(cache.get("a", data["a"], "b", data["b"]), trajectory)
+        cache.get("a", data["a"], "c", data["c"])
+        cache.get("b", data["b"], "c", data["c"])
+        self.assertNotIn(("a", "b"), cache)
+        cache.invalidate(["c"])
+        self.assertEqual(len(cache.trajectories), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()